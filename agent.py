@@ -1,28 +1,317 @@
 import os
 import json
 import re
+import threading
+import time
+import uuid
 from collections import Counter
-from dotenv import load_dotenv
-from groq import Groq
+from json_stream import IncrementalJSONParser
+from near_duplicates import NearDuplicateIndex
+from error_index import ErrorSignatureIndex
+from audit_rollups import AuditRollups
+from prompt_context import PromptContextBuilder, estimate_tokens
+from outbox import ACTION_DESTINATIONS, Outbox, local_sinks
+from escalations import EscalationStore, pattern_id_for
+from change_feed import ChangeFeed
+from llm_cassette import CassetteMiss
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, DeadlineExceeded, LLMUnavailable
+from decision_archive import append_to_archive, parse_timestamp, query_archive, retention_from_env, write_json_atomic
+from datetime import datetime, timedelta
+
+# Where tickets, decisions, the audit log and the other stores live;
+# HEALING_AGENT_DATA_DIR (or HealingAgent(data_dir=...)) points an agent elsewhere
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def data_dir_from_env():
+    return os.getenv('HEALING_AGENT_DATA_DIR') or DEFAULT_DATA_DIR
+
+# Heavy dependencies (groq SDK, dotenv, thread pools, asyncio) are imported on first use
+# so importing this module - and starting the API - stays cheap.
+_env_loaded = False
+
+
+def load_env():
+    """Load .env once per process"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+# Version of the REASON prompt's instructions. Cassettes key recorded answers on it
+# with the ticket's content (not the full prompt), so bump it when _build_prompt changes
+PROMPT_VERSION = 'reason-2'
+
+# Analysis fields decide() depends on; streamed responses list these first
+# (affected_merchants is not asked of the LLM: decide() counts it exactly from the error index)
+DECISION_FIELDS = ('root_cause', 'confidence', 'is_pattern')
+ANALYSIS_FIELDS = DECISION_FIELDS + ('recommended_priority', 'root_cause_explanation', 'pattern_details', 'assumptions')
+
+# Keyword rules for degraded-mode analysis, checked in order against the error log and issue
+HEURISTIC_RULES = (
+    (('webhook',), 'webhook_configuration'),
+    (('404', 'not found', 'documentation'), 'documentation_gap'),
+    (('sessionerror', 'paymentgateway', 'ssl', 'regression', '500 '), 'platform_bug'),
+)
+# fingerprints.json is written after this many changed fingerprints, and at the end of a run
+FINGERPRINT_FLUSH_EVERY = 25
+# Actions a degraded analysis may still take without human approval
+DEGRADED_AUTO_ACTIONS = ('assign_to_support_team', 'attach_to_escalation')
+
+def error_signature(ticket):
+    """Error type prefix of a ticket's error log, e.g. 'WebhookTimeout'"""
+    error_log = ticket.get('error_log', '')
+    if ':' in error_log:
+        return error_log.split(':')[0]
+    return 'Unknown'
+
+
+def ticket_fingerprint(ticket):
+    """Stable content hash of a ticket"""
+    import hashlib
+    canonical = json.dumps(ticket, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
 
-load_dotenv()
 
 class HealingAgent:
-    def __init__(self):
-        # Configure Groq client
-        self.client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+    def __init__(self, retention=None, outbox=None, data_dir=None):
+        load_env()
+        self.data_dir = data_dir or data_dir_from_env()
+        # Groq client and decisions are created lazily (see the properties below)
+        self._client = None
+        self._decisions = None
+        self._decisions_version = None  # decisions.json (mtime, size) that self._decisions reflects
+        self._history_index = None
+        self._escalations = None
+        self._history_records = {}
+        self._init_lock = threading.RLock()
+        self._audit_lock = threading.Lock()
+        self._audit_rollups = None
         self.model_name = 'llama-3.3-70b-versatile'  # Fast and capable
+        # 'groq' (default) or 'offline' for the deterministic local stand-in in offline_llm.py
+        self.llm_backend = os.getenv('LLM_BACKEND', 'groq').lower()
+        self.max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))  # Parallel LLM calls for batches
+        self.stream_reasoning = os.getenv('LLM_STREAMING', '').lower() in ('1', 'true', 'yes')  # Decide early from streamed fields
         self.tickets = []
-        self.decisions = self._load_decisions()  # Load from file for persistence
+        self.duplicate_index = NearDuplicateIndex()  # Near-duplicate clusters of the current tickets (synced in load_tickets)
+        self.error_index = ErrorSignatureIndex(error_signature)  # Exact per-signature merchants/tickets/impact
+        # Pattern summary in the REASON prompt: top-k entries + "other" under a token budget (see prompt_context.py)
+        self.prompt_context = PromptContextBuilder.from_env()
+        self.retention = retention_from_env(retention)  # Hot-set retention / archival policy
+        # Past analyses above reuse_threshold (and human-approved) replace the LLM call;
+        # those above few_shot_threshold are shown to the LLM as examples
+        self.reuse_threshold = float(os.getenv('ANALYSIS_REUSE_THRESHOLD', '0.8'))
+        self.few_shot_threshold = float(os.getenv('FEW_SHOT_THRESHOLD', '0.5'))
+        self.reuse_stats = Counter()
+        # With the outbox enabled, ACT records side effects and a background
+        # dispatcher delivers them (to local stand-in sinks under data/sinks)
+        if outbox is None:
+            outbox = os.getenv('HEALING_AGENT_OUTBOX', '').lower() in ('1', 'true', 'yes')
+        self.use_outbox = outbox
+        self._outbox = None
+        self._async_client = None
+        self._async_llm_slots = None  # asyncio.Semaphore, created on the event loop
+        # Change events (tickets, decisions, reviews, audit entries) for push clients
+        self.changes = ChangeFeed()
+        self.last_profile = None  # summary of the last process_all_tickets(profile=True)
+        # LLM cassette: 'record' every completion to a file or 'replay' them offline
+        self._cassette = None
+        self.cassette_path = os.getenv('LLM_CASSETTE')
+        self.cassette_mode = os.getenv('LLM_CASSETTE_MODE', '').lower() or ('replay' if self.cassette_path else None)
+        self.cassette_latency_scale = float(os.getenv('LLM_CASSETTE_LATENCY_SCALE', '1.0'))
+        # Model cascade: a fast model answers first, model_name only when needed (see model_cascade.py)
+        self.cascade = None
+        if os.getenv('LLM_CASCADE', '').lower() in ('1', 'true', 'yes'):
+            self.use_cascade()
+        # Hedged requests: race a duplicate against a call slower than the observed p95 (see hedging.py)
+        self.hedger = None
+        if os.getenv('LLM_HEDGE', '').lower() in ('1', 'true', 'yes'):
+            self.use_hedging()
+        self.last_batch = None  # makespan and per-ticket latency of the last reason_batch
+        # Time limits in seconds: all LLM calls for one ticket, and a whole batch / run (0 = none)
+        self.ticket_deadline = float(os.getenv('LLM_TICKET_DEADLINE', '30'))
+        self.batch_budget = float(os.getenv('LLM_BATCH_BUDGET', '0')) or None
+        # While the breaker is open, tickets get a local heuristic analysis marked
+        # degraded and are queued for re-analysis when the provider recovers
+        self.breaker = CircuitBreaker.from_env(on_state_change=self._on_breaker_change)
+        self.auto_reanalyze = os.getenv('LLM_AUTO_REANALYZE', '1').lower() in ('1', 'true', 'yes')
+        self._reanalysis = None
+        self._fingerprints = None  # {ticket_id: {fingerprint, pattern_context, recorded_at}}
+        self._fingerprints_dirty = 0  # changes not yet written to fingerprints.json
+        self._reanalysis_lock = threading.Lock()
+        self._active_runs = 0
+        self._breaker_recoveries = 0  # half-open -> closed transitions (see _on_breaker_change)
+        # One agent loop at a time: manual runs, re-analysis and the ingestion daemon share the stores
+        self._run_lock = threading.RLock()
+        self._tickets_lock = threading.Lock()
+        self._tickets_version = None  # tickets.json (mtime, size) that self.tickets reflects
+        # Running OBSERVE totals over self.tickets, so a batch of added tickets observes only its delta
+        self._pattern_rows = None
+        self._pattern_totals = None
+        self._full_run_lock = threading.Lock()  # one full (checkpointed) run at a time
+        self.ingestion = None  # IngestionDaemon fed by /api/tickets/ingest or --daemon (see ingestion.py)
+    
+    def use_cascade(self, enabled=True, **policy):
+        """Turn the fast-model-first cascade on (policy overrides the env settings) or off"""
+        from model_cascade import ModelCascade
+        
+        if not enabled:
+            self.cascade = None
+            return None
+        cascade = ModelCascade.from_env(self.model_name)
+        for name, value in policy.items():
+            if not hasattr(cascade, name):
+                raise ValueError(f"Unknown cascade setting '{name}'")
+            setattr(cascade, name, value)
+        self.cascade = cascade
+        return cascade
+    
+    def use_hedging(self, enabled=True, **policy):
+        """Turn hedged LLM requests on (policy overrides the env settings) or off"""
+        from hedging import HedgedCaller
+        
+        if not enabled:
+            self.hedger = None
+            return None
+        hedger = HedgedCaller.from_env(max_workers=2 * self.max_concurrency)
+        for name, value in policy.items():
+            if not hasattr(hedger, name):
+                raise ValueError(f"Unknown hedging setting '{name}'")
+            setattr(hedger, name, value)
+        self.hedger = hedger
+        return hedger
+    
+    def use_ingestion(self, enabled=True, **policy):
+        """Start the ingestion daemon (policy overrides the env settings), or stop it after draining"""
+        from ingestion import IngestionDaemon
+        
+        with self._init_lock:
+            daemon = self.ingestion
+            if not enabled:
+                self.ingestion = None
+            elif daemon is not None:
+                return daemon
+            else:
+                daemon = IngestionDaemon.from_env(self)
+                for name, value in policy.items():
+                    if not hasattr(daemon, name):
+                        raise ValueError(f"Unknown ingestion setting '{name}'")
+                    setattr(daemon, name, value)
+                self.ingestion = daemon.start()
+                return daemon
+        # Drained outside the lock: the worker's batches take it too
+        if daemon is not None:
+            daemon.stop(drain=True)
+        return None
+    
+    def use_cassette(self, path, mode='replay', latency_scale=1.0):
+        """Record LLM completions to, or replay them from, a cassette file (see llm_cassette.py)"""
+        from llm_cassette import MODES
+        
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (use {' or '.join(MODES)})")
+        with self._init_lock:
+            self.cassette_path = path
+            self.cassette_mode = mode
+            self.cassette_latency_scale = latency_scale
+            self._cassette = None
+            self._client = None
+            self._async_client = None
+    
+    @property
+    def cassette(self):
+        """The active Cassette, or None when not recording or replaying"""
+        if self.cassette_mode is None:
+            return None
+        if self._cassette is None:
+            with self._init_lock:
+                if self._cassette is None:
+                    from llm_cassette import Cassette
+                    
+                    if not self.cassette_path:
+                        raise ValueError("LLM_CASSETTE_MODE is set but LLM_CASSETTE (the cassette path) is not")
+                    self._cassette = Cassette(self.cassette_path)
+        return self._cassette
+    
+    def _build_llm_client(self, asynchronous=False):
+        if self.cassette_mode == 'replay':
+            from llm_cassette import ReplayClient
+            return ReplayClient(self.cassette, self.cassette_latency_scale, asynchronous=asynchronous)
+        
+        if self.llm_backend == 'offline':
+            from offline_llm import AsyncOfflineLLMClient, OfflineLLMClient
+            client = (AsyncOfflineLLMClient if asynchronous else OfflineLLMClient).from_env()
+        else:
+            from groq import AsyncGroq, Groq
+            # No SDK retries: a retry would run past the ticket deadline and hide
+            # failures from the circuit breaker (hedging covers slow calls)
+            client = (AsyncGroq if asynchronous else Groq)(api_key=os.getenv('GROQ_API_KEY'), max_retries=0)
+        
+        if self.cassette_mode == 'record':
+            from llm_cassette import RecordingClient
+            client = RecordingClient(client, self.cassette, asynchronous=asynchronous)
+        return client
+    
+    @property
+    def client(self):
+        """Groq client, created on first LLM use.
+        
+        LLM_BACKEND=offline uses a local stand-in; a cassette records or
+        replays the completions (see use_cassette).
+        """
+        if self._client is None:
+            with self._init_lock:
+                if self._client is None:
+                    self._client = self._build_llm_client()
+        return self._client
+    
+    @client.setter
+    def client(self, value):
+        self._client = value
+    
+    @property
+    def async_client(self):
+        """AsyncGroq client for the async REASON path, created on first use"""
+        if self._async_client is None:
+            with self._init_lock:
+                if self._async_client is None:
+                    self._async_client = self._build_llm_client(asynchronous=True)
+        return self._async_client
+    
+    @async_client.setter
+    def async_client(self, value):
+        self._async_client = value
+    
+    @property
+    def decisions(self):
+        """Decision hot set, loaded from file on first access"""
+        if self._decisions is None:
+            with self._init_lock:
+                if self._decisions is None:
+                    self._decisions = self._load_decisions()
+        return self._decisions
+    
+    @decisions.setter
+    def decisions(self, value):
+        self._decisions = value
         
     def _get_decisions_path(self):
         """Get path to decisions file"""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        return os.path.join(base_dir, "data", "decisions.json")
+        return os.path.join(self.data_dir, "decisions.json")
+    
+    def _decisions_file_version(self):
+        """(mtime, size) of decisions.json, to tell whether another process rewrote it"""
+        try:
+            stat = os.stat(self._get_decisions_path())
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
     
     def _load_decisions(self):
         """Load decisions from JSON file"""
         path = self._get_decisions_path()
+        self._decisions_version = self._decisions_file_version()
         if os.path.exists(path):
             try:
                 with open(path, 'r', encoding='utf-8') as f:
@@ -33,35 +322,307 @@ class HealingAgent:
     
     def _save_decisions(self):
         """Save decisions to JSON file for persistence"""
-        path = self._get_decisions_path()
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.decisions, f, indent=2, default=str)
+        with self._init_lock:  # no appends while the list is being serialized
+            write_json_atomic(self._get_decisions_path(), self.decisions)
+            self._decisions_version = self._decisions_file_version()
+    
+    def refresh_decisions(self):
+        """Re-read decisions.json if another process (e.g. the API) rewrote it; True if reloaded.
         
+        Only the decision list and the history index built from it are
+        replaced, so long-lived state (breaker, cascade, outbox) is kept.
+        """
+        with self._init_lock:
+            if self._decisions is None or self._decisions_file_version() == self._decisions_version:
+                return False
+            self._decisions = self._load_decisions()
+            self._history_index = None
+            self._history_records = {}
+            return True
+    
+    def _get_fingerprints_path(self):
+        """Get path to the per-ticket fingerprint index"""
+        return os.path.join(self.data_dir, "fingerprints.json")
+    
+    def _load_fingerprints(self):
+        """Load {ticket_id: {fingerprint, pattern_context, recorded_at}}"""
+        path = self._get_fingerprints_path()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+    
+    def _begin_fingerprints(self):
+        """Fingerprints for a run: re-read from disk unless this process has unsaved changes"""
+        with self._init_lock:
+            if self._fingerprints is None or not self._fingerprints_dirty:
+                self._fingerprints = self._load_fingerprints()
+            return self._fingerprints
+    
+    def _set_fingerprint(self, ticket_id, entry):
+        """Set (or with entry=None drop) a ticket's fingerprint; saved in batches"""
+        with self._init_lock:
+            if entry is None:
+                self._fingerprints.pop(ticket_id, None)
+            else:
+                self._fingerprints[ticket_id] = entry
+            self._fingerprints_dirty += 1
+            if self._fingerprints_dirty >= FINGERPRINT_FLUSH_EVERY:
+                self._flush_fingerprints()
+    
+    def _flush_fingerprints(self):
+        with self._init_lock:
+            if self._fingerprints_dirty:
+                write_json_atomic(self._get_fingerprints_path(), self._fingerprints)
+                self._fingerprints_dirty = 0
+    
+    def _get_reanalysis_path(self):
+        """Get path to the queue of tickets waiting for a non-degraded analysis"""
+        return os.path.join(self.data_dir, "reanalysis_queue.json")
+    
+    @property
+    def reanalysis_queue(self):
+        """{ticket_id: {queued_at, reason}} for tickets analyzed in degraded mode"""
+        if self._reanalysis is None:
+            with self._init_lock:
+                if self._reanalysis is None:
+                    path = self._get_reanalysis_path()
+                    queue = {}
+                    if os.path.exists(path):
+                        try:
+                            with open(path, 'r', encoding='utf-8') as f:
+                                queue = json.load(f)
+                        except (OSError, ValueError):
+                            queue = {}
+                    self._reanalysis = queue
+        return self._reanalysis
+    
+    def _queue_reanalysis(self, ticket_id, reason):
+        with self._init_lock:
+            self.reanalysis_queue[ticket_id] = {'queued_at': datetime.now().isoformat(), 'reason': reason}
+            write_json_atomic(self._get_reanalysis_path(), self.reanalysis_queue)
+    
+    def _dequeue_reanalysis(self, ticket_id):
+        with self._init_lock:
+            if self.reanalysis_queue.pop(ticket_id, None) is not None:
+                write_json_atomic(self._get_reanalysis_path(), self.reanalysis_queue)
+    
+    def _pattern_context(self, ticket, patterns):
+        """The part of the OBSERVE output that can change a ticket's analysis"""
+        signature = error_signature(ticket)
+        evidence = self.pattern_evidence(ticket)
+        return f"{signature}:{patterns['error_patterns'].get(signature, 0)}:{evidence['merchant_count']}"
+    
+    def _archived_latest(self):
+        """Newest archived decision per ticket, from one pass over the archive"""
+        latest = {}
+        for record in self.query_decision_archive():
+            latest.setdefault(record.get('decision', {}).get('ticket_id'), record)
+        return latest
+    
+    def _get_archive_dir(self):
+        """Get path to the decision archive folder"""
+        return os.path.join(self.data_dir, "archive")
+    
+    def compact_decisions(self, now=None):
+        """Move superseded, executed and expired decisions from the hot set to the archive
+        
+        What moves is governed by self.retention (see decision_archive.DEFAULT_RETENTION).
+        Archived decisions are written to time-segmented files under data/archive
+        and remain queryable through query_decision_archive().
+        """
+        policy = self.retention
+        now = now or datetime.now()
+        cutoff = None
+        if policy['max_age_days'] is not None:
+            cutoff = now - timedelta(days=policy['max_age_days'])
+        
+        # The whole read-partition-archive-write sequence holds the lock the
+        # mutators (run loop appends, reviews, outbox callback) take, so no
+        # decision recorded meanwhile is dropped when the list is replaced
+        with self._init_lock:
+            # Index of the newest decision per ticket
+            latest = {}
+            for idx, record in enumerate(self.decisions):
+                latest[record.get('decision', {}).get('ticket_id')] = idx
+            
+            keep, archive = [], []
+            for idx, record in enumerate(self.decisions):
+                ticket_id = record.get('decision', {}).get('ticket_id')
+                recorded_at = parse_timestamp(record.get('recorded_at'))
+                
+                superseded = policy['keep_latest_per_ticket'] and latest[ticket_id] != idx
+                executed = policy['archive_executed'] and record.get('status') == 'executed'
+                # Records without a timestamp predate retention and are never treated as expired
+                expired = cutoff is not None and recorded_at is not None and recorded_at < cutoff
+                
+                if superseded or executed or expired:
+                    archive.append(record)
+                else:
+                    keep.append(record)
+            
+            segments = {}
+            if archive:
+                segments = append_to_archive(self._get_archive_dir(), archive, policy['segment'])
+                self.decisions = keep
+                self._save_decisions()
+        
+        return {
+            'success': True,
+            'kept': len(keep),
+            'archived': len(archive),
+            'segments': segments
+        }
+    
+    def query_decision_archive(self, ticket_id=None, status=None, since=None, until=None, limit=None):
+        """Query archived decisions (newest first)"""
+        return query_archive(
+            self._get_archive_dir(),
+            ticket_id=ticket_id,
+            status=status,
+            since=since,
+            until=until,
+            limit=limit
+        )
+        
+    def _get_tickets_path(self):
+        return os.path.join(self.data_dir, "tickets.json")
+    
+    def _tickets_file_version(self):
+        """(mtime, size) of tickets.json, to tell whether self.tickets still matches it"""
+        try:
+            stat = os.stat(self._get_tickets_path())
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _tickets_current(self):
+        return self._tickets_version is not None and self._tickets_version == self._tickets_file_version()
+    
     def load_tickets(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        data_path = os.path.join(base_dir, "data", "tickets.json")
+        data_path = self._get_tickets_path()
 
         print("Loading tickets from:", data_path)
 
-        with open(data_path, "r", encoding="utf-8") as f:
-            self.tickets = json.load(f)
+        with self._tickets_lock:
+            version = self._tickets_file_version()
+            with open(data_path, "r", encoding="utf-8") as f:
+                self.tickets = json.load(f)
+            self._tickets_version = version
+            self._count_patterns(self.tickets, reset=True)
+        # Both indexes cover exactly the current tickets, so removed or edited ones stop counting
+        self.error_index.sync(self.tickets)
+        self.duplicate_index.sync_tickets(self.tickets)
 
         return self.tickets
     
+    def add_tickets(self, tickets):
+        """Add tickets to data/tickets.json (a ticket with a known ticket_id replaces it).
+        
+        The indexes and OBSERVE totals are updated with just these tickets,
+        unless the file was changed by someone else since it was last read.
+        """
+        data_path = self._get_tickets_path()
+        
+        with self._tickets_lock:
+            stale = not self._tickets_current()
+            current = []
+            if os.path.exists(data_path):
+                with open(data_path, "r", encoding="utf-8") as f:
+                    current = json.load(f)
+            previous = {t['ticket_id']: t for t in current}
+            # Near-duplicate clusters cannot drop a ticket, so a reworded one means a resync
+            reworded = any(
+                t['ticket_id'] in previous
+                and (NearDuplicateIndex.ticket_text(previous[t['ticket_id']]), previous[t['ticket_id']].get('merchant_id'))
+                != (NearDuplicateIndex.ticket_text(t), t.get('merchant_id'))
+                for t in tickets
+            )
+            incoming = {t['ticket_id']: t for t in tickets}
+            merged = [incoming.pop(t['ticket_id'], t) for t in current] + list(incoming.values())
+            write_json_atomic(data_path, merged)
+            self.tickets = merged
+            self._tickets_version = self._tickets_file_version()
+            self._count_patterns(merged if stale else tickets, reset=stale)
+        if stale:
+            self.error_index.sync(merged)
+            self.duplicate_index.sync_tickets(merged)
+        else:
+            self.error_index.update(tickets)
+            if reworded:
+                self.duplicate_index.sync_tickets(merged)
+            else:
+                for ticket in tickets:
+                    self.duplicate_index.insert_ticket(ticket)
+        self.changes.publish('tickets', {'tickets': tickets, 'added': len(tickets)})
+        return merged
+    
+    @staticmethod
+    def _pattern_row(ticket):
+        return (
+            error_signature(ticket),
+            ticket.get('severity') == 'critical',
+            ticket.get('migration_stage', 'unknown'),
+            ticket.get('checkout_failures', 0),
+            ticket.get('affected_customers', 0)
+        )
+    
+    def _count_patterns(self, tickets, reset=False):
+        """Apply new or replaced tickets to the running OBSERVE totals (called under _tickets_lock)"""
+        if reset or self._pattern_rows is None:
+            self._pattern_rows = {}
+            self._pattern_totals = {'errors': Counter(), 'stages': Counter(), 'critical': 0,
+                                    'checkout_failures': 0, 'affected_customers': 0}
+        totals = self._pattern_totals
+        for ticket in tickets:
+            row = self._pattern_row(ticket)
+            for counted, sign in ((self._pattern_rows.get(ticket['ticket_id']), -1), (row, 1)):
+                if counted is None:
+                    continue
+                signature, critical, stage, failures, customers = counted
+                totals['errors'][signature] += sign
+                totals['stages'][stage] += sign
+                totals['critical'] += sign * critical
+                totals['checkout_failures'] += sign * failures
+                totals['affected_customers'] += sign * customers
+            self._pattern_rows[ticket['ticket_id']] = row
+    
+    def _observed_patterns(self):
+        """observe(self.tickets) from the running totals: no pass over the tickets"""
+        with self._tickets_lock:
+            totals = self._pattern_totals
+            patterns = {
+                'total_tickets': len(self._pattern_rows),
+                'error_patterns': dict(+totals['errors']),
+                'critical_count': totals['critical'],
+                'migration_stages': dict(+totals['stages']),
+                'total_checkout_failures': totals['checkout_failures'],
+                'total_affected_customers': totals['affected_customers']
+            }
+        duplicate_clusters = self.duplicate_index.clusters(min_size=2)
+        patterns['near_duplicate_clusters'] = len(duplicate_clusters)
+        patterns['largest_cluster_size'] = duplicate_clusters[0]['size'] if duplicate_clusters else 1
+        return patterns
+    
     def observe(self, tickets):
         """OBSERVE: Detect patterns in tickets"""
         if not tickets:
             return {}
             
         # Pattern detection
-        error_types = []
-        for t in tickets:
-            error_log = t.get('error_log', '')
-            if ':' in error_log:
-                error_type = error_log.split(':')[0]
-            else:
-                error_type = 'Unknown'
-            error_types.append(error_type)
+        error_types = [error_signature(t) for t in tickets]
+        # The shared indexes hold exactly the ticket store (load_tickets/add_tickets).
+        # A batch that is not in the store (an ad-hoc analysis) is clustered on
+        # its own, so posting one never changes the evidence for real tickets
+        if all(t['ticket_id'] in self.duplicate_index for t in tickets):
+            duplicate_clusters = self.duplicate_index.clusters(min_size=2)
+        else:
+            scratch = NearDuplicateIndex()
+            scratch.sync_tickets(tickets)
+            duplicate_clusters = scratch.clusters(min_size=2)
         
         error_counts = Counter(error_types)
         
@@ -75,15 +636,46 @@ class HealingAgent:
             'critical_count': sum(1 for t in tickets if t.get('severity') == 'critical'),
             'migration_stages': dict(Counter([t.get('migration_stage', 'unknown') for t in tickets])),
             'total_checkout_failures': total_checkout_failures,
-            'total_affected_customers': total_affected_customers
+            'total_affected_customers': total_affected_customers,
+            'near_duplicate_clusters': len(duplicate_clusters),
+            'largest_cluster_size': duplicate_clusters[0]['size'] if duplicate_clusters else 1
         }
         
         return patterns
     
-    def reason(self, ticket, patterns):
-        """REASON: Use Gemini to analyze root cause"""
+    def pattern_evidence(self, ticket):
+        """Measured near-duplicate cluster for a ticket (read-only: a ticket outside the store is not indexed)"""
+        return self.duplicate_index.probe_ticket(ticket)
+    
+    def _build_prompt(self, ticket, patterns, examples=None, context=None):
+        """Build the REASON prompt for a ticket (context: bounded pattern summary, see _build_messages)"""
+        if context is None:
+            context, _ = self.prompt_context.build(patterns, error_signature(ticket), ticket.get('migration_stage', 'unknown'))
+        evidence = self.pattern_evidence(ticket)
+        same_error = self.error_index.for_ticket(ticket)
+        merchants = ', '.join(evidence['merchants'][:10]) or 'none'
+        if evidence['merchant_count'] > 10:
+            merchants += f", ... ({evidence['merchant_count'] - 10} more)"
+        
+        if same_error['specific']:
+            signature_section = f"""SAME ERROR SIGNATURE "{same_error['signature']}" (exact counts, treat as fact):
+- Tickets: {same_error['ticket_count']}
+- Distinct merchants: {same_error['merchant_count']}
+- Checkout failures across these tickets: {same_error['checkout_failures']}"""
+        else:
+            signature_section = (f"ERROR SIGNATURE \"{same_error['signature']}\" is too generic to group tickets by; "
+                                 f"judge patterns from the near-duplicate evidence and the ticket itself.")
+        
+        similar_cases = ""
+        if examples:
+            lines = [
+                f"- ({ex['similarity']:.0%} similar{', human-approved' if ex['approved'] else ''}) "
+                f"\"{ex['text'][:200]}\" -> root_cause: {ex['root_cause']}, confidence: {ex['confidence']}"
+                for ex in examples
+            ]
+            similar_cases = "\nSIMILAR PAST CASES (for reference, verify against this ticket):\n" + "\n".join(lines) + "\n"
         
-        prompt = f"""You are an expert AI support agent analyzing e-commerce platform migration issues.
+        return f"""You are an expert AI support agent analyzing e-commerce platform migration issues.
 
 TICKET INFORMATION:
 - Ticket ID: {ticket['ticket_id']}
@@ -97,12 +689,14 @@ TICKET INFORMATION:
 - Affected Customers: {ticket.get('affected_customers', 0)}
 
 SYSTEM-WIDE PATTERNS DETECTED:
-- Total tickets in system: {patterns['total_tickets']}
-- Error type frequency: {patterns['error_patterns']}
-- Critical severity tickets: {patterns['critical_count']}
-- Migration stage distribution: {patterns['migration_stages']}
-- Total checkout failures across all tickets: {patterns['total_checkout_failures']}
+{context}
 
+NEAR-DUPLICATE EVIDENCE (measured by text similarity, treat as fact):
+- Similar tickets including this one: {evidence['size']}
+- Distinct merchants affected: {evidence['merchant_count']} ({merchants})
+
+{signature_section}
+{similar_cases}
 ANALYSIS REQUIRED:
 1. ROOT CAUSE: Determine if this is:
    - "webhook_configuration" (merchant didn't update webhook URLs/endpoints)
@@ -110,7 +704,7 @@ ANALYSIS REQUIRED:
    - "migration_issue" (data migration or process problem)
    - "documentation_gap" (unclear migration instructions)
 
-2. PATTERN DETECTION: Is this isolated or affecting multiple merchants?
+2. PATTERN DETECTION: Given the counts above, is this one shared problem or isolated incidents? (Do not recount merchants.)
 
 3. CONFIDENCE: Rate 0-100. Be conservative and calibrated:
    - 85-100: Error message DIRECTLY states the cause with no ambiguity
@@ -121,77 +715,643 @@ ANALYSIS REQUIRED:
 
 4. ASSUMPTIONS: What are you assuming to reach this conclusion?
 
-Respond ONLY with valid JSON (no markdown, no code blocks):
+Respond ONLY with valid JSON (no markdown, no code blocks), with the fields in exactly this order:
 {{
     "root_cause": "one of the four options above",
-    "root_cause_explanation": "2-3 sentence detailed explanation of why you chose this root cause",
+    "confidence": 75,
     "is_pattern": true or false,
+    "recommended_priority": "low/medium/high/critical",
+    "root_cause_explanation": "2-3 sentence detailed explanation of why you chose this root cause",
     "pattern_details": "if pattern detected, explain what the pattern is and how many merchants affected",
-    "confidence": 75,
-    "assumptions": ["assumption 1", "assumption 2"],
-    "affected_merchants": 1,
-    "recommended_priority": "low/medium/high/critical"
+    "assumptions": ["assumption 1", "assumption 2"]
 }}"""
+    
+    def _build_messages(self, ticket, patterns, examples=None):
+        """REASON messages for a ticket; their estimated token count is recorded per ticket"""
+        context, info = self.prompt_context.build(patterns, error_signature(ticket), ticket.get('migration_stage', 'unknown'))
+        messages = [
+            {"role": "system", "content": "You are an expert AI support agent. Always respond with valid JSON only, no markdown."},
+            {"role": "user", "content": self._build_prompt(ticket, patterns, examples, context)}
+        ]
+        self.prompt_context.record(ticket['ticket_id'], sum(estimate_tokens(m['content']) for m in messages), info)
+        return messages
+    
+    @staticmethod
+    def _is_human_approved(record):
+        decision = record.get('decision', {})
+        return record.get('approved_by') == 'human' or (
+            record.get('status') == 'executed' and decision.get('requires_approval', False)
+        )
+    
+    def _index_history_record(self, record):
+        """Add a stored decision to the similarity index (records without ticket text are skipped)"""
+        text = record.get('ticket_text')
+        ticket_id = record.get('decision', {}).get('ticket_id')
+        if not text or not ticket_id:
+            return
+        key = f"{ticket_id}@{record.get('recorded_at', '')}"
+        self._history_records[key] = record
+        self._history_index.insert(key, text)
+    
+    def _get_history_index(self):
+        """Similarity index over past analyses, built from the decision store on first use"""
+        if self._history_index is None:
+            with self._init_lock:
+                if self._history_index is None:
+                    self._history_index = NearDuplicateIndex(threshold=self.few_shot_threshold)
+                    for record in self.query_decision_archive() + self.decisions:
+                        self._index_history_record(record)
+        return self._history_index
+    
+    def recall_similar(self, ticket, limit=3):
+        """Look up past analyses of similar tickets.
+        
+        Returns (reused_analysis, examples). reused_analysis is a copy of the
+        nearest neighbour's analysis when it is at least reuse_threshold similar
+        and was human-approved, else None. examples are the neighbours above
+        few_shot_threshold, for use as few-shot context.
+        """
+        index = self._get_history_index()
+        if not len(index):
+            return None, []
+        
+        text = NearDuplicateIndex.ticket_text(ticket)
+        examples = []
+        for key, similarity in index.query(text, limit=limit * 2):
+            record = self._history_records[key]
+            analysis = record.get('decision', {}).get('analysis')
+            if record['decision'].get('ticket_id') == ticket['ticket_id'] or not analysis or analysis.get('degraded'):
+                continue  # never reuse a ticket's own earlier analysis, or a degraded one
+            if similarity < self.few_shot_threshold:
+                break
+            
+            approved = self._is_human_approved(record)
+            if not examples and approved and similarity >= self.reuse_threshold:
+                reused = dict(analysis)
+                reused['reused_from'] = {
+                    'ticket_id': record['decision']['ticket_id'],
+                    'similarity': round(similarity, 3)
+                }
+                self.reuse_stats['reused'] += 1
+                return reused, []
+            
+            examples.append({
+                'text': record['ticket_text'],
+                'root_cause': analysis.get('root_cause', 'unknown'),
+                'confidence': analysis.get('confidence', 0),
+                'similarity': similarity,
+                'approved': approved
+            })
+            if len(examples) >= limit:
+                break
+        
+        if examples:
+            self.reuse_stats['few_shot'] += 1
+        return None, examples
+    
+    def _parse_analysis(self, response_text):
+        """Extract the analysis JSON from a raw completion"""
+        # Clean response - remove markdown code blocks if present
+        response_text = response_text.strip()
+        response_text = re.sub(r'^```json\s*', '', response_text)
+        response_text = re.sub(r'^```\s*', '', response_text)
+        response_text = re.sub(r'\s*```$', '', response_text)
+        
+        # Extract JSON
+        start = response_text.find('{')
+        end = response_text.rfind('}') + 1
+        
+        if start != -1 and end > start:
+            json_str = response_text[start:end]
+            return json.loads(json_str)
+        raise ValueError("No JSON found in response")
+    
+    def _fallback_analysis(self, ticket, error):
+        """Analysis used when the LLM call or its parsing fails"""
+        return {
+            "root_cause": "unknown",
+            "root_cause_explanation": f"Analysis failed: {str(error)}",
+            "is_pattern": False,
+            "pattern_details": "",
+            "confidence": 50,
+            "assumptions": ["Unable to parse AI response"],
+            "affected_merchants": 1,
+            "recommended_priority": ticket.get('severity', 'medium')
+        }
+    
+    def _degraded_analysis(self, ticket, error):
+        """Local keyword-based analysis used when the LLM gives no answer in time.
+        
+        Marked degraded (decide() then holds automated actions for approval)
+        and the ticket is queued for re-analysis once the provider recovers.
+        """
+        text = f"{ticket.get('error_log', '')} {ticket.get('issue', '')}".lower()
+        root_cause = next(
+            (cause for keywords, cause in HEURISTIC_RULES if any(k in text for k in keywords)),
+            'migration_issue'
+        )
+        merchants = max(1, self.error_index.for_ticket(ticket)['merchant_count'],
+                        self.pattern_evidence(ticket)['merchant_count'])
+        self.reuse_stats['degraded'] += 1
+        self._queue_reanalysis(ticket['ticket_id'], str(error))
+        return {
+            "root_cause": root_cause,
+            "confidence": 40,
+            "is_pattern": merchants >= 3,
+            "affected_merchants": merchants,
+            "recommended_priority": ticket.get('severity', 'medium'),
+            "root_cause_explanation": f"Degraded analysis, the LLM was unavailable ({error}). Root cause inferred from keywords in the error log.",
+            "pattern_details": f"{merchants} merchants in the near-duplicate cluster" if merchants > 1 else "",
+            "assumptions": ["Keyword heuristic, not an LLM analysis", "Queued for re-analysis"],
+            "degraded": True,
+            "degraded_reason": str(error)
+        }
+    
+    def _ticket_deadline(self, deadline=None):
+        """Absolute (time.monotonic) deadline for a ticket, capped by a batch deadline"""
+        own = time.monotonic() + self.ticket_deadline if self.ticket_deadline else None
+        if deadline is None or own is None:
+            return deadline if own is None else own
+        return min(own, deadline)
+    
+    def reason(self, ticket, patterns, deadline=None):
+        """REASON: Use Groq LLM to analyze root cause
+        
+        `deadline` (time.monotonic) is a batch's time budget; the ticket's own
+        deadline (ticket_deadline seconds) applies either way. Without an LLM
+        answer in time, or while the circuit breaker is open, the analysis is
+        degraded (see _degraded_analysis).
+        """
+        
+        reused, examples = self.recall_similar(ticket)
+        if reused is not None:
+            return reused
+        
+        deadline = self._ticket_deadline(deadline)
+        messages = self._build_messages(ticket, patterns, examples)
+        cassette_key = self._cassette_key(ticket)
+        self.reuse_stats['llm_calls'] += 1
+        
+        fast = None
+        if self.cascade is not None and not self.cascade.skip_fast_tier(ticket):
+            text, error, latency_ms = self._timed_completion(messages, self.cascade.fast_model, deadline, cassette_key)
+            if isinstance(error, LLMUnavailable):
+                return self._degraded_analysis(ticket, error)
+            fast = self._judge_fast_answer(ticket, text, error, latency_ms)
+            if fast['accepted'] and not self.cascade.should_audit():
+                return fast['analysis']
+        
+        text, error, latency_ms = self._timed_completion(messages, self.model_name, deadline, cassette_key)
+        if error is not None:
+            print(f"Warning: No LLM analysis for {ticket['ticket_id']}: {error}")
+            return self._large_tier_failed(ticket, fast, error)
 
         try:
+            analysis = self._parse_analysis(text)
+                
+        except Exception as e:
+            print(f"Warning: Error parsing Groq response for {ticket['ticket_id']}: {e}")
+            if fast is not None and fast['analysis'] is not None:
+                return self._large_tier_failed(ticket, fast, e)
+            analysis = self._fallback_analysis(ticket, e)
+        
+        return self._cascade_result(fast, analysis)
+    
+    def _call_allowed(self, deadline):
+        """(remaining seconds, error): error is set when the call must not be made"""
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return remaining, DeadlineExceeded("deadline reached before the LLM call")
+        if not self.breaker.allow():
+            return remaining, CircuitOpen("circuit breaker open after repeated LLM failures")
+        return remaining, None
+    
+    def _record_call(self, model, latency_ms, error):
+        if error is None:
+            self.breaker.record_success(latency_ms)
+        else:
+            self.breaker.record_failure(error)
+        if self.cascade is not None:
+            tier = 'fast' if model == self.cascade.fast_model else 'large'
+            self.cascade.record_call(tier, latency_ms, ok=error is None)
+    
+    def _cassette_key(self, ticket):
+        """Stable cassette key for a ticket's REASON calls (None without a cassette)"""
+        if self.cassette_mode is None:
+            return None
+        return f"{PROMPT_VERSION}:{ticket_fingerprint(ticket)}"
+    
+    @staticmethod
+    def _cassette_params(cassette_key):
+        # Only cassette clients accept (and strip) cassette_key
+        return {} if cassette_key is None else {'cassette_key': cassette_key}
+    
+    def _timed_completion(self, messages, model, deadline=None, cassette_key=None):
+        """One chat completion; returns (text, error, latency_ms) instead of raising.
+        
+        A CassetteMiss in replay mode is raised: the cassette does not cover
+        the run, which is not an LLM failure to degrade around.
+        """
+        remaining, error = self._call_allowed(deadline)
+        if error is not None:
+            return None, error, 0.0
+        # The SDK treats timeout=None as "no timeout", so it is only passed when set
+        timeout = {} if remaining is None else {'timeout': remaining}
+        
+        def _request():
             response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=1024,
+                **timeout,
+                **self._cassette_params(cassette_key)
+            )
+            return response.choices[0].message.content
+        
+        start = time.perf_counter()
+        try:
+            text = self.hedger.call(model, _request, deadline) if self.hedger is not None else _request()
+            error = None
+        except CassetteMiss:
+            self.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            text, error = None, e
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._record_call(model, latency_ms, error)
+        return text, error, latency_ms
+    
+    def _judge_fast_answer(self, ticket, text, error, latency_ms):
+        """Parse a fast-tier response and decide whether the cascade can keep it.
+        
+        Patterns are routed on the measured evidence decide() will act on
+        (error-signature and near-duplicate merchant counts), not on the fast
+        model's own is_pattern.
+        """
+        analysis = None
+        if error is None:
+            try:
+                analysis = self._parse_analysis(text)
+            except Exception as e:
+                error = e
+        reasons = self.cascade.escalation_reasons(
+            analysis, parse_error=error, is_pattern=self.measured_pattern(ticket)['is_pattern']
+        )
+        self.cascade.record_outcome(reasons)
+        if analysis is not None:
+            analysis['model'] = self.cascade.fast_model
+            analysis['cascade'] = {'tier': 'fast', 'escalated_for': reasons}
+        return {'analysis': analysis, 'accepted': not reasons, 'reasons': reasons}
+    
+    def _large_tier_failed(self, ticket, fast, error):
+        """Analysis when the large model gave no usable answer.
+        
+        An escalated fast-tier answer that parsed is still a real LLM analysis,
+        so it is used, marked unaudited (decide() holds it for approval). Only
+        without one is the analysis degraded.
+        """
+        if fast is None or fast['analysis'] is None:
+            return self._degraded_analysis(ticket, error)
+        analysis = fast['analysis']
+        if not fast['accepted']:
+            analysis['cascade']['unaudited'] = True
+            analysis['cascade']['large_error'] = str(error)
+        return analysis
+    
+    def _cascade_result(self, fast, analysis):
+        """The analysis to use after the large model answered (fast is None outside the cascade)"""
+        if fast is None:
+            if self.cascade is not None:
+                analysis['model'] = self.model_name
+                analysis['cascade'] = {'tier': 'large', 'escalated_for': ['critical_ticket']}
+            return analysis
+        if fast['analysis'] is not None:
+            self.cascade.record_comparison(fast['analysis'], analysis, accepted=fast['accepted'])
+        if fast['accepted']:
+            return fast['analysis']  # audited sample: the large answer only feeds the stats
+        analysis['model'] = self.model_name
+        analysis['cascade'] = {'tier': 'large', 'escalated_for': fast['reasons']}
+        return analysis
+    
+    def reason_streaming(self, ticket, patterns, on_decision_fields=None, deadline=None):
+        """REASON with a streamed completion.
+        
+        `on_decision_fields(analysis)` is called as soon as the fields decide()
+        needs have been parsed, with the (still partial) analysis dict. The same
+        dict is completed in place when the stream ends and is also returned.
+        Returns (analysis, early) where `early` says whether the callback fired.
+        """
+        reused, examples = self.recall_similar(ticket)
+        if reused is not None:
+            return reused, False
+        
+        deadline = self._ticket_deadline(deadline)
+        messages = self._build_messages(ticket, patterns, examples)
+        cassette_key = self._cassette_key(ticket)
+        self.reuse_stats['llm_calls'] += 1
+        
+        fast = None
+        if self.cascade is not None and not self.cascade.skip_fast_tier(ticket):
+            # The fast tier is not streamed: an accepted answer is complete at once
+            text, error, latency_ms = self._timed_completion(messages, self.cascade.fast_model, deadline, cassette_key)
+            if isinstance(error, LLMUnavailable):
+                return self._degraded_analysis(ticket, error), False
+            fast = self._judge_fast_answer(ticket, text, error, latency_ms)
+            if fast['accepted']:
+                if on_decision_fields:
+                    on_decision_fields(fast['analysis'])
+                return fast['analysis'], bool(on_decision_fields)
+            reasons = fast['reasons']
+        else:
+            reasons = ['critical_ticket'] if self.cascade is not None else None
+        
+        remaining, error = self._call_allowed(deadline)
+        if error is not None:
+            return self._large_tier_failed(ticket, fast, error), False
+        
+        parser = IncrementalJSONParser()
+        analysis = {}
+        if reasons is not None:
+            analysis.update({'model': self.model_name, 'cascade': {'tier': 'large', 'escalated_for': reasons}})
+        early = False
+        stream_done = False
+        start = time.perf_counter()
+        
+        try:
+            stream = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "You are an expert AI support agent. Always respond with valid JSON only, no markdown."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.3,
-                max_tokens=1024
+                max_tokens=1024,
+                stream=True,
+                **({} if remaining is None else {'timeout': remaining}),
+                **self._cassette_params(cassette_key)
             )
-            response_text = response.choices[0].message.content
-            
-            # Clean response - remove markdown code blocks if present
-            response_text = response_text.strip()
-            response_text = re.sub(r'^```json\s*', '', response_text)
-            response_text = re.sub(r'^```\s*', '', response_text)
-            response_text = re.sub(r'\s*```$', '', response_text)
-            
-            # Extract JSON
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
+            for chunk in stream:
+                if deadline is not None and time.monotonic() > deadline:
+                    # The timeout only bounds each read; stop a stream that trickles past the deadline
+                    getattr(stream, 'close', lambda: None)()
+                    raise DeadlineExceeded("streamed answer not finished within the ticket deadline")
+                if not chunk.choices:
+                    continue
+                completed = parser.feed(chunk.choices[0].delta.content or '')
+                if completed:
+                    analysis.update(completed)
+                if not early and on_decision_fields and parser.has(DECISION_FIELDS):
+                    early = True
+                    on_decision_fields(analysis)
+            stream_done = True
+            self._record_call(self.model_name, (time.perf_counter() - start) * 1000, None)
             
-            if start != -1 and end > start:
-                json_str = response_text[start:end]
-                analysis = json.loads(json_str)
-            else:
-                raise ValueError("No JSON found in response")
-                
+            if not parser.done:
+                # Stream ended without a clean object - fall back to the tolerant full parse
+                analysis.update(self._parse_analysis(parser.buffer))
+            error = "incomplete streamed response"
+        
+        except CassetteMiss:
+            self.breaker.record_cancelled()
+            raise
         except Exception as e:
             print(f"Warning: Error parsing Groq response for {ticket['ticket_id']}: {e}")
-            # Fallback analysis
-            analysis = {
-                "root_cause": "unknown",
-                "root_cause_explanation": f"Analysis failed: {str(e)}",
-                "is_pattern": False,
-                "pattern_details": "",
-                "confidence": 50,
-                "assumptions": ["Unable to parse AI response"],
-                "affected_merchants": 1,
-                "recommended_priority": ticket.get('severity', 'medium')
-            }
+            error = e
+            if not stream_done:
+                self._record_call(self.model_name, (time.perf_counter() - start) * 1000, e)
         
-        return analysis
+        if not stream_done and not any(k in analysis for k in DECISION_FIELDS):
+            return self._large_tier_failed(ticket, fast, error), False
+        
+        # Fields parsed before a failure are kept; only the gaps get fallback values
+        if any(k not in analysis for k in ANALYSIS_FIELDS):
+            for key, value in self._fallback_analysis(ticket, error).items():
+                analysis.setdefault(key, value)
+        
+        if fast is not None and fast['analysis'] is not None:
+            self.cascade.record_comparison(fast['analysis'], analysis, accepted=False)
+        
+        return analysis, early
+    
+    async def reason_async(self, ticket, patterns, deadline=None):
+        """REASON without blocking a thread: awaits the AsyncGroq call.
+        
+        At most max_concurrency LLM calls are in flight across all callers
+        on the event loop. Deadlines and degraded mode work as in reason().
+        """
+        import asyncio
+        
+        # The first lookup builds the history index from the decision archive on disk
+        reused, examples = await asyncio.to_thread(self.recall_similar, ticket)
+        if reused is not None:
+            return reused
+        
+        if self._async_llm_slots is None:
+            self._async_llm_slots = asyncio.Semaphore(self.max_concurrency)
+        
+        deadline = self._ticket_deadline(deadline)
+        messages = self._build_messages(ticket, patterns, examples)
+        cassette_key = self._cassette_key(ticket)
+        self.reuse_stats['llm_calls'] += 1
+        
+        fast = None
+        if self.cascade is not None and not self.cascade.skip_fast_tier(ticket):
+            text, error, latency_ms = await self._timed_completion_async(messages, self.cascade.fast_model, deadline, cassette_key)
+            if isinstance(error, LLMUnavailable):
+                return self._degraded_analysis(ticket, error)
+            fast = self._judge_fast_answer(ticket, text, error, latency_ms)
+            if fast['accepted'] and not self.cascade.should_audit():
+                return fast['analysis']
+        
+        text, error, latency_ms = await self._timed_completion_async(messages, self.model_name, deadline, cassette_key)
+        if error is not None:
+            print(f"Warning: No LLM analysis for {ticket['ticket_id']}: {error}")
+            return self._large_tier_failed(ticket, fast, error)
+        
+        try:
+            analysis = self._parse_analysis(text)
+        
+        except Exception as e:
+            print(f"Warning: Error parsing Groq response for {ticket['ticket_id']}: {e}")
+            if fast is not None and fast['analysis'] is not None:
+                return self._large_tier_failed(ticket, fast, e)
+            analysis = self._fallback_analysis(ticket, e)
+        
+        return self._cascade_result(fast, analysis)
+    
+    async def _timed_completion_async(self, messages, model, deadline=None, cassette_key=None):
+        """_timed_completion on the AsyncGroq client, within the shared concurrency limit"""
+        import asyncio
+        
+        remaining, error = self._call_allowed(deadline)
+        if error is not None:
+            return None, error, 0.0
+        
+        async def _request():
+            response = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=1024,
+                **self._cassette_params(cassette_key)
+            )
+            return response.choices[0].message.content
+        
+        async def _call():
+            if self.hedger is not None:
+                # The primary request takes a slot; hedges are bounded by the hedge budget
+                return await self.hedger.call_async(model, _request, slots=self._async_llm_slots)
+            async with self._async_llm_slots:
+                return await _request()
+        
+        start = time.perf_counter()
+        text, error, cancelled = None, None, True
+        try:
+            # wait_for cancels the request (and any hedge) when the deadline passes
+            text = await asyncio.wait_for(_call(), remaining)
+            cancelled = False
+        except asyncio.TimeoutError:
+            error, cancelled = DeadlineExceeded(f"no LLM answer within {remaining:.1f}s"), False
+        except CassetteMiss:
+            raise  # releases a half-open probe below, like a cancellation
+        except Exception as e:
+            error, cancelled = e, False
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            if cancelled:
+                # The caller was cancelled mid-call: no outcome, but a half-open probe must be released
+                self.breaker.record_cancelled()
+            else:
+                self._record_call(model, latency_ms, error)
+        return text, error, latency_ms
+    
+    async def reason_batch_async(self, tickets, patterns):
+        """reason_batch on the event loop; results returned in input order"""
+        import asyncio
+        
+        latencies = []
+        deadline = time.monotonic() + self.batch_budget if self.batch_budget else None
+        
+        async def _reason_one(ticket):
+            start = time.perf_counter()
+            try:
+                return {'success': True, 'data': await self.reason_async(ticket, patterns, deadline)}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+            finally:
+                latencies.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        results = list(await asyncio.gather(*(_reason_one(t) for t in tickets)))
+        self._record_batch(latencies, time.perf_counter() - start)
+        return results
+    
+    def reason_batch(self, tickets, patterns, max_workers=None):
+        """REASON for many tickets concurrently, results returned in input order"""
+        if not tickets:
+            return []
+        
+        latencies = []
+        deadline = time.monotonic() + self.batch_budget if self.batch_budget else None
+        
+        def _reason_one(ticket):
+            start = time.perf_counter()
+            try:
+                return {'success': True, 'data': self.reason(ticket, patterns, deadline)}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+            finally:
+                latencies.append(time.perf_counter() - start)
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        start = time.perf_counter()
+        workers = max(1, min(max_workers or self.max_concurrency, len(tickets)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() preserves input order regardless of completion order
+            results = list(pool.map(_reason_one, tickets))
+        self._record_batch(latencies, time.perf_counter() - start)
+        return results
+    
+    def _record_batch(self, latencies, makespan):
+        """Keep the makespan and per-ticket latency percentiles of the last batch"""
+        ordered = sorted(latencies)
+        
+        def _pct(p):
+            return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000, 1) if ordered else None
+        
+        self.last_batch = {
+            'tickets': len(ordered),
+            'makespan_ms': round(makespan * 1000, 1),
+            'ticket_latency_ms': {'p50': _pct(50), 'p95': _pct(95), 'p99': _pct(99), 'max': _pct(100)},
+            'finished_at': datetime.now().isoformat()
+        }
+    
+    def measured_pattern(self, ticket):
+        """Whether a ticket is part of a multi-merchant pattern, from the indexes alone.
+        
+        Merchant counts are measured, not estimated: exact counts for the
+        ticket's error signature (inverted index lookup) and the near-duplicate
+        cluster, which also catches reworded reports of the same problem.
+        'Unknown' or a bare HTTP status groups unrelated tickets, so for those
+        only the cluster counts.
+        """
+        same_error = self.error_index.for_ticket(ticket)
+        evidence = self.pattern_evidence(ticket)
+        if same_error['specific']:
+            affected_merchants = max(1, same_error['merchant_count'], evidence['merchant_count'])
+            pattern_key = same_error['signature']
+        else:
+            affected_merchants = max(1, evidence['merchant_count'])
+            pattern_key = f"similar-{evidence['ticket_ids'][0]}"
+        return {
+            'same_error': same_error,
+            'evidence': evidence,
+            'affected_merchants': affected_merchants,
+            'is_pattern': affected_merchants > 1,
+            'pattern_key': pattern_key
+        }
     
     def decide(self, ticket, analysis):
         """DECIDE: Determine action based on analysis"""
         
         confidence = analysis.get('confidence', 0)
-        is_pattern = analysis.get('is_pattern', False)
         severity = ticket.get('severity', 'medium')
         root_cause = analysis.get('root_cause', 'unknown')
-        affected_merchants = analysis.get('affected_merchants', 1)
+        
+        measured = self.measured_pattern(ticket)
+        same_error, evidence = measured['same_error'], measured['evidence']
+        affected_merchants = measured['affected_merchants']
+        pattern_key = measured['pattern_key']
+        is_pattern = measured['is_pattern']
+        if not same_error['specific']:
+            # Nothing to count merchants on but the cluster: the LLM may still call it a pattern
+            is_pattern = is_pattern or bool(analysis.get('is_pattern', False))
+        analysis['affected_merchants'] = affected_merchants
+        analysis['is_pattern'] = is_pattern
         
         # Decision logic with clear rules
+        escalation = None
         if is_pattern and affected_merchants >= 3:
-            action = "escalate_to_engineering"
-            risk_level = "high"
-            requires_approval = True
-            reasoning = f"PATTERN DETECTED: {affected_merchants} merchants experiencing same issue. Platform-wide problem likely."
+            escalation = {
+                'pattern_id': pattern_id_for(pattern_key),
+                'merchant_id': ticket.get('merchant_id'),
+                'checkout_failures': ticket.get('checkout_failures', 0),
+                'affected_customers': ticket.get('affected_customers', 0)
+            }
+            open_escalation = self.escalations.open_for(escalation['pattern_id'])
+            if open_escalation:
+                # One escalation per pattern: later tickets join it instead of escalating again
+                action = "attach_to_escalation"
+                risk_level = "low"
+                requires_approval = False
+                escalation['escalation_id'] = open_escalation['escalation_id']
+                reasoning = (f"PATTERN DETECTED: {affected_merchants} merchants experiencing same issue. "
+                             f"Attached to open escalation {open_escalation['escalation_id']} "
+                             f"({len(open_escalation['ticket_ids'])} tickets so far).")
+            else:
+                action = "escalate_to_engineering"
+                risk_level = "high"
+                requires_approval = True
+                reasoning = f"PATTERN DETECTED: {affected_merchants} merchants experiencing same issue. Platform-wide problem likely."
             
         elif root_cause == "webhook_configuration" and confidence > 70:
             action = "send_webhook_configuration_guide"
@@ -223,12 +1383,24 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
             requires_approval = False
             reasoning = "Standard support workflow - human agent will investigate."
         
+        if analysis.get('degraded') and action not in DEGRADED_AUTO_ACTIONS:
+            # A keyword heuristic is not enough to act on automatically
+            requires_approval = True
+            reasoning += " Degraded analysis (LLM unavailable): held for approval, queued for re-analysis."
+        elif analysis.get('cascade', {}).get('unaudited') and action not in DEGRADED_AUTO_ACTIONS:
+            # The fast tier escalated this answer and the large model never checked it
+            requires_approval = True
+            reasoning += " Unaudited fast-tier analysis (large model failed): held for approval."
+        
         # Calculate estimated impact
         checkout_failures = ticket.get('checkout_failures', 0)
         affected_customers = ticket.get('affected_customers', 0)
         
-        if is_pattern:
-            impact = f"{affected_merchants} merchants, ~{checkout_failures * affected_merchants} failed checkouts"
+        if is_pattern and same_error['specific']:
+            impact = (f"{affected_merchants} merchants, {same_error['checkout_failures']} failed checkouts "
+                      f"across {same_error['ticket_count']} {same_error['signature']} tickets")
+        elif is_pattern:
+            impact = f"{affected_merchants} merchants across {evidence['size']} near-duplicate tickets"
         else:
             impact = f"1 merchant, {checkout_failures} failed checkouts, {affected_customers} customers affected"
         
@@ -240,14 +1412,177 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
             'reasoning': reasoning,
             'confidence': confidence,
             'estimated_impact': impact,
+            'pattern_evidence': {
+                'cluster_size': evidence['size'],
+                'merchant_count': evidence['merchant_count'],
+                'ticket_ids': evidence['ticket_ids'],
+                'error_signature': same_error
+            },
             'analysis': analysis
         }
+        if escalation:
+            decision['escalation'] = escalation
         
         return decision
     
+    @property
+    def escalations(self):
+        """Open escalations per pattern, loaded on first use"""
+        if self._escalations is None:
+            with self._init_lock:
+                if self._escalations is None:
+                    self._escalations = EscalationStore(os.path.join(self.data_dir, "escalations.json"))
+        return self._escalations
+    
+    @property
+    def outbox(self):
+        """Action outbox, created and started on first use"""
+        if self._outbox is None:
+            with self._init_lock:
+                if self._outbox is None:
+                    self._outbox = Outbox(
+                        os.path.join(self.data_dir, "outbox.jsonl"),
+                        local_sinks(os.path.join(self.data_dir, "sinks")),
+                        on_settled=self._on_delivery_settled
+                    ).start()
+        return self._outbox
+    
+    def _dispatch_action(self, decision, action_details, recorded_at):
+        """Hand an executed action to the outbox; returns its delivery info.
+        
+        The idempotency key includes the decision record's `recorded_at`, so a
+        later decision with the same action for the same ticket is delivered
+        again while retries of this one are not.
+        """
+        destination = ACTION_DESTINATIONS.get(decision['action'])
+        if destination is None:
+            return None
+        entry = self.outbox.enqueue(
+            destination,
+            {'ticket_id': decision['ticket_id'], 'action': decision['action'], 'details': action_details},
+            idempotency_key=f"{decision['ticket_id']}:{decision['action']}:{recorded_at}"
+        )
+        return {
+            'outbox_id': entry['id'],
+            'destination': destination,
+            'state': 'queued' if entry['state'] == 'pending' else entry['state'],
+            'duplicate': bool(entry.get('duplicate'))
+        }
+    
+    def _queue_delivery(self, result, recorded_at):
+        """With the outbox on, dispatch an executed result's action.
+        
+        The result (and its stored record) reads 'queued' until the outbox
+        delivers the action; _on_delivery_settled then marks it 'executed'.
+        """
+        delivery = self._dispatch_action(result['decision'], result['action_details'], recorded_at)
+        if delivery is None:
+            return
+        result['delivery'] = delivery
+        action = result['decision']['action']
+        if delivery['state'] == 'queued':
+            result['status'] = 'queued'
+            result['message'] = f"📤 Queued for delivery ({delivery['destination']}): {action}"
+        elif delivery['state'] == 'dead':
+            result['status'] = 'delivery_failed'
+            result['message'] = f"❌ Delivery failed: {action}"
+    
+    def _on_delivery_settled(self, entries):
+        """Outbox callback: mark queued decisions executed (or delivery_failed) once their action settles"""
+        settled = {entry['id']: entry for entry in entries}
+        with self._init_lock:
+            records = [
+                record for record in self.decisions
+                if record.get('status') == 'queued' and record.get('delivery', {}).get('outbox_id') in settled
+            ]
+            for record in records:
+                entry = settled[record['delivery']['outbox_id']]
+                record['delivery']['state'] = entry['state']
+                action = record['decision']['action']
+                if entry['state'] == 'delivered':
+                    record['status'] = 'executed'
+                    record['message'] = f"📬 Delivered: {action}"
+                else:
+                    record['status'] = 'delivery_failed'
+                    record['message'] = f"❌ Delivery failed: {action} ({entry.get('last_error')})"
+            if records:
+                self._save_decisions()
+        for record in records:
+            self.log_audit_event(record, triggered_by='human' if record.get('approved_by') == 'human' else 'auto')
+            self.changes.publish('decision', self._change_summary(record))
+    
+    def _settle_if_delivered(self, record):
+        """Catch a delivery that settled before its record was stored (the callback found nothing)"""
+        delivery = record.get('delivery')
+        if record.get('status') != 'queued' or not delivery:
+            return
+        entry = self.outbox.get(delivery['outbox_id'])
+        if entry is not None and entry['state'] in ('delivered', 'dead'):
+            self._on_delivery_settled([entry])
+    
+    def _coalesce_escalation(self, decision):
+        """Bind a pattern decision to its pattern's escalation, opening one if needed.
+        
+        Re-checked at ACT time so decisions made in the same batch (before any
+        escalation existed) still end up sharing one escalation.
+        """
+        escalation = decision['escalation']
+        impact = {k: escalation.get(k) for k in ('merchant_id', 'checkout_failures', 'affected_customers')}
+        current, created = self.escalations.open(escalation['pattern_id'], decision['ticket_id'], impact)
+        escalation['escalation_id'] = current['escalation_id']
+        
+        if created:
+            decision.update(action='escalate_to_engineering', risk_level='high', requires_approval=True)
+            return None
+        
+        current = self.escalations.attach(current['escalation_id'], decision['ticket_id'], impact)
+        decision.update(action='attach_to_escalation', risk_level='low', requires_approval=False)
+        return current
+    
+    def _attachment_details(self, escalation):
+        return {
+            'type': 'escalation_attachment',
+            'escalation_id': escalation['escalation_id'],
+            'escalation_status': escalation['status'],
+            'jira_ticket': escalation.get('jira_ticket'),
+            'ticket_count': len(escalation['ticket_ids']),
+            'impact': self.escalations.summary(escalation)
+        }
+    
+    def _attached_records(self, escalation_id):
+        """Latest decision records still waiting on an escalation's owner, in attach order"""
+        latest = {}
+        for record in self.decisions:
+            ticket_id = record.get('decision', {}).get('ticket_id')
+            if ticket_id is not None:
+                latest[ticket_id] = record
+        return [
+            record for record in latest.values()
+            if record.get('status') == 'attached'
+            and record['decision'].get('escalation', {}).get('escalation_id') == escalation_id
+        ]
+    
     def act(self, decision, triggered_by='auto'):
         """ACT: Execute or recommend action"""
         
+        if decision.get('escalation'):
+            attached_to = self._coalesce_escalation(decision)
+            if attached_to:
+                # Joining an escalation that is still awaiting approval takes
+                # effect only when its owner ticket is approved
+                awaiting = attached_to['status'] == 'pending_approval'
+                message = f"🔗 Attached to escalation {attached_to['escalation_id']} ({len(attached_to['ticket_ids'])} tickets)"
+                if awaiting:
+                    message += f", awaiting approval of {attached_to['owner_ticket_id']}"
+                result = {
+                    'status': 'attached' if awaiting else 'executed',
+                    'message': message,
+                    'action_details': self._attachment_details(attached_to),
+                    'decision': decision
+                }
+                self.log_audit_event(result, triggered_by='system' if awaiting else triggered_by)
+                return result
+        
         if decision['requires_approval']:
             result = {
                 'status': 'pending_approval',
@@ -264,6 +1599,9 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
                 'action_details': self._execute_action(decision),
                 'decision': decision
             }
+            if self.use_outbox:
+                result['recorded_at'] = datetime.now().isoformat()
+                self._queue_delivery(result, result['recorded_at'])
             # Log auto-executed actions
             self.log_audit_event(result, triggered_by=triggered_by)
         
@@ -317,27 +1655,27 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
             }
         }
         
-        return action_map.get(decision['action'], {
+        details = action_map.get(decision['action'], {
             'type': 'unknown_action',
             'message': f"Action {decision['action']} not fully implemented"
         })
-    
-    def log_audit_event(self, action_result, triggered_by='auto'):
-        """Log action to persistent audit log"""
-        from datetime import datetime
-        
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        audit_path = os.path.join(base_dir, "data", "audit_log.json")
         
-        # Load existing log or create new
-        if os.path.exists(audit_path):
-            with open(audit_path, 'r', encoding='utf-8') as f:
-                audit_log = json.load(f)
-        else:
-            audit_log = []
+        escalation_id = decision.get('escalation', {}).get('escalation_id')
+        if decision['action'] == 'escalate_to_engineering' and escalation_id:
+            # One engineering ticket covering every ticket attached to the pattern
+            escalation = self.escalations.get(escalation_id)
+            details = dict(
+                details,
+                escalation_id=escalation_id,
+                affected_tickets=escalation['ticket_ids'],
+                affected_merchants=len(escalation['merchants']),
+                impact=self.escalations.summary(escalation)
+            )
         
-        # Create audit entry
-        entry = {
+        return details
+    
+    def _audit_entry(self, action_result, triggered_by='auto'):
+        return {
             'timestamp': datetime.now().isoformat(),
             'ticket_id': action_result.get('decision', {}).get('ticket_id', 'unknown'),
             'action': action_result.get('decision', {}).get('action', 'unknown'),
@@ -346,42 +1684,106 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
             'triggered_by': triggered_by,
             'message': action_result.get('message', '')
         }
+    
+    def _get_audit_path(self):
+        return os.path.join(self.data_dir, "audit_log.json")
+    
+    def log_audit_event(self, action_result, triggered_by='auto'):
+        """Log action to persistent audit log"""
+        return self.log_audit_events([action_result], triggered_by)[0]
+    
+    def log_audit_events(self, action_results, triggered_by='auto'):
+        """Append several actions to the audit log with a single read and write"""
+        return self._append_audit([self._audit_entry(result, triggered_by) for result in action_results])
+    
+    def _append_audit(self, entries):
+        audit_path = self._get_audit_path()
+        rollups = self.audit_rollups  # initialized outside the lock (first use reads the log)
         
-        audit_log.append(entry)
-        
-        # Save updated log
-        with open(audit_path, 'w', encoding='utf-8') as f:
-            json.dump(audit_log, f, indent=2)
+        # Serialize read-modify-write so concurrent requests don't drop entries
+        with self._audit_lock:
+            # Load existing log or create new
+            if os.path.exists(audit_path):
+                with open(audit_path, 'r', encoding='utf-8') as f:
+                    audit_log = json.load(f)
+            else:
+                audit_log = []
+            
+            audit_log.extend(entries)
+            
+            # Save updated log (atomically, so readers never see a partial file)
+            write_json_atomic(audit_path, audit_log)
+            rollups.apply(entries, audit_log)
         
-        return entry
+        self.changes.publish('audit', {'entries': entries})
+        return entries
+    
+    @property
+    def audit_rollups(self):
+        """Time-bucketed audit counts (data/audit_rollups.json), checked against the log on first use"""
+        if self._audit_rollups is None:
+            with self._init_lock:
+                if self._audit_rollups is None:
+                    rollups = AuditRollups(os.path.join(self.data_dir, "audit_rollups.json"))
+                    with self._audit_lock:
+                        audit_log = self.get_audit_log()
+                        if rollups.stats(limit=1)['entries'] != len(audit_log):
+                            rollups.rebuild(audit_log)
+                    self._audit_rollups = rollups
+        return self._audit_rollups
+    
+    def audit_stats(self, granularity='hour', limit=24):
+        """Dashboard counts from the audit rollups, plus decisions currently awaiting approval"""
+        stats = self.audit_rollups.stats(granularity, limit)
+        stats['pending_approval'] = len(self.pending_approvals())
+        stats['as_of'] = datetime.now().isoformat()
+        return stats
     
     def get_audit_log(self):
         """Retrieve the audit log"""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        audit_path = os.path.join(base_dir, "data", "audit_log.json")
+        audit_path = self._get_audit_path()
         
         if os.path.exists(audit_path):
             with open(audit_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         return []
     
-    def execute_approved_action(self, ticket_id):
-        """Execute an action that was pending approval (HITL flow)"""
-        
-        # Find the pending decision for this ticket
-        pending_decision = None
-        for d in self.decisions:
-            if d.get('decision', {}).get('ticket_id') == ticket_id and d.get('status') == 'pending_approval':
-                pending_decision = d
-                break
-        
-        if not pending_decision:
-            return {
-                'success': False,
-                'error': f'No pending approval found for ticket {ticket_id}'
-            }
+    @staticmethod
+    def _matches_filters(record, filters):
+        """Whether a decision record matches a bulk filter (action, root_cause, pattern_id)"""
+        decision = record.get('decision', {})
+        if filters.get('action') and decision.get('action') != filters['action']:
+            return False
+        if filters.get('root_cause') and decision.get('analysis', {}).get('root_cause') != filters['root_cause']:
+            return False
+        if filters.get('pattern_id') and decision.get('escalation', {}).get('pattern_id') != filters['pattern_id']:
+            return False
+        return True
+    
+    def pending_approvals(self, ticket_ids=None, filters=None):
+        """Pending decision records selected by ticket ids and/or a filter.
         
-        decision = pending_decision['decision']
+        Only the first pending record per ticket is returned, matching the
+        single-ticket approve/reject flow.
+        """
+        wanted = set(ticket_ids) if ticket_ids is not None else None
+        selected = {}
+        for record in self.decisions:
+            if record.get('status') != 'pending_approval':
+                continue
+            ticket_id = record.get('decision', {}).get('ticket_id')
+            if ticket_id in selected:
+                continue
+            if wanted is not None and ticket_id not in wanted:
+                continue
+            if filters and not self._matches_filters(record, filters):
+                continue
+            selected[ticket_id] = record
+        return list(selected.values())
+    
+    def _approve_record(self, record):
+        """Execute a pending record's action and mark it executed, or queued with the outbox (not saved or audited)"""
+        decision = record['decision']
         
         # Execute the action
         action_details = self._execute_action(decision)
@@ -394,78 +1796,674 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
             'decision': decision
         }
         
-        # Log this human-triggered execution
-        self.log_audit_event(result, triggered_by='human')
+        if self.use_outbox:
+            self._queue_delivery(result, record.get('recorded_at') or datetime.now().isoformat())
         
         # Update the stored decision status
-        pending_decision['status'] = 'executed'
-        pending_decision['action_details'] = action_details
-        self._save_decisions()  # Persist the status change
-        
+        record['status'] = result['status']
+        record['message'] = result['message']
+        record['approved_by'] = 'human'
+        record['action_details'] = action_details
+        if 'delivery' in result:
+            record['delivery'] = result['delivery']
         return result
     
+    def _reject_record(self, record, reason):
+        """Mark a pending record rejected (not saved or audited)"""
+        decision = record['decision']
+        record['status'] = 'rejected'
+        record['rejected_by'] = 'human'
+        record['rejection_reason'] = reason
+        return {
+            'success': True,
+            'status': 'rejected',
+            'message': f"❌ Human rejected: {decision['action']} ({reason})",
+            'decision': decision
+        }
+    
+    def _apply_approval_side_effects(self, result):
+        """Move an approved ticket's escalation to 'escalated' and release its attached tickets.
+        
+        Nothing is saved here: returns audit entries for the released tickets,
+        and the caller writes decisions, escalations and the audit log once.
+        """
+        decision = result['decision']
+        action_details = result['action_details']
+        
+        escalation_id = decision.get('escalation', {}).get('escalation_id')
+        if decision['action'] == 'escalate_to_engineering' and escalation_id:
+            escalation = self.escalations.update(
+                escalation_id,
+                status='escalated',
+                jira_ticket=action_details.get('jira_ticket'),
+                approved_at=datetime.now().isoformat()
+            )
+            records = self._release_attachments(escalation)
+            result['released'] = [record['decision']['ticket_id'] for record in records]
+            return [self._audit_entry(record, 'human') for record in records]
+        return []
+    
+    def _release_attachments(self, escalation):
+        """Mark tickets attached to a just-approved escalation executed (not saved or audited)"""
+        with self._init_lock:
+            records = self._attached_records(escalation['escalation_id'])
+            for record in records:
+                record['status'] = 'executed'
+                record['approved_by'] = 'human'
+                record['action_details'] = self._attachment_details(escalation)
+                record['message'] = f"🔗 Attached to escalation {escalation['escalation_id']} (approved)"
+        return records
+    
+    def _apply_rejection_side_effects(self, result, reason):
+        """Close the escalation a rejected ticket was awaiting approval for.
+        
+        Tickets attached to it are moved to a new escalation for the same
+        pattern, owned by the first of them, so a human reviews them again.
+        Returns their audit entries; nothing is saved here.
+        """
+        decision = result['decision']
+        escalation_id = decision.get('escalation', {}).get('escalation_id')
+        if decision['action'] == 'escalate_to_engineering' and escalation_id:
+            self.escalations.update(
+                escalation_id,
+                status='rejected',
+                rejection_reason=reason,
+                rejected_at=datetime.now().isoformat()
+            )
+            records = self._requeue_attachments(escalation_id)
+            result['requeued'] = [record['decision']['ticket_id'] for record in records]
+            return [self._audit_entry(record, 'system') for record in records]
+        return []
+    
+    def _requeue_attachments(self, escalation_id):
+        """Move the tickets attached to a rejected escalation to a new one (not saved or audited)"""
+        with self._init_lock:
+            records = self._attached_records(escalation_id)
+            if not records:
+                return []
+            current = None
+            for record in records:
+                decision = record['decision']
+                escalation = decision['escalation']
+                impact = {k: escalation.get(k) for k in ('merchant_id', 'checkout_failures', 'affected_customers')}
+                created = False
+                if current is None:
+                    current, created = self.escalations.open(escalation['pattern_id'], decision['ticket_id'], impact)
+                if created:
+                    # The first attached ticket owns the new escalation and awaits approval
+                    decision.update(action='escalate_to_engineering', risk_level='high', requires_approval=True)
+                    decision['reasoning'] += f" Re-queued: escalation {escalation_id} was rejected."
+                    record['status'] = 'pending_approval'
+                    record['message'] = (f"⏳ Action 'escalate_to_engineering' requires human approval "
+                                         f"(re-queued after {escalation_id} was rejected)")
+                    record.pop('action_details', None)
+                else:
+                    current = self.escalations.attach(current['escalation_id'], decision['ticket_id'], impact)
+                    record['message'] = (f"🔗 Attached to escalation {current['escalation_id']}, "
+                                         f"awaiting approval of {current['owner_ticket_id']}")
+                escalation['escalation_id'] = current['escalation_id']
+            for record in records:
+                if record['status'] == 'attached':
+                    record['action_details'] = self._attachment_details(current)
+        return records
+    
+    def resolve_escalation(self, escalation_id, resolution=None):
+        """Close an escalated pattern once engineering has fixed it"""
+        escalation = self.escalations.resolve(escalation_id, resolution)
+        self.changes.publish('escalation', {
+            'escalation_id': escalation_id,
+            'status': escalation['status'],
+            'pattern_id': escalation['pattern_id']
+        })
+        return escalation
+    
+    def execute_approved_action(self, ticket_id):
+        """Execute an action that was pending approval (HITL flow)"""
+        _, results = self._review_pending(
+            [ticket_id], None, self._approve_record, self._apply_approval_side_effects, 'approved'
+        )
+        if not results:
+            return {
+                'success': False,
+                'error': f'No pending approval found for ticket {ticket_id}'
+            }
+        return results[0]
+    
+    def reject_action(self, ticket_id, reason='Rejected by operator'):
+        """Reject an action that was pending approval (HITL flow)"""
+        _, results = self._review_pending(
+            [ticket_id], None,
+            lambda record: self._reject_record(record, reason),
+            lambda result: self._apply_rejection_side_effects(result, reason),
+            'rejected'
+        )
+        if not results:
+            return {
+                'success': False,
+                'error': f'No pending approval found for ticket {ticket_id}'
+            }
+        return results[0]
+    
+    def _review_pending(self, ticket_ids, filters, review, side_effects, outcome):
+        """Review the selected pending records; returns (pending, results).
+        
+        Status changes and their side effects (escalation updates, attached
+        tickets released or re-queued) are applied under the lock, so neither
+        compaction nor the outbox callback sees a half-reviewed record. Then
+        decisions.json, escalations.json and the audit log are each written
+        once for the whole batch.
+        """
+        with self._init_lock:
+            pending = self.pending_approvals(ticket_ids=ticket_ids, filters=filters)
+            results = [review(record) for record in pending]
+            follow_ups = []
+            if results:
+                with self.escalations.batch():
+                    for result in results:
+                        follow_ups.extend(side_effects(result))
+                self._save_decisions()
+        if results:
+            self._publish_review(outcome, results)
+            self._append_audit([self._audit_entry(result, 'human') for result in results] + follow_ups)
+        return pending, results
+    
+    @staticmethod
+    def _change_summary(record):
+        """Compact view of a decision record for change events"""
+        decision = record.get('decision', {})
+        return {
+            'ticket_id': decision.get('ticket_id'),
+            'status': record.get('status'),
+            'action': decision.get('action'),
+            'risk_level': decision.get('risk_level'),
+            'requires_approval': decision.get('requires_approval'),
+            'root_cause': decision.get('analysis', {}).get('root_cause'),
+            'recorded_at': record.get('recorded_at')
+        }
+    
+    def _publish_review(self, outcome, results):
+        self.changes.publish('review', {
+            'outcome': outcome,
+            'ticket_ids': [r['decision']['ticket_id'] for r in results]
+        })
+    
+    def _bulk_review(self, ticket_ids, filters, review, side_effects, outcome):
+        if not ticket_ids and not filters:
+            raise ValueError("Provide ticket_ids or a filter (action, root_cause, pattern_id)")
+        
+        pending, results = self._review_pending(ticket_ids or None, filters, review, side_effects, outcome)
+        found = {r['decision']['ticket_id'] for r in pending}
+        not_found = [t for t in (ticket_ids or []) if t not in found]
+        
+        return {
+            'success': True,
+            'count': len(results),
+            'ticket_ids': [r['decision']['ticket_id'] for r in results],
+            'not_found': not_found,
+            # Attached tickets executed with their approved escalation / moved to a new one
+            'released': [t for r in results for t in r.get('released', [])],
+            'requeued': [t for r in results for t in r.get('requeued', [])],
+            'results': results
+        }
+    
+    def approve_actions(self, ticket_ids=None, filters=None):
+        """Approve and execute many pending actions at once.
+        
+        Selects pending decisions by `ticket_ids` and/or `filters`
+        ({'action', 'root_cause', 'pattern_id'}). Approved actions are
+        executed, or queued with the outbox for delivery; decisions.json,
+        escalations.json and the audit log are each written once for the
+        whole batch.
+        """
+        return self._bulk_review(
+            ticket_ids, filters, self._approve_record, self._apply_approval_side_effects, 'approved'
+        )
+    
+    def reject_actions(self, ticket_ids=None, filters=None, reason='Rejected by operator'):
+        """Reject many pending actions at once (same selection as approve_actions)"""
+        return self._bulk_review(
+            ticket_ids, filters,
+            lambda record: self._reject_record(record, reason),
+            lambda result: self._apply_rejection_side_effects(result, reason),
+            'rejected'
+        )
+    
     def clear_audit_log(self):
         """Clear the audit log (for testing/reset)"""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        audit_path = os.path.join(base_dir, "data", "audit_log.json")
+        audit_path = self._get_audit_path()
         
-        with open(audit_path, 'w', encoding='utf-8') as f:
-            json.dump([], f)
+        rollups = self.audit_rollups
+        with self._audit_lock:
+            write_json_atomic(audit_path, [])
+            rollups.rebuild([])
         
+        self.changes.publish('audit_cleared', {})
         return {'success': True, 'message': 'Audit log cleared'}
     
-    def process_all_tickets(self):
-        """Full agent loop: OBSERVE → REASON → DECIDE → ACT for all tickets"""
+    def _process_ticket(self, ticket, patterns, stream=False, deadline=None):
+        """REASON → DECIDE → ACT for one ticket"""
+        if stream:
+            early = {}
+            
+            def _decide_early(partial_analysis):
+                # Act as soon as decide() has what it needs; the explanation
+                # keeps streaming into the same analysis dict afterwards
+                try:
+                    early['decision'] = self.decide(ticket, partial_analysis)
+                    early['action_result'] = self.act(early['decision'])
+                except Exception as e:
+                    # Raised below, not inside the stream, where it would pass for a bad LLM response
+                    early['error'] = e
+            
+            analysis, decided_early = self.reason_streaming(ticket, patterns, _decide_early, deadline)
+            if 'error' in early:
+                raise early['error']
+            if decided_early:
+                decision = early['decision']
+                action_result = early['action_result']
+            else:
+                decision = self.decide(ticket, analysis)
+                action_result = self.act(decision)
+        else:
+            # REASON phase
+            analysis = self.reason(ticket, patterns, deadline)
+            
+            # DECIDE phase
+            decision = self.decide(ticket, analysis)
+            
+            # ACT phase
+            action_result = self.act(decision)
+        
+        return {
+            'ticket': ticket,
+            'analysis': analysis,
+            'decision': decision,
+            'action_result': action_result
+        }
+    
+    def process_all_tickets(self, stream=None, force=False, profile=False, ticket_ids=None, resume=True):
+        """Full agent loop: OBSERVE → REASON → DECIDE → ACT for all tickets
+        
+        ticket_ids limits REASON → DECIDE → ACT to those tickets (OBSERVE
+        still sees all of them). The run shares one batch_budget deadline;
+        tickets left when it runs out get degraded analyses.
         
-        tickets = self.load_tickets()
+        profile=True captures cProfile/tracemalloc data for the run under
+        data/profiles/; the summary is kept in self.last_profile.
+        
+        With stream=True each ticket is decided and acted on as soon as the
+        decision fields arrive; the rest of the analysis is filled in on the
+        stored decision record when the stream completes.
+        
+        Tickets whose content fingerprint and pattern context match their last
+        run are not re-analyzed; their stored result is returned with
+        'skipped': True. force=True re-analyzes every ticket.
+        
+        Results are collected from iter_process_tickets(). A full run that was
+        interrupted continues from its checkpoint unless resume=False; only
+        the tickets processed in this call are returned.
+        """
+        if profile:
+            from profiling import Profiler, format_summary
+            
+            with Profiler('process_all_tickets', profile_dir=os.path.join(self.data_dir, 'profiles')) as profiler:
+                results = self.process_all_tickets(stream=stream, force=force, ticket_ids=ticket_ids, resume=resume)
+            self.last_profile = profiler.summary
+            print(format_summary(profiler.summary))
+            return results
+        
+        recoveries = self._breaker_recoveries
+        results = list(self.iter_process_tickets(stream=stream, force=force, ticket_ids=ticket_ids, resume=resume))
+        
+        # Tickets degraded earlier in this run are retried if the provider recovered
+        # during it (_on_breaker_change skips the drain while a run is active).
+        # Tickets degraded only by a deadline stay queued for the next run.
+        recovered = self._breaker_recoveries > recoveries
+        if (ticket_ids is None and recovered and self.reanalysis_queue
+                and self.breaker.state == CLOSED and self.auto_reanalyze):
+            retried = self.reanalyze_degraded()
+            if retried:
+                print(f"Re-analyzed {len(retried)} tickets that had degraded analyses")
+        return results
+    
+    def iter_process_tickets(self, stream=None, force=False, ticket_ids=None, resume=True):
+        """process_all_tickets as a generator: yields each ticket's result once it is recorded.
+        
+        Results are not accumulated, so memory does not grow with the batch.
+        A full run (no ticket_ids) checkpoints after every ticket to
+        data/run_checkpoint.json: the ticket order, how many are done, the
+        last committed ticket and the OBSERVE patterns snapshot. If the run
+        stops early (crash, restart, or the caller stops iterating), the next
+        full run continues from the checkpoint with the same patterns, and
+        finished tickets are neither re-analyzed nor yielded again. Tickets
+        added in the meantime are appended, and finished tickets that have
+        changed are processed again.
+        resume=False discards an unfinished checkpoint and starts over.
+        """
+        if stream is None:
+            stream = self.stream_reasoning
+        
+        # Full runs share the checkpoint, so they wait for each other. The run
+        # lock is held only while a step runs, never across a yield: a paused
+        # or slow consumer does not hold up other runs (e.g. ingestion batches).
+        if ticket_ids is None:
+            self._full_run_lock.acquire()
+        with self._init_lock:
+            self._active_runs += 1
+        try:
+            steps = self._run_agent_loop(stream, force, ticket_ids, resume)
+            try:
+                while True:
+                    with self._run_lock:
+                        try:
+                            result = next(steps)
+                        except StopIteration:
+                            return
+                    yield result
+            finally:
+                with self._run_lock:
+                    steps.close()
+        finally:
+            with self._init_lock:
+                self._active_runs -= 1
+            if ticket_ids is None:
+                self._full_run_lock.release()
+    
+    def _get_checkpoint_path(self):
+        """Get path to the checkpoint of the current (or last) full run"""
+        return os.path.join(self.data_dir, "run_checkpoint.json")
+    
+    def run_checkpoint(self):
+        """The checkpoint of the current or last full run, or None"""
+        path = self._get_checkpoint_path()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not read run checkpoint: {e}")
+        return None
+    
+    def _open_checkpoint(self, tickets, patterns, resume, fingerprints):
+        """(checkpoint, done ticket ids): the unfinished run to resume, or a new one.
+        
+        Tickets added since the run started are appended to its order, and
+        done tickets whose content changed since are processed again.
+        """
+        checkpoint = self.run_checkpoint() if resume else None
+        if checkpoint is not None and checkpoint.get('status') == 'running':
+            order = checkpoint['ticket_ids']
+            # A ticket recorded just before the checkpoint write was lost is done too
+            done = set(order[:checkpoint['completed']]) | {
+                r['decision'].get('ticket_id') for r in self.decisions
+                if r.get('run_id') == checkpoint['run_id'] and 'decision' in r
+            }
+            known = set(order)
+            added = [t['ticket_id'] for t in tickets if t['ticket_id'] not in known]
+            changed = {
+                t['ticket_id'] for t in tickets
+                if t['ticket_id'] in done and t['ticket_id'] in fingerprints
+                and fingerprints[t['ticket_id']].get('fingerprint') != ticket_fingerprint(t)
+            }
+            done -= changed
+            if added:
+                order.extend(added)
+                checkpoint['updated_at'] = datetime.now().isoformat()
+                write_json_atomic(self._get_checkpoint_path(), checkpoint)
+            print(f"Resuming run {checkpoint['run_id']}: {len(done)}/{len(order)} tickets already done "
+                  f"(last committed: {checkpoint['last_committed']}, {len(added)} new, {len(changed)} changed)")
+            return checkpoint, done
+        
+        checkpoint = {
+            'run_id': uuid.uuid4().hex[:12],
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat(),
+            'ticket_ids': [t['ticket_id'] for t in tickets],
+            'completed': 0,
+            'last_committed': None,
+            'patterns': patterns
+        }
+        write_json_atomic(self._get_checkpoint_path(), checkpoint)
+        return checkpoint, set()
+    
+    def _run_agent_loop(self, stream, force, ticket_ids, resume):
+        if ticket_ids is not None and self._tickets_current():
+            # add_tickets kept the tickets, indexes and OBSERVE totals current:
+            # a batch run (e.g. the ingestion daemon's) does not re-read or re-observe them all
+            tickets = list(self.tickets)
+            patterns = self._observed_patterns() if tickets else None
+        else:
+            tickets = self.load_tickets()
+            patterns = None
         
         if not tickets:
-            return []
+            return
         
         print(f"\nAgent Processing {len(tickets)} tickets...\n")
         
         # OBSERVE phase
-        patterns = self.observe(tickets)
+        if patterns is None:
+            patterns = self.observe(tickets)
+        fingerprints = self._begin_fingerprints()
+        checkpoint = position = None
+        if ticket_ids is None:
+            checkpoint, done = self._open_checkpoint(tickets, patterns, resume, fingerprints)
+            # A resumed run keeps the order and patterns its first part was analyzed with
+            patterns = checkpoint['patterns']
+            by_id = {t['ticket_id']: t for t in tickets}
+            position = {ticket_id: i for i, ticket_id in enumerate(checkpoint['ticket_ids'])}
+            tickets = [by_id[i] for i in checkpoint['ticket_ids'] if i in by_id and i not in done]
+        
         print(f"OBSERVE: Detected {patterns['total_tickets']} tickets")
         print(f"   - Critical: {patterns['critical_count']}")
         print(f"   - Error patterns: {patterns['error_patterns']}")
         print(f"   - Total checkout failures: {patterns['total_checkout_failures']}\n")
         
-        results = []
+        skipped = 0
+        degraded = 0
+        latest_records = {r.get('decision', {}).get('ticket_id'): r for r in self.decisions}
+        archived = None  # read on the first skipped ticket missing from the hot set
+        deadline = time.monotonic() + self.batch_budget if self.batch_budget else None
+        if ticket_ids is not None:
+            wanted = set(ticket_ids)
+            tickets = [t for t in tickets if t['ticket_id'] in wanted]
         
-        for idx, ticket in enumerate(tickets, 1):
-            print(f"Processing {idx}/{len(tickets)}: {ticket['ticket_id']}...", end=" ")
-            
-            # REASON phase
-            analysis = self.reason(ticket, patterns)
-            
-            # DECIDE phase
-            decision = self.decide(ticket, analysis)
-            
-            # ACT phase
-            action_result = self.act(decision)
-            
-            results.append({
-                'ticket': ticket,
-                'analysis': analysis,
-                'decision': decision,
-                'action_result': action_result
-            })
-            
-            self.decisions.append(action_result)
-            self._save_decisions()  # Persist for HITL approval
-            print(f"Done: {action_result['status']}")
+        try:
+            for idx, ticket in enumerate(tickets, 1):
+                print(f"Processing {idx}/{len(tickets)}: {ticket['ticket_id']}...", end=" ")
+                
+                fingerprint = ticket_fingerprint(ticket)
+                pattern_context = self._pattern_context(ticket, patterns)
+                known = fingerprints.get(ticket['ticket_id'], {})
+                
+                if not force and known.get('fingerprint') == fingerprint and known.get('pattern_context') == pattern_context:
+                    previous = latest_records.get(ticket['ticket_id'])
+                    if previous is None:
+                        if archived is None:
+                            archived = self._archived_latest()
+                        previous = archived.get(ticket['ticket_id'])
+                    if previous is not None:
+                        skipped += 1
+                        print(f"Unchanged: {previous['status']}")
+                        self._commit_checkpoint(checkpoint, position, ticket['ticket_id'])
+                        yield {
+                            'ticket': ticket,
+                            'analysis': previous['decision'].get('analysis', {}),
+                            'decision': previous['decision'],
+                            'action_result': previous,
+                            'skipped': True
+                        }
+                        continue
+                
+                result = self._process_ticket(ticket, patterns, stream=stream, deadline=deadline)
+                action_result = result['action_result']
+                is_degraded = bool(result['analysis'].get('degraded'))
+                
+                action_result.setdefault('recorded_at', datetime.now().isoformat())
+                action_result['fingerprint'] = fingerprint
+                action_result['pattern_context'] = pattern_context
+                action_result['ticket_text'] = NearDuplicateIndex.ticket_text(ticket)
+                if checkpoint is not None:
+                    action_result['run_id'] = checkpoint['run_id']
+                prompt_tokens = None if result['analysis'].get('reused_from') else self.prompt_context.tokens_for(ticket['ticket_id'])
+                if prompt_tokens is not None:
+                    action_result['prompt_tokens'] = prompt_tokens
+                with self._init_lock:  # not while compact_decisions replaces the list
+                    self.decisions.append(action_result)
+                    self._save_decisions()  # Persist for HITL approval
+                self._settle_if_delivered(action_result)
+                if self._history_index is not None:
+                    self._index_history_record(action_result)
+                
+                if is_degraded:
+                    # No fingerprint: the next run re-analyzes it even if nothing changed
+                    degraded += 1
+                    self._set_fingerprint(ticket['ticket_id'], None)
+                else:
+                    self._set_fingerprint(ticket['ticket_id'], {
+                        'fingerprint': fingerprint,
+                        'pattern_context': pattern_context,
+                        'recorded_at': action_result['recorded_at']
+                    })
+                    self._dequeue_reanalysis(ticket['ticket_id'])
+                self.changes.publish('decision', self._change_summary(action_result))
+                tokens_note = f", ~{prompt_tokens} prompt tokens" if prompt_tokens is not None else ""
+                print(f"Done: {action_result['status']}{' (degraded)' if is_degraded else ''}{tokens_note}")
+                self._commit_checkpoint(checkpoint, position, ticket['ticket_id'])
+                yield result
+        finally:
+            # Also when the caller stops iterating: finished tickets keep their fingerprints
+            self._flush_fingerprints()
+        
+        if skipped:
+            print(f"\nSkipped {skipped} unchanged tickets (use force=True to re-analyze)")
+        if degraded:
+            print(f"{degraded} tickets got degraded analyses (LLM {self.breaker.state}); queued for re-analysis")
+        
+        threshold = self.retention['auto_compact_above']
+        if threshold is not None and len(self.decisions) > threshold:
+            summary = self.compact_decisions()
+            print(f"Compacted decisions: kept {summary['kept']}, archived {summary['archived']}")
+        
+        if checkpoint is not None:
+            checkpoint.update(status='complete', updated_at=datetime.now().isoformat())
+            write_json_atomic(self._get_checkpoint_path(), checkpoint)
         
         print(f"\nAgent processing complete!")
-        return results
+    
+    def _commit_checkpoint(self, checkpoint, position, ticket_id):
+        """Record a finished ticket in the run checkpoint (after its decision is saved).
+        
+        Fingerprints are saved in batches, so a crash can lose the last
+        FINGERPRINT_FLUSH_EVERY of them; those tickets are re-analyzed by the next full run.
+        """
+        if checkpoint is None:
+            return
+        checkpoint['completed'] = max(checkpoint['completed'], position[ticket_id] + 1)
+        checkpoint['last_committed'] = ticket_id
+        checkpoint['updated_at'] = datetime.now().isoformat()
+        write_json_atomic(self._get_checkpoint_path(), checkpoint)
+
+    def reanalyze_degraded(self):
+        """Re-run the agent loop for tickets queued after a degraded analysis.
+        
+        Does nothing while the circuit breaker is open or another drain is
+        running. Tickets that are degraded again stay queued.
+        """
+        if self.breaker.state == OPEN or not self.reanalysis_queue:
+            return []
+        if not self._reanalysis_lock.acquire(blocking=False):
+            return []
+        try:
+            return self.process_all_tickets(force=True, ticket_ids=list(self.reanalysis_queue))
+        finally:
+            self._reanalysis_lock.release()
+    
+    def llm_health(self):
+        """Circuit breaker state, time limits and the re-analysis queue"""
+        return {
+            'breaker': self.breaker.stats(),
+            'ticket_deadline_seconds': self.ticket_deadline,
+            'batch_budget_seconds': self.batch_budget,
+            'degraded_analyses': self.reuse_stats['degraded'],
+            'reanalysis_queue': dict(self.reanalysis_queue)
+        }
+    
+    def _on_breaker_change(self, old, new):
+        print(f"LLM circuit breaker: {old} -> {new}")
+        self.changes.publish('llm_health', {'from': old, 'to': new, 'queued': len(self.reanalysis_queue)})
+        if not (old == HALF_OPEN and new == CLOSED):
+            return
+        # Recovered after an outage. Between runs nothing else would retry the
+        # queue; during a run process_all_tickets does it at the end
+        with self._init_lock:
+            self._breaker_recoveries += 1
+        if self.auto_reanalyze and self.reanalysis_queue and not self._active_runs:
+            threading.Thread(target=self.reanalyze_degraded, name='reanalyze-degraded', daemon=True).start()
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Self-healing support agent')
+    parser.add_argument('--compact', action='store_true', help='Compact decisions.json into the archive and exit')
+    parser.add_argument('--force', action='store_true', help='Re-analyze tickets even if unchanged since the last run')
+    parser.add_argument('--profile', action='store_true', help='Profile the run (written under data/profiles/)')
+    parser.add_argument('--restart', action='store_true', help='Discard an interrupted run\'s checkpoint instead of resuming it')
+    parser.add_argument('--record', metavar='CASSETTE', help='Record every LLM completion to a cassette file')
+    parser.add_argument('--replay', metavar='CASSETTE', help='Replay LLM completions from a cassette (no network)')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='Scale recorded latencies when replaying')
+    parser.add_argument('--cascade', action='store_true', help='Ask the fast model first, the large model only when needed')
+    parser.add_argument('--hedge', action='store_true', help='Hedge LLM requests that run longer than the observed p95')
+    parser.add_argument('--daemon', action='store_true', help='Process NDJSON tickets from stdin continuously until EOF')
+    args = parser.parse_args()
+    
     print("="*60)
     print("SELF-HEALING SUPPORT AGENT")
     print("="*60)
     
     agent = HealingAgent()
-    results = agent.process_all_tickets()
+    if args.record:
+        agent.use_cassette(args.record, mode='record')
+    elif args.replay:
+        agent.use_cassette(args.replay, mode='replay', latency_scale=args.latency_scale)
+    if args.cascade:
+        agent.use_cascade()
+    if args.hedge:
+        agent.use_hedging()
+    
+    if args.compact:
+        summary = agent.compact_decisions()
+        print(f"\nKept {summary['kept']} decisions, archived {summary['archived']}")
+        for segment, count in summary['segments'].items():
+            print(f"   - decisions-{segment}.json: +{count}")
+        raise SystemExit(0)
+    
+    if args.daemon:
+        import sys
+        from ingestion import parse_ndjson
+        
+        daemon = agent.use_ingestion()
+        print(f"Ingestion daemon reading NDJSON tickets from stdin (queue {daemon.capacity}, batches of {daemon.batch_size})")
+        for line in sys.stdin:
+            try:
+                tickets = parse_ndjson(line)
+            except ValueError as e:
+                print(f"Warning: Skipped ticket: {e}")
+                continue
+            for ticket in tickets:
+                daemon.put(ticket)  # blocks while the queue is full
+        agent.use_ingestion(enabled=False)
+        stats = daemon.stats()
+        print(f"\nIngested {stats['processed']} tickets in {stats['batches']} batches "
+              f"({stats['failed']} failed), lag p50/p95 {stats['processed_lag_seconds']['p50']}/"
+              f"{stats['processed_lag_seconds']['p95']} s")
+        raise SystemExit(0)
+    
+    results = agent.process_all_tickets(force=args.force, profile=args.profile, resume=not args.restart)
+    
+    if agent.use_outbox and not agent.outbox.flush(timeout=30):
+        print("Outbox still has undelivered actions; they will be retried on the next start")
     
     if results:
         print(f"\nSUMMARY REPORT")
@@ -477,6 +2475,30 @@ if __name__ == "__main__":
         print(f"Total Tickets Processed: {len(results)}")
         print(f"Auto-Executed Actions: {auto_executed}")
         print(f"Pending Human Approval: {pending_approval}")
+        queued = sum(1 for r in results if r['action_result']['status'] == 'queued')
+        if queued:
+            print(f"Queued for Delivery: {queued}")
+        print(f"LLM Calls: {agent.reuse_stats['llm_calls']} (reused past analyses: {agent.reuse_stats['reused']})")
+        if agent.reuse_stats['degraded']:
+            print(f"Degraded Analyses: {agent.reuse_stats['degraded']} (LLM breaker {agent.breaker.state}, "
+                  f"{len(agent.reanalysis_queue)} queued for re-analysis)")
+        if agent.cascade is not None:
+            cascade = agent.cascade.stats()
+            print(f"Cascade: {cascade['accepted']}/{cascade['fast_answers']} fast answers accepted, "
+                  f"{cascade['direct_to_large']} sent straight to {cascade['large_model']}")
+            for tier, tier_stats in cascade['tiers'].items():
+                print(f"   - {tier}: {tier_stats['calls']} calls, p50 {tier_stats['p50_ms']} ms, p95 {tier_stats['p95_ms']} ms")
+            print(f"   - escalation reasons: {cascade['escalation_reasons']}")
+        if agent.hedger is not None:
+            hedging = agent.hedger.stats()
+            print(f"Hedging: {hedging['hedges']} hedges for {hedging['calls']} calls ({hedging['hedge_wins']} won), "
+                  f"latency p50/p95/p99 {hedging['latency_ms']['p50']}/{hedging['latency_ms']['p95']}/{hedging['latency_ms']['p99']} ms")
+        prompts = agent.prompt_context.stats()
+        if prompts['prompts']:
+            print(f"Prompt tokens (estimated): p50 {prompts['prompt_tokens']['p50']}, max {prompts['prompt_tokens']['max']} "
+                  f"({prompts['truncated']} pattern summaries cut to top-{agent.prompt_context.top_k})")
+        if agent.cassette is not None:
+            print(f"Cassette {agent.cassette_mode}: {agent.cassette.stats}")
         
         print(f"\nACTIONS BREAKDOWN:")
         actions = [r['decision']['action'] for r in results]
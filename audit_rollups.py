@@ -0,0 +1,133 @@
+import os
+import json
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from decision_archive import parse_timestamp, write_json_atomic
+
+DIMENSIONS = ('action', 'status', 'triggered_by', 'risk_level')
+
+# granularity -> (bucket key format, how long its buckets are kept; None = forever)
+GRANULARITIES = {
+    'minute': ('%Y-%m-%dT%H:%M', timedelta(hours=24)),
+    'hour': ('%Y-%m-%dT%H', timedelta(days=30)),
+    'day': ('%Y-%m-%d', None)
+}
+
+
+def _combo(entry):
+    return '|'.join(str(entry.get(dimension, 'unknown')) for dimension in DIMENSIONS)
+
+
+class AuditRollups:
+    """Time-bucketed counts of audit entries, kept next to the audit log.
+
+    Each minute, hour and day bucket counts entries per
+    action × status × triggered_by × risk_level combination, as do all-time
+    totals. apply() is called with every append (under the audit lock), so
+    stats() costs O(buckets), not O(audit log). The file records how many
+    audit entries it covers. If that does not match the log (another process
+    appended, or the file is new), the rollups are rebuilt from the log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+        self._mtime = None
+
+    @staticmethod
+    def _empty():
+        return {'entries': 0, 'totals': {}, 'buckets': {g: {} for g in GRANULARITIES}}
+
+    def _load(self):
+        # Re-read only when the file changed (e.g. written by another process)
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self._empty()
+        if self._data is None or mtime != self._mtime:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+                self._mtime = mtime
+            except Exception as e:
+                print(f"Warning: Could not read audit rollups: {e}")
+                return self._empty()
+        return self._data
+
+    def _save(self, data):
+        write_json_atomic(self.path, data)
+        self._data = data
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def _add(self, data, entries):
+        newest = None
+        for entry in entries:
+            when = parse_timestamp(entry.get('timestamp')) or datetime.now()
+            combo = _combo(entry)
+            data['totals'][combo] = data['totals'].get(combo, 0) + 1
+            for granularity, (fmt, _) in GRANULARITIES.items():
+                bucket = data['buckets'][granularity].setdefault(when.strftime(fmt), {})
+                bucket[combo] = bucket.get(combo, 0) + 1
+            newest = when if newest is None else max(newest, when)
+        data['entries'] += len(entries)
+        if newest is not None:
+            self._prune(data, newest)
+
+    @staticmethod
+    def _prune(data, now):
+        for granularity, (fmt, keep) in GRANULARITIES.items():
+            if keep is None:
+                continue
+            oldest = (now - keep).strftime(fmt)
+            buckets = data['buckets'][granularity]
+            for key in [k for k in buckets if k < oldest]:
+                del buckets[key]
+
+    def apply(self, entries, audit_log):
+        """Count entries just appended to audit_log (the full log, entries included)"""
+        with self._lock:
+            data = self._load()
+            if data['entries'] != len(audit_log) - len(entries):
+                data = self._empty()
+                self._add(data, audit_log)
+            else:
+                self._add(data, entries)
+            self._save(data)
+
+    def rebuild(self, audit_log):
+        with self._lock:
+            data = self._empty()
+            self._add(data, audit_log)
+            self._save(data)
+
+    def stats(self, granularity='hour', limit=24):
+        """Totals per dimension and the last `limit` buckets of `granularity`"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        with self._lock:
+            data = self._load()
+            totals = dict(data['totals'])
+            buckets = data['buckets'][granularity]
+            keys = sorted(buckets)[-limit:] if limit else sorted(buckets)
+            series_counts = [(key, dict(buckets[key])) for key in keys]
+            entries = data['entries']
+
+        def _by_dimension(counts):
+            grouped = {dimension: Counter() for dimension in DIMENSIONS}
+            for combo, count in counts.items():
+                for dimension, value in zip(DIMENSIONS, combo.split('|')):
+                    grouped[dimension][value] += count
+            return {f'by_{dimension}': dict(counter) for dimension, counter in grouped.items()}
+
+        return {
+            'entries': entries,
+            'totals': {'total': sum(totals.values()), **_by_dimension(totals)},
+            'granularity': granularity,
+            'series': [
+                {'bucket': key, 'total': sum(counts.values()), **_by_dimension(counts)}
+                for key, counts in series_counts
+            ]
+        }
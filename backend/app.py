@@ -1,7 +1,43 @@
-from flask import Flask, jsonify, request
+import os
+import time
+
+
+def _process_start():
+    """(perf_counter value at process start, what it was measured from).
+    
+    On Linux the start time comes from /proc, so interpreter startup is
+    included; elsewhere timing starts when this module is imported.
+    """
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # Fields after the parenthesized command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        age = max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+        return time.perf_counter() - age, 'process start'
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter(), 'app import'
+
+
+_startup_t0, _startup_origin = _process_start()
+_startup_marks = [('app import started', (time.perf_counter() - _startup_t0) * 1000)]
+
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import sys
-import os
+import threading
+
+# STARTUP_PROFILE=1 prints how long each import/initialization step took.
+# For a per-module breakdown use: python -X importtime app.py
+STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def _mark_startup(label):
+    _startup_marks.append((label, (time.perf_counter() - _startup_t0) * 1000))
+
+
+_mark_startup('flask imported')
 
 # Add root directory to Python path
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -9,25 +45,181 @@ sys.path.insert(0, root_dir)
 
 # Now import from root
 from agent import HealingAgent
-from datagenerator import TicketGenerator
+from serialization import CompactJSONProvider, compress_response, fast_paths, normalize_results, wants_compact
+from async_jobs import AsyncRuntime, JobQueueFull, JobStore, wants_async
+from ingestion import IngestQueueFull, parse_ndjson
+_mark_startup('agent module imported')
 
 # Rest stays the same...
 import json
 
 app = Flask(__name__)
+app.json = CompactJSONProvider(app)
 CORS(app)
+_mark_startup('app created')
+
+# Agent and ticket generator are built on first use so the server can
+# answer /api/health before the LLM client or decision history exist.
+_agent = None
+_ticket_generator = None
+_init_lock = threading.Lock()
+
+
+def get_agent():
+    global _agent
+    if _agent is None:
+        with _init_lock:
+            if _agent is None:
+                _agent = HealingAgent()
+    return _agent
+
+
+def get_ticket_generator():
+    global _ticket_generator
+    if _ticket_generator is None:
+        with _init_lock:
+            if _ticket_generator is None:
+                from datagenerator import TicketGenerator
+                _ticket_generator = TicketGenerator()
+    return _ticket_generator
+
+
+# Concurrency limits for LLM-bound endpoints (see API_DOCS.md, "Async Jobs").
+# Synchronous analyses hold their request thread for the whole LLM call, so
+# only MAX_SYNC_LLM_REQUESTS may run at once; the rest get 503. Whole runs
+# (process-all, reanalyze) take minutes and have their own MAX_SYNC_RUN_REQUESTS
+# slots, so they cannot starve single-ticket analyses. Async (202) requests run
+# as jobs on a shared event loop and hold no request thread.
+MAX_SYNC_LLM_REQUESTS = int(os.getenv('MAX_SYNC_LLM_REQUESTS', '4'))
+MAX_SYNC_RUN_REQUESTS = int(os.getenv('MAX_SYNC_RUN_REQUESTS', '1'))
+MAX_ACTIVE_JOBS = int(os.getenv('MAX_ACTIVE_JOBS', '100'))
+_sync_llm_slots = threading.BoundedSemaphore(MAX_SYNC_LLM_REQUESTS)
+_sync_run_slots = threading.BoundedSemaphore(MAX_SYNC_RUN_REQUESTS)
+
+
+def _publish_job(job):
+    get_agent().changes.publish('job', {k: job[k] for k in ('job_id', 'kind', 'status', 'duration_ms')})
+
+
+# The event loop thread starts with the first job
+_runtime = AsyncRuntime()
+jobs = JobStore(_runtime, max_active=MAX_ACTIVE_JOBS, on_finish=_publish_job)
+
+
+class _SyncLLMSlot:
+    """Context manager taking a sync LLM slot without waiting; `acquired` tells if it got one.
+    
+    `run=True` takes a slot for a whole agent run instead of a single analysis.
+    """
+    
+    def __init__(self, run=False):
+        self.run = run
+        self._slots = _sync_run_slots if run else _sync_llm_slots
+    
+    def __enter__(self):
+        self.acquired = self._slots.acquire(blocking=False)
+        return self
+    
+    def __exit__(self, *exc):
+        if self.acquired:
+            self._slots.release()
+
+
+def _llm_busy(run=False):
+    if run:
+        message = f'{MAX_SYNC_RUN_REQUESTS} synchronous agent runs already in progress'
+    else:
+        message = f'{MAX_SYNC_LLM_REQUESTS} analyses already in progress'
+    return jsonify({
+        'success': False,
+        'error': f'{message}; retry later or use async mode (?async=1)'
+    }), 503, {'Retry-After': '10' if run else '2'}
+
+
+def _submit_job(kind, coro_factory):
+    """Start a background job and answer 202 with where to poll for it"""
+    try:
+        job = jobs.submit(kind, coro_factory)
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 429, {'Retry-After': '5'}
+    
+    status_url = f"/api/jobs/{job['job_id']}"
+    return jsonify({
+        'success': True,
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
 
-# Initialize
-agent = HealingAgent()
-ticket_generator = TicketGenerator()
+@app.after_request
+def negotiate_compression(response):
+    return compress_response(request, response)
+
+
+def _wants_profile():
+    """Profiling is requested with ?profile=1 or an `X-Profile: 1` header"""
+    flag = request.args.get('profile', '') or request.headers.get('X-Profile', '')
+    return flag.lower() in ('1', 'true', 'yes')
+
+
+@app.before_request
+def start_profile():
+    if _wants_profile():
+        from profiling import Profiler, ProfilerBusy
+        
+        profiler = Profiler(f"{request.method}-{request.path}")
+        try:
+            g.profiler = profiler.__enter__()
+        except ProfilerBusy as e:
+            g.profile_error = str(e)
+
+
+# Registered after negotiate_compression so it runs first (after_request runs in reverse)
+@app.after_request
+def attach_profile(response):
+    """Finish a requested profile and add its summary to the JSON response as `profile`"""
+    profiler = g.pop('profiler', None)
+    error = g.pop('profile_error', None)
+    if profiler is None and error is None:
+        return response
+    
+    if profiler is not None:
+        profiler.__exit__(None, None, None)
+        summary = profiler.summary
+        response.headers['X-Profile-Id'] = summary['profile_id']
+    else:
+        summary = {'error': error}
+    
+    if response.is_streamed or response.mimetype != 'application/json':
+        return response
+    body = response.get_json(silent=True)
+    if isinstance(body, dict):
+        body['profile'] = summary
+        response.set_data(app.json.dumps(body))
+    return response
+
+
+@app.teardown_request
+def abandon_profile(exc):
+    """Release the profiler if the request failed before after_request ran"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.__exit__(None, None, None)
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({
+    response = {
         'status': 'healthy',
         'message': 'Backend API is running'
-    })
+    }
+    if STARTUP_PROFILE:
+        response['startup_ms'] = dict(_startup_marks)
+    return jsonify(response)
 
 @app.route('/api/generate-tickets', methods=['POST'])
 def generate_new_tickets():
@@ -38,13 +230,14 @@ def generate_new_tickets():
         force_patterns = data.get('force_patterns', True)
         
         # Generate new tickets
-        tickets = ticket_generator.generate_tickets(
+        tickets = get_ticket_generator().generate_tickets(
             count=count,
             force_patterns=force_patterns
         )
         
         # Save to file
-        ticket_generator.save_to_file(tickets)
+        get_ticket_generator().save_to_file(tickets)
+        get_agent().changes.publish('tickets', {'tickets': tickets, 'replaced': True})
         
         return jsonify({
             'success': True,
@@ -62,7 +255,7 @@ def generate_new_tickets():
 def get_tickets():
     """Get all tickets"""
     try:
-        tickets = agent.load_tickets()
+        tickets = get_agent().load_tickets()
         return jsonify({
             'success': True,
             'data': tickets,
@@ -74,12 +267,56 @@ def get_tickets():
             'error': str(e)
         }), 500
 
+@app.route('/api/tickets/ingest', methods=['POST'])
+def ingest_tickets():
+    """Queue an NDJSON batch of tickets for the ingestion daemon (started on first use)"""
+    try:
+        tickets = parse_ndjson(request.get_data())
+        if not tickets:
+            raise ValueError("Request body has no tickets (expected one JSON object per line)")
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    daemon = get_agent().use_ingestion()
+    try:
+        accepted = daemon.offer(tickets)
+    except IngestQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'retry_after': e.retry_after,
+            'queue': daemon.stats()
+        }), 429, {'Retry-After': str(e.retry_after)}
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 413
+    
+    return jsonify({
+        'success': True,
+        'accepted': accepted,
+        'queue': daemon.stats()
+    }), 202
+
+@app.route('/api/tickets/ingest', methods=['GET'])
+def get_ingestion_stats():
+    """Ingestion queue depth, lag and throughput"""
+    daemon = get_agent().ingestion
+    return jsonify({
+        'success': True,
+        'data': daemon.stats() if daemon is not None else {'running': False, 'depth': 0, 'lag_seconds': 0.0}
+    })
+
 @app.route('/api/observe', methods=['POST'])
 def observe_patterns():
     """Observe patterns in tickets"""
     try:
-        tickets = agent.load_tickets()
-        patterns = agent.observe(tickets)
+        tickets = get_agent().load_tickets()
+        patterns = get_agent().observe(tickets)
         return jsonify({
             'success': True,
             'data': patterns
@@ -98,7 +335,14 @@ def analyze_ticket():
         ticket = data.get('ticket')
         patterns = data.get('patterns', {})
         
-        analysis = agent.reason(ticket, patterns)
+        if wants_async(request):
+            agent = get_agent()
+            return _submit_job('analyze', lambda: agent.reason_async(ticket, patterns))
+        
+        with _SyncLLMSlot() as slot:
+            if not slot.acquired:
+                return _llm_busy()
+            analysis = get_agent().reason(ticket, patterns)
         
         return jsonify({
             'success': True,
@@ -118,7 +362,7 @@ def make_decision():
         ticket = data.get('ticket')
         analysis = data.get('analysis')
         
-        decision = agent.decide(ticket, analysis)
+        decision = get_agent().decide(ticket, analysis)
         
         return jsonify({
             'success': True,
@@ -137,7 +381,7 @@ def execute_action():
         data = request.json
         decision = data.get('decision')
         
-        result = agent.act(decision)
+        result = get_agent().act(decision)
         
         return jsonify({
             'success': True,
@@ -149,11 +393,148 @@ def execute_action():
             'error': str(e)
         }), 500
 
+# Upper bound on items accepted by a single batch request
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '500'))
+
+
+def _get_batch(data, key):
+    """Validate and return the list under `key` of a batch request body"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"'{key}' must be a non-empty array")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large: {len(items)} items (max {MAX_BATCH_SIZE})")
+    return items
+
+
+def _batch_response(results):
+    """Build the standard batch response, tagging each result with its input index"""
+    data = [dict(result, index=idx) for idx, result in enumerate(results)]
+    failed = sum(1 for r in data if not r['success'])
+    return jsonify({
+        'success': True,
+        'data': data,
+        'count': len(data),
+        'failed': failed
+    })
+
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_tickets_batch():
+    """Analyze many tickets concurrently (REASON phase)"""
+    try:
+        data = request.json or {}
+        tickets = _get_batch(data, 'tickets')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        patterns = data.get('patterns')
+        if not patterns:
+            # Observe the submitted batch itself when no patterns are supplied
+            patterns = get_agent().observe([t for t in tickets if isinstance(t, dict)])
+        
+        if wants_async(request):
+            agent = get_agent()
+            
+            async def analyze_batch():
+                results = await agent.reason_batch_async(tickets, patterns)
+                return [dict(result, index=idx) for idx, result in enumerate(results)]
+            
+            return _submit_job('analyze_batch', analyze_batch)
+        
+        with _SyncLLMSlot() as slot:
+            if not slot.acquired:
+                return _llm_busy()
+            results = get_agent().reason_batch(tickets, patterns)
+        return _batch_response(results)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/decide/batch', methods=['POST'])
+def make_decisions_batch():
+    """Make decisions for many (ticket, analysis) pairs"""
+    try:
+        data = request.json or {}
+        items = _get_batch(data, 'items')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    results = []
+    for item in items:
+        try:
+            decision = get_agent().decide(item['ticket'], item['analysis'])
+            results.append({'success': True, 'data': decision})
+        except Exception as e:
+            results.append({'success': False, 'error': str(e)})
+    
+    return _batch_response(results)
+
+@app.route('/api/execute/batch', methods=['POST'])
+def execute_actions_batch():
+    """Execute many decisions (ACT phase)"""
+    try:
+        data = request.json or {}
+        decisions = _get_batch(data, 'decisions')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    results = []
+    for decision in decisions:
+        try:
+            results.append({'success': True, 'data': get_agent().act(decision)})
+        except Exception as e:
+            results.append({'success': False, 'error': str(e)})
+    
+    return _batch_response(results)
+
 @app.route('/api/process-all', methods=['POST'])
 def process_all_tickets():
     """Process all tickets through full agent loop"""
     try:
-        results = agent.process_all_tickets()
+        data = request.get_json(silent=True) or {}
+        options = {
+            'stream': data.get('stream'),
+            'force': bool(data.get('force', False)),
+            'resume': bool(data.get('resume', True))
+        }
+        
+        if wants_async(request):
+            agent = get_agent()
+            compact = wants_compact(request)
+            
+            async def process_all():
+                # The agent loop is blocking; it runs on the runtime's own
+                # single-worker executor, so runs are serialized
+                results = await _runtime.run_blocking(agent.process_all_tickets, **options)
+                return normalize_results(results) if compact else results
+            
+            return _submit_job('process_all', process_all)
+        
+        with _SyncLLMSlot(run=True) as slot:
+            if not slot.acquired:
+                return _llm_busy(run=True)
+            results = get_agent().process_all_tickets(**options)
+        
+        if wants_compact(request):
+            return jsonify({
+                'success': True,
+                'format': 'compact',
+                'data': normalize_results(results),
+                'count': len(results)
+            })
         
         return jsonify({
             'success': True,
@@ -166,6 +547,25 @@ def process_all_tickets():
             'error': str(e)
         }), 500
 
+@app.route('/api/process-all/checkpoint', methods=['GET'])
+def get_run_checkpoint():
+    """Progress of the current or last full agent run (what a resumed run would skip)"""
+    try:
+        checkpoint = get_agent().run_checkpoint()
+        if checkpoint is not None:
+            checkpoint = {k: v for k, v in checkpoint.items() if k not in ('ticket_ids', 'patterns')} | {
+                'total': len(checkpoint['ticket_ids'])
+            }
+        return jsonify({
+            'success': True,
+            'data': checkpoint
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/approve', methods=['POST'])
 def approve_action():
     """Approve and execute a pending action (Human-in-the-Loop)"""
@@ -179,7 +579,7 @@ def approve_action():
                 'error': 'ticket_id is required'
             }), 400
         
-        result = agent.execute_approved_action(ticket_id)
+        result = get_agent().execute_approved_action(ticket_id)
         
         if result.get('success'):
             return jsonify({
@@ -213,20 +613,90 @@ def reject_action():
                 'error': 'ticket_id is required'
             }), 400
         
-        # Log the rejection to audit
-        agent.log_audit_event({
+        result = get_agent().reject_action(ticket_id, reason)
+        
+        if not result.get('success'):
+            return jsonify({
+                'success': False,
+                'error': result.get('error', 'Unknown error')
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'message': f'Action for {ticket_id} rejected',
             'ticket_id': ticket_id,
-            'action': 'REJECTED',
             'status': 'rejected',
-            'result': {'reason': reason},
-            'triggered_by': 'human'
+            'requeued': result.get('requeued', [])
+        })
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _get_bulk_selection(data):
+    """ticket_ids and filter from a bulk review request body"""
+    ticket_ids = data.get('ticket_ids')
+    filters = data.get('filter') or {}
+    if ticket_ids is not None and not isinstance(ticket_ids, list):
+        raise ValueError('ticket_ids must be a list')
+    if not isinstance(filters, dict):
+        raise ValueError('filter must be an object')
+    unknown = set(filters) - {'action', 'root_cause', 'pattern_id'}
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+    if not ticket_ids and not any(filters.values()):
+        raise ValueError('ticket_ids or a filter (action, root_cause, pattern_id) is required')
+    return ticket_ids, filters
+
+@app.route('/api/approve/bulk', methods=['POST'])
+def approve_actions_bulk():
+    """Approve and execute many pending actions in one transaction"""
+    try:
+        data = request.json or {}
+        try:
+            ticket_ids, filters = _get_bulk_selection(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        result = get_agent().approve_actions(ticket_ids=ticket_ids, filters=filters)
+        
+        return jsonify({
+            'success': True,
+            'message': f"{result['count']} actions approved and executed",
+            'data': result
         })
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/reject/bulk', methods=['POST'])
+def reject_actions_bulk():
+    """Reject many pending actions in one transaction"""
+    try:
+        data = request.json or {}
+        try:
+            ticket_ids, filters = _get_bulk_selection(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        reason = data.get('reason', 'Rejected by operator')
+        result = get_agent().reject_actions(ticket_ids=ticket_ids, filters=filters, reason=reason)
         
         return jsonify({
             'success': True,
-            'message': f'Action for {ticket_id} rejected',
-            'ticket_id': ticket_id,
-            'status': 'rejected'
+            'message': f"{result['count']} actions rejected",
+            'data': result
         })
             
     except Exception as e:
@@ -235,11 +705,177 @@ def reject_action():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and, once finished, result of a background job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': job
+    })
+
+@app.route('/api/jobs', methods=['GET'])
+def get_job_stats():
+    """Background job counts and the concurrency limits in effect"""
+    return jsonify({
+        'success': True,
+        'data': {
+            **jobs.stats(),
+            'max_sync_llm_requests': MAX_SYNC_LLM_REQUESTS,
+            'max_sync_run_requests': MAX_SYNC_RUN_REQUESTS,
+            'max_llm_concurrency': get_agent().max_concurrency
+        }
+    })
+
+@app.route('/api/cascade', methods=['GET'])
+def get_cascade_stats():
+    """Model cascade per-tier latency, acceptance and disagreement stats (LLM_CASCADE=1)"""
+    agent = get_agent()
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': agent.cascade is not None,
+            **(agent.cascade.stats() if agent.cascade is not None else {})
+        }
+    })
+
+@app.route('/api/hedging', methods=['GET'])
+def get_hedging_stats():
+    """Hedged LLM request stats (LLM_HEDGE=1) and the last batch's makespan and tail latency"""
+    agent = get_agent()
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': agent.hedger is not None,
+            **(agent.hedger.stats() if agent.hedger is not None else {}),
+            'last_batch': agent.last_batch
+        }
+    })
+
+@app.route('/api/prompt-context', methods=['GET'])
+def get_prompt_context_stats():
+    """Token budget of the REASON prompt's pattern summary and estimated prompt tokens per ticket"""
+    return jsonify({
+        'success': True,
+        'data': get_agent().prompt_context.stats()
+    })
+
+@app.route('/api/llm-health', methods=['GET'])
+def get_llm_health():
+    """Circuit breaker state, deadlines and tickets waiting for re-analysis"""
+    return jsonify({
+        'success': True,
+        'data': get_agent().llm_health()
+    })
+
+@app.route('/api/reanalyze', methods=['POST'])
+def reanalyze_degraded():
+    """Re-run the agent loop for tickets that got a degraded analysis"""
+    try:
+        agent = get_agent()
+        if agent.breaker.state == 'open':
+            return jsonify({
+                'success': False,
+                'error': 'LLM circuit breaker is open; degraded tickets are re-analyzed once it recovers'
+            }), 503, {'Retry-After': str(int(agent.breaker.stats()['retry_in_seconds'] or 1) + 1)}
+        
+        if wants_async(request):
+            async def reanalyze():
+                return await _runtime.run_blocking(agent.reanalyze_degraded)
+            
+            return _submit_job('reanalyze', reanalyze)
+        
+        with _SyncLLMSlot(run=True) as slot:
+            if not slot.acquired:
+                return _llm_busy(run=True)
+            results = agent.reanalyze_degraded()
+        
+        return jsonify({
+            'success': True,
+            'data': results,
+            'count': len(results),
+            'still_queued': list(agent.reanalysis_queue)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Seconds between keep-alive comments on an idle change stream
+CHANGE_FEED_HEARTBEAT = float(os.getenv('CHANGE_FEED_HEARTBEAT', '15'))
+# An SSE stream with no events for this long is closed, freeing its server thread;
+# EventSource reconnects (after CHANGE_FEED_RETRY_MS) and resumes with Last-Event-ID
+CHANGE_FEED_IDLE_TIMEOUT = float(os.getenv('CHANGE_FEED_IDLE_TIMEOUT', '120'))
+CHANGE_FEED_RETRY_MS = int(os.getenv('CHANGE_FEED_RETRY_MS', '1000'))
+
+def _sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {app.json.dumps(event)}\n\n"
+
+@app.route('/api/changes', methods=['GET'])
+def change_feed():
+    """Push ticket, decision, review and audit changes (Server-Sent Events).
+    
+    Resume with the `Last-Event-ID` header (sent by EventSource on reconnect)
+    or `?cursor=`. A stream idle for CHANGE_FEED_IDLE_TIMEOUT seconds is
+    closed so the client reconnects. `?stream=0` returns the pending events
+    as JSON instead, waiting up to `?wait=` seconds (max 30) for the first one.
+    """
+    try:
+        feed = get_agent().changes
+        cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+        
+        if request.args.get('stream', '1').lower() in ('0', 'false', 'no'):
+            wait = min(float(request.args.get('wait', 0)), 30)
+            events = feed.since(cursor, timeout=wait)
+            return jsonify({
+                'success': True,
+                'data': events,
+                'cursor': events[-1]['id'] if events else (cursor or feed.cursor)
+            })
+        
+        def generate(cursor):
+            yield f"retry: {CHANGE_FEED_RETRY_MS}\n\n"
+            if cursor is None:
+                # Give the client a cursor to resume from before any event arrives
+                cursor = feed.cursor
+                yield _sse({'id': cursor, 'type': 'ready', 'data': {}})
+            # A disconnected client is noticed when a heartbeat fails to write
+            # (the server closes the generator); an idle one is let go here
+            idle_until = time.monotonic() + CHANGE_FEED_IDLE_TIMEOUT
+            while True:
+                remaining = idle_until - time.monotonic()
+                if remaining <= 0:
+                    return
+                events = feed.since(cursor, timeout=min(CHANGE_FEED_HEARTBEAT, remaining))
+                if not events:
+                    yield ": heartbeat\n\n"
+                    continue
+                for event in events:
+                    yield _sse(event)
+                cursor = events[-1]['id']
+                idle_until = time.monotonic() + CHANGE_FEED_IDLE_TIMEOUT
+        
+        return Response(generate(cursor), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/audit-log', methods=['GET'])
 def get_audit_log():
     """Get the action audit log"""
     try:
-        audit_log = agent.get_audit_log()
+        audit_log = get_agent().get_audit_log()
         return jsonify({
             'success': True,
             'data': audit_log,
@@ -251,11 +887,35 @@ def get_audit_log():
             'error': str(e)
         }), 500
 
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Dashboard counts from the time-bucketed audit rollups (no audit log scan)"""
+    try:
+        stats = get_agent().audit_stats(
+            granularity=request.args.get('granularity', 'hour'),
+            limit=request.args.get('limit', 24, type=int)
+        )
+        stats['serialization'] = fast_paths()
+        return jsonify({
+            'success': True,
+            'data': stats
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/ticket/<ticket_id>', methods=['GET'])
 def get_ticket(ticket_id):
     """Get a single ticket by ID"""
     try:
-        tickets = agent.load_tickets()
+        tickets = get_agent().load_tickets()
         ticket = next((t for t in tickets if t['ticket_id'] == ticket_id), None)
         
         if ticket:
@@ -274,11 +934,112 @@ def get_ticket(ticket_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/decisions/compact', methods=['POST'])
+def compact_decisions():
+    """Move superseded, executed and expired decisions into the archive"""
+    try:
+        result = get_agent().compact_decisions()
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/decisions/archive', methods=['GET'])
+def query_decision_archive():
+    """Query archived decisions by ticket, status and time range"""
+    try:
+        limit = request.args.get('limit', type=int)
+        records = get_agent().query_decision_archive(
+            ticket_id=request.args.get('ticket_id'),
+            status=request.args.get('status'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=limit
+        )
+        return jsonify({
+            'success': True,
+            'data': records,
+            'count': len(records)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/escalations', methods=['GET'])
+def get_escalations():
+    """Pattern escalations (optionally filtered by ?status=)"""
+    try:
+        escalations = get_agent().escalations.find(status=request.args.get('status'))
+        return jsonify({
+            'success': True,
+            'data': escalations,
+            'count': len(escalations)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/escalations/<escalation_id>/resolve', methods=['POST'])
+def resolve_escalation(escalation_id):
+    """Close an escalated pattern once engineering has fixed it"""
+    try:
+        data = request.json or {}
+        escalation = get_agent().resolve_escalation(escalation_id, data.get('resolution'))
+        return jsonify({
+            'success': True,
+            'message': f'Escalation {escalation_id} resolved',
+            'data': escalation
+        })
+    except KeyError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e.args[0])
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/outbox', methods=['GET'])
+def get_outbox():
+    """Outbox delivery stats plus entries (optionally filtered by ?state=)"""
+    try:
+        agent = get_agent()
+        if not agent.use_outbox:
+            return jsonify({
+                'success': True,
+                'enabled': False
+            })
+        state = request.args.get('state')
+        return jsonify({
+            'success': True,
+            'enabled': True,
+            'stats': agent.outbox.stats(),
+            'data': agent.outbox.entries(state=state, limit=request.args.get('limit', 100, type=int))
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/clear-audit-log', methods=['POST'])
 def clear_audit_log():
     """Clear the audit log (for testing)"""
     try:
-        result = agent.clear_audit_log()
+        result = get_agent().clear_audit_log()
         return jsonify({
             'success': True,
             'message': 'Audit log cleared'
@@ -289,6 +1050,12 @@ def clear_audit_log():
             'error': str(e)
         }), 500
 
+_mark_startup('routes registered')
+if STARTUP_PROFILE:
+    print(f"Startup profile (ms since {_startup_origin}):")
+    for label, elapsed in _startup_marks:
+        print(f"   - {label}: {elapsed:.1f}")
+
 if __name__ == '__main__':
     print("Starting Backend API Server...")
     print("API running at: http://localhost:5000")
@@ -296,14 +1063,36 @@ if __name__ == '__main__':
     print("   - GET  /api/health")
     print("   - POST /api/generate-tickets")
     print("   - GET  /api/tickets")
+    print("   - POST /api/tickets/ingest")
+    print("   - GET  /api/tickets/ingest")
     print("   - GET  /api/ticket/<id>")
     print("   - POST /api/observe")
     print("   - POST /api/analyze")
     print("   - POST /api/decide")
     print("   - POST /api/execute")
+    print("   - POST /api/analyze/batch")
+    print("   - POST /api/decide/batch")
+    print("   - POST /api/execute/batch")
     print("   - POST /api/process-all")
+    print("   - GET  /api/process-all/checkpoint")
     print("   - POST /api/approve")
+    print("   - POST /api/approve/bulk")
+    print("   - POST /api/reject")
+    print("   - POST /api/reject/bulk")
     print("   - GET  /api/audit-log")
+    print("   - GET  /api/stats")
+    print("   - GET  /api/changes")
+    print("   - GET  /api/jobs/<id>")
+    print("   - GET  /api/cascade")
+    print("   - GET  /api/hedging")
+    print("   - GET  /api/prompt-context")
+    print("   - GET  /api/llm-health")
+    print("   - POST /api/reanalyze")
+    print("   - POST /api/decisions/compact")
+    print("   - GET  /api/decisions/archive")
+    print("   - GET  /api/escalations")
+    print("   - POST /api/escalations/<id>/resolve")
+    print("   - GET  /api/outbox")
     print("   - POST /api/clear-audit-log")
     
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    app.run(debug=True, port=5000, host='0.0.0.0', threaded=True)
\ No newline at end of file
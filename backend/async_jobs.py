@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class JobQueueFull(Exception):
+    """Raised when too many background jobs are already queued or running"""
+
+
+class AsyncRuntime:
+    """An asyncio event loop running on its own daemon thread.
+
+    LLM-bound work is scheduled here so it awaits network I/O instead of
+    holding a request thread. Blocking work that has no async form (the
+    full agent loop) runs on a small dedicated executor, apart from the
+    loop's default executor, so short blocking reads (asyncio.to_thread)
+    never queue behind a whole run.
+    """
+
+    def __init__(self, blocking_workers=1):
+        self.blocking_workers = blocking_workers
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.blocking_workers, thread_name_prefix='blocking-job'
+                )
+                self._thread = threading.Thread(target=loop.run_forever, name='async-runtime', daemon=True)
+                self._thread.start()
+                self._loop = loop
+        return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        """Await a blocking call on the runtime's bounded executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+
+class JobStore:
+    """Background jobs for `202 Accepted` requests.
+
+    Each job wraps a coroutine run on the AsyncRuntime. At most
+    `max_active` jobs may be queued or running; submit() raises
+    JobQueueFull beyond that so the API can answer 429. Finished jobs are
+    kept (most recent `keep`) so clients can fetch their results.
+    """
+
+    def __init__(self, runtime, max_active=100, keep=500, on_finish=None):
+        self.runtime = runtime
+        self.max_active = max_active
+        self.keep = keep
+        self.on_finish = on_finish
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _active(self):
+        return sum(1 for j in self._jobs.values() if j['status'] in ('queued', 'running'))
+
+    def submit(self, kind, coro_factory):
+        """Start a job from a zero-argument coroutine factory; returns the job record"""
+        with self._lock:
+            if self._active() >= self.max_active:
+                raise JobQueueFull(f"{self.max_active} jobs already in progress")
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'kind': kind,
+                'status': 'queued',
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'duration_ms': None,
+                'result': None,
+                'error': None
+            }
+            self._jobs[job['job_id']] = job
+            self._prune()
+
+        self.runtime.submit(self._run(job, coro_factory))
+        return dict(job)
+
+    async def _run(self, job, coro_factory):
+        started = time.perf_counter()
+        job['status'] = 'running'
+        job['started_at'] = datetime.now().isoformat()
+        try:
+            job['result'] = await coro_factory()
+            job['status'] = 'succeeded'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        job['finished_at'] = datetime.now().isoformat()
+        job['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+        if self.on_finish is not None:
+            try:
+                self.on_finish(dict(job))
+            except Exception as e:
+                print(f"Warning: job finish hook failed for {job['job_id']}: {e}")
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j['status'] in ('succeeded', 'failed')]
+        for job in finished[:max(0, len(self._jobs) - self.keep)]:
+            del self._jobs[job['job_id']]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job['status']] = by_status.get(job['status'], 0) + 1
+            return {
+                'active': self._active(),
+                'max_active': self.max_active,
+                'by_status': by_status
+            }
+
+
+def wants_async(request):
+    """Async (202) mode is requested with ?async=1 or a `Prefer: respond-async` header"""
+    flag = request.args.get('async', '')
+    prefer = request.headers.get('Prefer', '')
+    return flag.lower() in ('1', 'true', 'yes') or 'respond-async' in prefer.lower()
@@ -255,9 +255,9 @@ class TicketGenerator:
     
     def save_to_file(self, tickets, filename=None):
         """Save tickets to JSON file inside the data folder"""
-        # Always save to data/tickets.json inside healing-agent
+        # Save to data/tickets.json (or HEALING_AGENT_DATA_DIR) inside healing-agent
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_dir = os.path.join(base_dir, 'data')
+        data_dir = os.getenv('HEALING_AGENT_DATA_DIR') or os.path.join(base_dir, 'data')
         os.makedirs(data_dir, exist_ok=True)
         if filename is None:
             filename = os.path.join(data_dir, 'tickets.json')
@@ -0,0 +1,120 @@
+import gzip
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+# Optional fast paths - fall back to the standard library when not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def fast_paths():
+    """Which optional fast paths are installed (reported by /api/stats)"""
+    return {
+        'orjson': orjson is not None,
+        'brotli': brotli is not None
+    }
+
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider producing compact output, using orjson when available"""
+
+    compact = True
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        kwargs.setdefault('default', str)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps(obj), mimetype=self.mimetype)
+
+
+def wants_compact(request):
+    """Compact mode is requested with ?compact=1 or an `X-Response-Format: compact` header"""
+    flag = request.args.get('compact', '')
+    header = request.headers.get('X-Response-Format', '')
+    return flag.lower() in ('1', 'true', 'yes') or header.lower() == 'compact'
+
+
+def normalize_results(results):
+    """Normalize agent loop results so each object is sent once and referenced by ticket_id.
+
+    The full results repeat the analysis under `analysis`, `decision.analysis`
+    and `action_result.decision.analysis` (and the decision twice); here they
+    are split into keyed tables plus a thin per-ticket result list.
+    """
+    tickets, analyses, decisions, items = {}, {}, {}, []
+
+    for result in results:
+        ticket = result['ticket']
+        ticket_id = ticket['ticket_id']
+        decision = result['decision']
+        action_result = result['action_result']
+
+        tickets[ticket_id] = ticket
+        analyses[ticket_id] = result['analysis']
+        decisions[ticket_id] = {k: v for k, v in decision.items() if k != 'analysis'}
+        items.append({
+            'ticket_id': ticket_id,
+            **{k: v for k, v in result.items() if k not in ('ticket', 'analysis', 'decision', 'action_result')},
+            **{k: v for k, v in action_result.items() if k != 'decision'}
+        })
+
+    return {
+        'tickets': tickets,
+        'analyses': analyses,
+        'decisions': decisions,
+        'results': items
+    }
+
+
+def compress_response(request, response):
+    """Compress a JSON response with br or gzip as negotiated by Accept-Encoding"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(offered)
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(data, quality=5)
+    else:
+        body = gzip.compress(data, compresslevel=6)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
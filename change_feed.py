@@ -0,0 +1,89 @@
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+
+class ChangeFeed:
+    """In-process feed of change events (tickets, decisions, approvals, audit entries).
+
+    Every event gets a cursor of the form `<epoch>:<seq>`, where the epoch
+    identifies this process. Clients pass back the last cursor they saw and
+    receive only newer events. A cursor from another epoch (server restart)
+    or one that has fallen out of the retained window yields a single
+    'reset' event, telling the client to refetch its snapshot instead.
+    """
+
+    def __init__(self, max_events=1000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def cursor(self):
+        """Cursor of the latest event (a client starting here sees only new events)"""
+        with self._cond:
+            return f"{self.epoch}:{self._seq}"
+
+    def publish(self, event_type, data):
+        with self._cond:
+            self._seq += 1
+            event = {
+                'id': f"{self.epoch}:{self._seq}",
+                'seq': self._seq,
+                'type': event_type,
+                'timestamp': datetime.now().isoformat(),
+                'data': data
+            }
+            self._events.append(event)
+            self._cond.notify_all()
+            return event
+
+    def _parse(self, cursor):
+        """Sequence number for a cursor, or None if it cannot be resumed from"""
+        epoch, _, seq = str(cursor).partition(':')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self._events[0]['seq'] if self._events else self._seq + 1
+        if seq > self._seq or seq < oldest - 1:
+            return None
+        return seq
+
+    def _reset_event(self):
+        return {
+            'id': f"{self.epoch}:{self._seq}",
+            'seq': self._seq,
+            'type': 'reset',
+            'timestamp': datetime.now().isoformat(),
+            'data': {'reason': 'cursor cannot be resumed; refetch current state'}
+        }
+
+    def since(self, cursor=None, timeout=0, limit=500):
+        """Events after `cursor`, waiting up to `timeout` seconds for the first one.
+
+        With no cursor the client starts at the current head and only waits
+        for new events.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            if cursor is None:
+                seq = self._seq
+            else:
+                seq = self._parse(cursor)
+                if seq is None:
+                    return [self._reset_event()]
+
+            while self._seq <= seq:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+            # Events are stored in seq order; skip the ones already seen
+            skip = len(self._events) - (self._seq - seq)
+            if skip < 0:  # fell out of the window while waiting
+                return [self._reset_event()]
+            return [dict(e) for e in list(self._events)[skip:skip + limit]]
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class LLMUnavailable(Exception):
+    """The LLM provider gave no usable answer in time; the ticket gets a degraded analysis"""
+
+
+class CircuitOpen(LLMUnavailable):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+
+class DeadlineExceeded(LLMUnavailable):
+    """The ticket's deadline or the batch's time budget ran out"""
+
+
+class CircuitBreaker:
+    """Stops calling the LLM provider while it is failing.
+
+    The circuit opens after `failure_threshold` consecutive failures (errors
+    or timeouts), or after `slow_threshold` consecutive calls slower than
+    `slow_call_ms`. While open, allow() is False. After `reset_timeout`
+    seconds it lets a single probe call through (half-open). A successful
+    probe closes the circuit; a failed one re-opens it.
+    `on_state_change(old, new)` is called outside the lock on every transition.
+    """
+
+    def __init__(self, failure_threshold=5, slow_call_ms=20000, slow_threshold=3,
+                 reset_timeout=30.0, on_state_change=None):
+        self.failure_threshold = failure_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_threshold = slow_threshold
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self._state = CLOSED
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._last_error = None
+        self._counts = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0}
+
+    @classmethod
+    def from_env(cls, on_state_change=None):
+        return cls(
+            failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', '5')),
+            slow_call_ms=float(os.getenv('LLM_BREAKER_SLOW_MS', '20000')),
+            slow_threshold=int(os.getenv('LLM_BREAKER_SLOW_CALLS', '3')),
+            reset_timeout=float(os.getenv('LLM_BREAKER_RESET', '30')),
+            on_state_change=on_state_change
+        )
+
+    def _effective_state(self):
+        # An open circuit past its reset timeout admits a probe: report it as half-open
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._effective_state()
+
+    def _transition(self, new_state):
+        # Called with the lock held; returns the (old, new) pair to report
+        old, self._state = self._state, new_state
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+            self._counts['opened'] += 1
+        if new_state != HALF_OPEN:
+            self._probe_in_flight = False
+        self._failures = self._slow = 0
+        return (old, new_state) if old != new_state else None
+
+    def _notify(self, change):
+        if change and self.on_state_change is not None:
+            try:
+                self.on_state_change(*change)
+            except Exception as e:
+                print(f"Warning: circuit breaker state hook failed: {e}")
+
+    def allow(self):
+        """Whether a call may go to the provider now (claims the probe when half-open)"""
+        change = None
+        with self._lock:
+            if self._effective_state() != self._state:
+                change = self._transition(HALF_OPEN)
+            if self._state == CLOSED or (self._state == HALF_OPEN and not self._probe_in_flight):
+                self._probe_in_flight = self._state == HALF_OPEN
+                self._counts['calls'] += 1
+                allowed = True
+            else:
+                self._counts['rejected'] += 1
+                allowed = False
+        self._notify(change)
+        return allowed
+
+    def record_success(self, latency_ms):
+        change = None
+        with self._lock:
+            slow = latency_ms > self.slow_call_ms
+            if slow:
+                self._counts['slow_calls'] += 1
+            if self._state == HALF_OPEN:
+                change = self._transition(OPEN if slow else CLOSED)
+            elif self._state == OPEN:
+                pass  # a call started before the circuit opened; the probe decides
+            elif slow:
+                self._slow += 1
+                self._failures = 0
+                if self._slow >= self.slow_threshold:
+                    self._last_error = f"{self._slow} consecutive calls slower than {self.slow_call_ms:.0f} ms"
+                    change = self._transition(OPEN)
+            else:
+                self._failures = self._slow = 0
+        self._notify(change)
+
+    def record_failure(self, error):
+        change = None
+        with self._lock:
+            self._counts['failures'] += 1
+            self._last_error = str(error)
+            if self._state == HALF_OPEN:
+                change = self._transition(OPEN)
+            elif self._state == CLOSED:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    change = self._transition(OPEN)
+        self._notify(change)
+
+    def record_cancelled(self):
+        """A call was abandoned without an outcome: free the probe slot, count nothing"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            state = self._effective_state()
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'consecutive_slow_calls': self._slow,
+                'last_error': self._last_error,
+                'retry_in_seconds': retry_in,
+                'thresholds': {
+                    'failures': self.failure_threshold,
+                    'slow_call_ms': self.slow_call_ms,
+                    'slow_calls': self.slow_threshold,
+                    'reset_timeout': self.reset_timeout
+                },
+                **self._counts,
+                'as_of': datetime.now().isoformat()
+            }
@@ -1,5 +1,6 @@
 import streamlit as st
 import json
+import os
 from agent import HealingAgent
 import pandas as pd
 from collections import Counter
@@ -30,9 +31,265 @@ st.title("🤖 Self-Healing Support Agent Dashboard")
 st.markdown("**Agentic AI System for E-commerce Headless Migration Support**")
 st.markdown("---")
 
-# Initialize agent in session state
-if 'agent' not in st.session_state:
-    st.session_state.agent = HealingAgent()
+DATA_DIR = os.getenv('HEALING_AGENT_DATA_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def file_version(filename):
+    """Cache key that changes whenever a data file is rewritten"""
+    try:
+        stat = os.stat(os.path.join(DATA_DIR, filename))
+        return (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return None
+
+
+@st.cache_resource
+def _shared_agent():
+    return HealingAgent()
+
+
+def get_agent():
+    """One agent (Groq client + parsed decisions) shared by every session.
+    
+    When decisions.json was rewritten elsewhere (e.g. by the API), only the
+    agent's decisions are reloaded; its breaker, cascade and outbox stay.
+    """
+    agent = _shared_agent()
+    agent.refresh_decisions()
+    return agent
+
+
+@st.cache_data(show_spinner=False)
+def load_tickets_cached(version):
+    return get_agent().load_tickets()
+
+
+@st.cache_data(show_spinner=False)
+def load_audit_log_cached(version):
+    return get_agent().get_audit_log()
+
+
+@st.cache_data(show_spinner=False)
+def load_audit_stats_cached(version):
+    # Rollups are updated with every audit append, so this never scans the log
+    return get_agent().audit_stats(granularity='day', limit=1)
+
+
+def paginate(items, key, default_size=25):
+    """Render page controls and return only the current page of items"""
+    if not items:
+        return items
+    
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        page_size = st.selectbox(
+            "Per page", [10, 25, 50, 100],
+            index=[10, 25, 50, 100].index(default_size),
+            key=f"{key}_page_size"
+        )
+    page_count = (len(items) + page_size - 1) // page_size
+    # The widget's value lives in session_state only (passing value= as well warns)
+    if st.session_state.get(f"{key}_page", 1) > page_count:
+        # The list shrank (new run, smaller page) - jump back to the first page
+        st.session_state[f"{key}_page"] = 1
+    st.session_state.setdefault(f"{key}_page", 1)
+    with col2:
+        page = st.number_input(
+            "Page", min_value=1, max_value=page_count, step=1,
+            key=f"{key}_page"
+        )
+    with col3:
+        start = (page - 1) * page_size
+        st.caption(f"Showing {start + 1}-{min(start + page_size, len(items))} of {len(items)}")
+    
+    return items[start:start + page_size]
+
+
+def render_result_detail(result, expanded=False):
+    """Render one analyzed ticket inside an expander"""
+    ticket = result['ticket']
+    analysis = result['analysis']
+    decision = result['decision']
+    action = result['action_result']
+    
+    # Expandable section for each ticket
+    with st.expander(
+        f"{'🔴' if ticket['severity'] == 'critical' else '🟡' if ticket['severity'] == 'high' else '🟢'} "
+        f"{ticket['ticket_id']}: {ticket['issue']}", 
+        expanded=expanded
+    ):
+        
+        # Ticket details
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            st.markdown("#### 🎫 Ticket Information")
+            st.write(f"**Merchant:** {ticket['merchant_id']}")
+            st.write(f"**Severity:** `{ticket['severity'].upper()}`")
+            st.write(f"**Migration Stage:** {ticket['migration_stage']}")
+            st.write(f"**Checkout Failures:** {ticket.get('checkout_failures', 0)}")
+            st.write(f"**Customers Affected:** {ticket.get('affected_customers', 0)}")
+            
+            st.markdown("**Error Log:**")
+            st.code(ticket['error_log'], language='text')
+        
+        with col2:
+            st.markdown("#### 💬 Merchant Message")
+            st.info(ticket['merchant_message'])
+        
+        st.markdown("---")
+        
+        # Agent Analysis
+        st.markdown("#### 🧠 Agent Analysis (REASON Phase)")
+        
+        # Confidence visualization
+        confidence = analysis.get('confidence', 0)
+        
+        col1, col2, col3 = st.columns([1, 2, 2])
+        
+        with col1:
+            # Confidence gauge
+            if confidence >= 80:
+                conf_color = "🟢"
+                conf_label = "HIGH"
+            elif confidence >= 60:
+                conf_color = "🟡"
+                conf_label = "MEDIUM"
+            else:
+                conf_color = "🔴"
+                conf_label = "LOW"
+            
+            st.markdown(f"### {conf_color} {confidence}%")
+            st.caption(f"Confidence: {conf_label}")
+        
+        with col2:
+            st.markdown("**Root Cause:**")
+            st.success(f"{analysis.get('root_cause', 'unknown').replace('_', ' ').title()}")
+            
+            if analysis.get('is_pattern'):
+                st.warning(f"⚠️ **PATTERN DETECTED** - Affects {analysis.get('affected_merchants', 'multiple')} merchants")
+        
+        with col3:
+            st.markdown("**Priority:**")
+            priority = analysis.get('recommended_priority', 'medium')
+            st.write(f"`{priority.upper()}`")
+        
+        # Explanation
+        st.markdown("**Analysis Explanation:**")
+        st.write(analysis.get('root_cause_explanation', 'No explanation provided'))
+        
+        # Pattern details
+        if analysis.get('is_pattern') and analysis.get('pattern_details'):
+            st.markdown("**Pattern Details:**")
+            st.warning(analysis.get('pattern_details'))
+        
+        # Assumptions
+        if 'assumptions' in analysis and analysis['assumptions']:
+            st.markdown("**Assumptions Made:**")
+            for assumption in analysis['assumptions']:
+                st.write(f"• {assumption}")
+        
+        st.markdown("---")
+        
+        # Decision
+        st.markdown("#### 🎯 Recommended Action (DECIDE Phase)")
+        
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            # Risk level indicator
+            risk_colors = {
+                'low': ('🟢', 'success'),
+                'medium': ('🟡', 'warning'),
+                'high': ('🔴', 'error')
+            }
+            
+            risk_icon, risk_type = risk_colors.get(decision['risk_level'], ('⚪', 'info'))
+            
+            st.markdown(f"**Action:** {decision['action'].replace('_', ' ').title()}")
+            st.markdown(f"**Risk Level:** {risk_icon} `{decision['risk_level'].upper()}`")
+            st.markdown(f"**Estimated Impact:** {decision['estimated_impact']}")
+        
+        with col2:
+            st.markdown("**Reasoning:**")
+            st.info(decision['reasoning'])
+        
+        st.markdown("---")
+        
+        # Action execution
+        st.markdown("#### ⚡ Action Execution (ACT Phase)")
+        
+        if decision['requires_approval']:
+            # Check if this action was already approved in this session
+            approval_key = f"approved_{ticket['ticket_id']}"
+            
+            if st.session_state.get(approval_key):
+                # Already approved - show execution details
+                st.success("✅ **APPROVED & EXECUTED** - Human approved this action")
+                if st.session_state.get(f"execution_details_{ticket['ticket_id']}"):
+                    st.markdown("**Execution Details:**")
+                    details = st.session_state.get(f"execution_details_{ticket['ticket_id']}")
+                    for key, value in details.items():
+                        if isinstance(value, str):
+                            st.write(f"**{key.replace('_', ' ').title()}:** {value}")
+            elif st.session_state.get(f"rejected_{ticket['ticket_id']}"):
+                st.error("❌ **REJECTED** - Ticket assigned to human agent")
+            else:
+                col1, col2 = st.columns([2, 1])
+                
+                with col1:
+                    st.warning("⚠️ **HIGH RISK - Requires Human Approval**")
+                    st.write("This action requires manual review before execution due to potential impact.")
+                
+                with col2:
+                    if st.button(f"✅ Approve & Execute", key=f"approve_{ticket['ticket_id']}", type="primary"):
+                        # Actually execute the approved action
+                        agent = get_agent()
+                        exec_result = agent.execute_approved_action(ticket['ticket_id'])
+                        
+                        if exec_result.get('success'):
+                            st.session_state[approval_key] = True
+                            st.session_state[f"execution_details_{ticket['ticket_id']}"] = exec_result.get('action_details', {})
+                            # Update the result in session state
+                            result['action_result']['status'] = 'executed'
+                            result['action_result']['action_details'] = exec_result.get('action_details', {})
+                            st.success("✅ Action Approved and Executed!")
+                            st.balloons()
+                            st.rerun()
+                        else:
+                            st.error(f"Failed to execute: {exec_result.get('error', 'Unknown error')}")
+                    
+                    if st.button(f"❌ Reject", key=f"reject_{ticket['ticket_id']}"):
+                        get_agent().reject_action(ticket['ticket_id'])
+                        result['action_result']['status'] = 'rejected'
+                        st.session_state[f"rejected_{ticket['ticket_id']}"] = True
+                        st.error("Action rejected. Ticket assigned to human agent.")
+        
+        else:
+            st.success("✅ **AUTO-EXECUTED** - Low risk, executed automatically")
+        
+        # Action details
+        if 'action_details' in action:
+            st.markdown("**Execution Details:**")
+            
+            details = action['action_details']
+            
+            # Format details nicely
+            detail_col1, detail_col2 = st.columns(2)
+            
+            with detail_col1:
+                for key, value in list(details.items())[:len(details)//2 + 1]:
+                    if isinstance(value, str):
+                        st.write(f"**{key.replace('_', ' ').title()}:** {value}")
+            
+            with detail_col2:
+                for key, value in list(details.items())[len(details)//2 + 1:]:
+                    if isinstance(value, str):
+                        st.write(f"**{key.replace('_', ' ').title()}:** {value}")
+
+
+# Per-session UI state; the agent itself is a shared cached resource
+if 'results' not in st.session_state:
     st.session_state.results = None
     st.session_state.processing = False
 
@@ -46,11 +303,13 @@ with st.sidebar:
     
     st.markdown("---")
     
+    force_reanalysis = st.checkbox("Re-analyze unchanged tickets", value=False)
+    
     if st.button("🚀 Run Agent Analysis", type="primary", use_container_width=True):
         st.session_state.processing = True
         with st.spinner("🤖 Agent is analyzing tickets..."):
             try:
-                st.session_state.results = st.session_state.agent.process_all_tickets()
+                st.session_state.results = get_agent().process_all_tickets(force=force_reanalysis)
                 st.session_state.processing = False
                 st.success("✅ Analysis Complete!")
                 st.balloons()
@@ -60,7 +319,8 @@ with st.sidebar:
     
     if st.button("🔄 Reset", use_container_width=True):
         st.session_state.results = None
-        st.session_state.agent = HealingAgent()
+        load_tickets_cached.clear()
+        load_audit_log_cached.clear()
         st.rerun()
     
     st.markdown("---")
@@ -72,11 +332,9 @@ with st.sidebar:
         
         st.metric("Tickets Processed", len(results))
         
-        auto_resolved = sum(1 for r in results if r['action_result']['status'] == 'executed')
-        st.metric("Auto-Resolved", auto_resolved, delta=f"{auto_resolved/len(results)*100:.0f}%")
-        
-        needs_approval = sum(1 for r in results if r['action_result']['status'] == 'pending_approval')
-        st.metric("Needs Approval", needs_approval)
+        stats = load_audit_stats_cached(file_version("audit_rollups.json"))
+        st.metric("Auto-Resolved (all time)", stats['totals']['by_triggered_by'].get('auto', 0))
+        st.metric("Needs Approval", stats['pending_approval'])
         
         avg_confidence = sum(r['analysis'].get('confidence', 0) for r in results) / len(results)
         st.metric("Avg Confidence", f"{avg_confidence:.0f}%")
@@ -101,11 +359,11 @@ if st.session_state.results is None:
     st.markdown("These are simulated tickets from merchants experiencing issues during headless migration:")
     
     try:
-        agent = st.session_state.agent
-        tickets = agent.load_tickets()
+        tickets = load_tickets_cached(file_version("tickets.json"))
         
         if tickets:
-            # Create DataFrame for display
+            # Create DataFrame for display (one page at a time)
+            page_tickets = paginate(tickets, key="tickets")
             df_display = pd.DataFrame([{
                 'Ticket ID': t['ticket_id'],
                 'Merchant': t['merchant_id'],
@@ -113,7 +371,7 @@ if st.session_state.results is None:
                 'Severity': t['severity'],
                 'Migration Stage': t['migration_stage'],
                 'Checkout Failures': t.get('checkout_failures', 0)
-            } for t in tickets])
+            } for t in page_tickets])
             
             st.dataframe(df_display, use_container_width=True, hide_index=True)
             
@@ -190,185 +448,59 @@ else:
     
     st.markdown("---")
     
+    # Bulk review of pending human-in-the-loop actions
+    pending = [r for r in results if r['action_result']['status'] == 'pending_approval']
+    if pending:
+        st.subheader("🗂️ Bulk Review")
+        pending_actions = sorted({r['decision']['action'] for r in pending})
+        selected_actions = st.multiselect(
+            "Actions to review",
+            pending_actions,
+            default=pending_actions,
+            format_func=lambda a: a.replace('_', ' ').title()
+        )
+        selected = [r for r in pending if r['decision']['action'] in selected_actions]
+        st.caption(f"{len(selected)} of {len(pending)} pending actions selected")
+        
+        col1, col2, _ = st.columns([1, 1, 3])
+        bulk_mode = None
+        with col1:
+            if st.button("✅ Approve selected", disabled=not selected, type="primary"):
+                bulk_mode = 'approve'
+        with col2:
+            if st.button("❌ Reject selected", disabled=not selected):
+                bulk_mode = 'reject'
+        
+        if bulk_mode:
+            agent = get_agent()
+            ticket_ids = [r['ticket']['ticket_id'] for r in selected]
+            if bulk_mode == 'approve':
+                outcome = agent.approve_actions(ticket_ids=ticket_ids)
+            else:
+                outcome = agent.reject_actions(ticket_ids=ticket_ids)
+            
+            reviewed = {r['decision']['ticket_id']: r for r in outcome['results']}
+            for r in selected:
+                review = reviewed.get(r['ticket']['ticket_id'])
+                if not review:
+                    continue
+                r['action_result']['status'] = review['status']
+                if bulk_mode == 'approve':
+                    r['action_result']['action_details'] = review['action_details']
+                    st.session_state[f"approved_{r['ticket']['ticket_id']}"] = True
+                    st.session_state[f"execution_details_{r['ticket']['ticket_id']}"] = review['action_details']
+                else:
+                    st.session_state[f"rejected_{r['ticket']['ticket_id']}"] = True
+            st.rerun()
+        
+        st.markdown("---")
+    
     # Detailed ticket analysis
     st.subheader("🔍 Detailed Ticket Analysis")
     
-    for idx, result in enumerate(results):
-        ticket = result['ticket']
-        analysis = result['analysis']
-        decision = result['decision']
-        action = result['action_result']
-        
-        # Expandable section for each ticket
-        with st.expander(
-            f"{'🔴' if ticket['severity'] == 'critical' else '🟡' if ticket['severity'] == 'high' else '🟢'} "
-            f"{ticket['ticket_id']}: {ticket['issue']}", 
-            expanded=(idx == 0)
-        ):
-            
-            # Ticket details
-            col1, col2 = st.columns([1, 1])
-            
-            with col1:
-                st.markdown("#### 🎫 Ticket Information")
-                st.write(f"**Merchant:** {ticket['merchant_id']}")
-                st.write(f"**Severity:** `{ticket['severity'].upper()}`")
-                st.write(f"**Migration Stage:** {ticket['migration_stage']}")
-                st.write(f"**Checkout Failures:** {ticket.get('checkout_failures', 0)}")
-                st.write(f"**Customers Affected:** {ticket.get('affected_customers', 0)}")
-                
-                st.markdown("**Error Log:**")
-                st.code(ticket['error_log'], language='text')
-            
-            with col2:
-                st.markdown("#### 💬 Merchant Message")
-                st.info(ticket['merchant_message'])
-            
-            st.markdown("---")
-            
-            # Agent Analysis
-            st.markdown("#### 🧠 Agent Analysis (REASON Phase)")
-            
-            # Confidence visualization
-            confidence = analysis.get('confidence', 0)
-            
-            col1, col2, col3 = st.columns([1, 2, 2])
-            
-            with col1:
-                # Confidence gauge
-                if confidence >= 80:
-                    conf_color = "🟢"
-                    conf_label = "HIGH"
-                elif confidence >= 60:
-                    conf_color = "🟡"
-                    conf_label = "MEDIUM"
-                else:
-                    conf_color = "🔴"
-                    conf_label = "LOW"
-                
-                st.markdown(f"### {conf_color} {confidence}%")
-                st.caption(f"Confidence: {conf_label}")
-            
-            with col2:
-                st.markdown("**Root Cause:**")
-                st.success(f"{analysis.get('root_cause', 'unknown').replace('_', ' ').title()}")
-                
-                if analysis.get('is_pattern'):
-                    st.warning(f"⚠️ **PATTERN DETECTED** - Affects {analysis.get('affected_merchants', 'multiple')} merchants")
-            
-            with col3:
-                st.markdown("**Priority:**")
-                priority = analysis.get('recommended_priority', 'medium')
-                st.write(f"`{priority.upper()}`")
-            
-            # Explanation
-            st.markdown("**Analysis Explanation:**")
-            st.write(analysis.get('root_cause_explanation', 'No explanation provided'))
-            
-            # Pattern details
-            if analysis.get('is_pattern') and analysis.get('pattern_details'):
-                st.markdown("**Pattern Details:**")
-                st.warning(analysis.get('pattern_details'))
-            
-            # Assumptions
-            if 'assumptions' in analysis and analysis['assumptions']:
-                st.markdown("**Assumptions Made:**")
-                for assumption in analysis['assumptions']:
-                    st.write(f"• {assumption}")
-            
-            st.markdown("---")
-            
-            # Decision
-            st.markdown("#### 🎯 Recommended Action (DECIDE Phase)")
-            
-            col1, col2 = st.columns([1, 1])
-            
-            with col1:
-                # Risk level indicator
-                risk_colors = {
-                    'low': ('🟢', 'success'),
-                    'medium': ('🟡', 'warning'),
-                    'high': ('🔴', 'error')
-                }
-                
-                risk_icon, risk_type = risk_colors.get(decision['risk_level'], ('⚪', 'info'))
-                
-                st.markdown(f"**Action:** {decision['action'].replace('_', ' ').title()}")
-                st.markdown(f"**Risk Level:** {risk_icon} `{decision['risk_level'].upper()}`")
-                st.markdown(f"**Estimated Impact:** {decision['estimated_impact']}")
-            
-            with col2:
-                st.markdown("**Reasoning:**")
-                st.info(decision['reasoning'])
-            
-            st.markdown("---")
-            
-            # Action execution
-            st.markdown("#### ⚡ Action Execution (ACT Phase)")
-            
-            if decision['requires_approval']:
-                # Check if this action was already approved in this session
-                approval_key = f"approved_{ticket['ticket_id']}"
-                
-                if st.session_state.get(approval_key):
-                    # Already approved - show execution details
-                    st.success("✅ **APPROVED & EXECUTED** - Human approved this action")
-                    if st.session_state.get(f"execution_details_{ticket['ticket_id']}"):
-                        st.markdown("**Execution Details:**")
-                        details = st.session_state.get(f"execution_details_{ticket['ticket_id']}")
-                        for key, value in details.items():
-                            if isinstance(value, str):
-                                st.write(f"**{key.replace('_', ' ').title()}:** {value}")
-                else:
-                    col1, col2 = st.columns([2, 1])
-                    
-                    with col1:
-                        st.warning("⚠️ **HIGH RISK - Requires Human Approval**")
-                        st.write("This action requires manual review before execution due to potential impact.")
-                    
-                    with col2:
-                        if st.button(f"✅ Approve & Execute", key=f"approve_{ticket['ticket_id']}", type="primary"):
-                            # Actually execute the approved action
-                            agent = st.session_state.agent
-                            exec_result = agent.execute_approved_action(ticket['ticket_id'])
-                            
-                            if exec_result.get('success'):
-                                st.session_state[approval_key] = True
-                                st.session_state[f"execution_details_{ticket['ticket_id']}"] = exec_result.get('action_details', {})
-                                # Update the result in session state
-                                result['action_result']['status'] = 'executed'
-                                result['action_result']['action_details'] = exec_result.get('action_details', {})
-                                st.success("✅ Action Approved and Executed!")
-                                st.balloons()
-                                st.rerun()
-                            else:
-                                st.error(f"Failed to execute: {exec_result.get('error', 'Unknown error')}")
-                        
-                        if st.button(f"❌ Reject", key=f"reject_{ticket['ticket_id']}"):
-                            st.session_state[f"rejected_{ticket['ticket_id']}"] = True
-                            st.error("Action rejected. Ticket assigned to human agent.")
-            
-            else:
-                st.success("✅ **AUTO-EXECUTED** - Low risk, executed automatically")
-            
-            # Action details
-            if 'action_details' in action:
-                st.markdown("**Execution Details:**")
-                
-                details = action['action_details']
-                
-                # Format details nicely
-                detail_col1, detail_col2 = st.columns(2)
-                
-                with detail_col1:
-                    for key, value in list(details.items())[:len(details)//2 + 1]:
-                        if isinstance(value, str):
-                            st.write(f"**{key.replace('_', ' ').title()}:** {value}")
-                
-                with detail_col2:
-                    for key, value in list(details.items())[len(details)//2 + 1:]:
-                        if isinstance(value, str):
-                            st.write(f"**{key.replace('_', ' ').title()}:** {value}")
+    page_results = paginate(results, key="results", default_size=10)
+    for idx, result in enumerate(page_results):
+        render_result_detail(result, expanded=(idx == 0))
     
     st.markdown("---")
     
@@ -405,10 +537,19 @@ else:
     st.markdown("---")
     st.subheader("📜 Action Audit Log")
     
-    audit_log = st.session_state.agent.get_audit_log()
+    audit_log = load_audit_log_cached(file_version("audit_log.json"))
     
     if audit_log:
-        # Create DataFrame for display
+        stats = load_audit_stats_cached(file_version("audit_rollups.json"))
+        by_status = stats['totals']['by_status']
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Executed", by_status.get('executed', 0))
+        col2.metric("Pending Approval", stats['pending_approval'])
+        col3.metric("Rejected", by_status.get('rejected', 0))
+        col4.metric("Human-Triggered", stats['totals']['by_triggered_by'].get('human', 0))
+        
+        # Create DataFrame for display, most recent first, one page at a time
+        page_entries = paginate(list(reversed(audit_log)), key="audit")
         audit_df = pd.DataFrame([{
             'Timestamp': entry['timestamp'][:19].replace('T', ' '),
             'Ticket': entry['ticket_id'],
@@ -416,14 +557,14 @@ else:
             'Status': entry['status'].replace('_', ' ').title(),
             'Risk': entry.get('risk_level', 'N/A').upper(),
             'Triggered By': entry['triggered_by'].title()
-        } for entry in reversed(audit_log)])  # Most recent first
+        } for entry in page_entries])
         
         st.dataframe(audit_df, use_container_width=True, hide_index=True)
         
         col1, col2 = st.columns([3, 1])
         with col2:
             if st.button("🗑️ Clear Audit Log", type="secondary"):
-                st.session_state.agent.clear_audit_log()
+                get_agent().clear_audit_log()
                 st.success("Audit log cleared!")
                 st.rerun()
     else:
@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+
+# Defaults for HealingAgent(retention=...); env vars override the defaults
+DEFAULT_RETENTION = {
+    'keep_latest_per_ticket': True,   # superseded decisions for a ticket leave the hot set
+    'archive_executed': True,         # executed decisions leave the hot set
+    'max_age_days': 30,               # anything older leaves the hot set (None = no limit)
+    'segment': 'month',               # archive file granularity: 'day' or 'month'
+    'auto_compact_above': 500         # compact after a run once the hot set is this large (None = never)
+}
+
+_SEGMENT_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m'}
+UNDATED_SEGMENT = 'undated'
+
+
+def retention_from_env(overrides=None):
+    """Build a retention policy from the defaults, env vars and explicit overrides"""
+    policy = dict(DEFAULT_RETENTION)
+    if os.getenv('DECISION_RETENTION_DAYS'):
+        days = os.getenv('DECISION_RETENTION_DAYS')
+        policy['max_age_days'] = None if days.lower() == 'none' else int(days)
+    if os.getenv('DECISION_ARCHIVE_SEGMENT'):
+        policy['segment'] = os.getenv('DECISION_ARCHIVE_SEGMENT')
+    policy.update(overrides or {})
+    if policy['segment'] not in _SEGMENT_FORMATS:
+        raise ValueError(f"Unknown archive segment '{policy['segment']}' (use 'day' or 'month')")
+    return policy
+
+
+def write_json_atomic(path, data, indent=2):
+    """Write JSON through a temp file so readers never see a half-written file.
+
+    The temp file is unique per call, so concurrent writers of the same path
+    never rename each other's half-written file (the last rename wins).
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, default=str)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def segment_for(record, segment):
+    """Archive segment name for a decision record, from when it was recorded"""
+    recorded_at = parse_timestamp(record.get('recorded_at'))
+    if recorded_at is None:
+        return UNDATED_SEGMENT
+    return recorded_at.strftime(_SEGMENT_FORMATS[segment])
+
+
+def segment_path(archive_dir, segment_name):
+    return os.path.join(archive_dir, f"decisions-{segment_name}.json")
+
+
+def list_segments(archive_dir):
+    """Archive segment names, oldest first (undated last)"""
+    if not os.path.isdir(archive_dir):
+        return []
+    names = [
+        name[len('decisions-'):-len('.json')]
+        for name in os.listdir(archive_dir)
+        if name.startswith('decisions-') and name.endswith('.json')
+    ]
+    return sorted(names, key=lambda n: (n == UNDATED_SEGMENT, n))
+
+
+def load_segment(archive_dir, segment_name):
+    path = segment_path(archive_dir, segment_name)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def append_to_archive(archive_dir, records, segment):
+    """Append records to their time segments; returns {segment_name: count}"""
+    os.makedirs(archive_dir, exist_ok=True)
+
+    by_segment = {}
+    for record in records:
+        by_segment.setdefault(segment_for(record, segment), []).append(record)
+
+    for segment_name, segment_records in by_segment.items():
+        existing = load_segment(archive_dir, segment_name)
+        existing.extend(segment_records)
+        write_json_atomic(segment_path(archive_dir, segment_name), existing)
+
+    return {name: len(recs) for name, recs in by_segment.items()}
+
+
+def query_archive(archive_dir, ticket_id=None, status=None, since=None, until=None, limit=None):
+    """Query archived decisions, newest segment first.
+
+    `since`/`until` are datetimes or ISO strings; segments entirely outside
+    the range are skipped without being read.
+    """
+    since = parse_timestamp(since) if isinstance(since, str) else since
+    until = parse_timestamp(until) if isinstance(until, str) else until
+
+    matches = []
+    # Newest dated segment first and undated last (reversing list_segments would put it first)
+    segments = sorted(list_segments(archive_dir), key=lambda n: (n != UNDATED_SEGMENT, n), reverse=True)
+    for segment_name in segments:
+        if since or until:
+            if segment_name == UNDATED_SEGMENT:
+                continue
+            # Segment names sort lexically by time; compare on the shared prefix
+            if since and segment_name < since.isoformat()[:len(segment_name)]:
+                continue
+            if until and segment_name > until.isoformat()[:len(segment_name)]:
+                continue
+
+        for record in reversed(load_segment(archive_dir, segment_name)):
+            if ticket_id and record.get('decision', {}).get('ticket_id') != ticket_id:
+                continue
+            if status and record.get('status') != status:
+                continue
+            recorded_at = parse_timestamp(record.get('recorded_at'))
+            if since and (recorded_at is None or recorded_at < since):
+                continue
+            if until and (recorded_at is None or recorded_at > until):
+                continue
+            matches.append(record)
+            if limit and len(matches) >= limit:
+                return matches
+
+    return matches
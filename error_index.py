@@ -0,0 +1,164 @@
+import re
+import threading
+from collections import Counter
+
+# Signatures that do not identify a problem: no error type in the log, or only
+# an HTTP status ("500", "HTTP 502", "404 Not Found") - says how a request failed, not why
+GENERIC_SIGNATURES = ('Unknown',)
+_HTTP_STATUS = re.compile(r'^(?:HTTP(?:/[\d.]+)?\s*|(?:status|error)\s*)?[1-5]\d\d(?:\s+[A-Za-z][A-Za-z ]*)?$', re.I)
+
+
+def is_specific_signature(signature):
+    """Whether tickets sharing this signature can be counted as the same problem"""
+    signature = (signature or '').strip()
+    return bool(signature) and signature not in GENERIC_SIGNATURES and not _HTTP_STATUS.match(signature)
+
+
+class ErrorSignatureIndex:
+    """Inverted index: error signature -> merchants, tickets and summed impact.
+
+    Maintained as tickets are ingested, so decide() reads exact counts for a
+    ticket's error signature with a dict lookup instead of relying on the LLM
+    to count. Per signature it keeps the ticket ids, a per-merchant ticket
+    count (so a ticket can be removed again) and running sums of checkout
+    failures and affected customers. Re-adding a ticket replaces its
+    previous contribution. Generic signatures (see is_specific_signature)
+    are indexed like any other but reported with specific=False.
+    """
+
+    def __init__(self, signature_fn):
+        self._signature_fn = signature_fn
+        self._tickets = {}    # ticket_id -> (signature, merchant_id, checkout_failures, affected_customers)
+        self._entries = {}    # signature -> entry
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, ticket_id):
+        return ticket_id in self._tickets
+
+    def _remove(self, ticket_id):
+        signature, merchant_id, failures, customers = self._tickets.pop(ticket_id)
+        entry = self._entries[signature]
+        entry['ticket_ids'].discard(ticket_id)
+        if merchant_id is not None:
+            entry['merchants'][merchant_id] -= 1
+            if entry['merchants'][merchant_id] <= 0:
+                del entry['merchants'][merchant_id]
+        entry['checkout_failures'] -= failures
+        entry['affected_customers'] -= customers
+        if not entry['ticket_ids']:
+            del self._entries[signature]
+
+    def _row(self, ticket):
+        return (
+            self._signature_fn(ticket),
+            ticket.get('merchant_id'),
+            ticket.get('checkout_failures', 0) or 0,
+            ticket.get('affected_customers', 0) or 0
+        )
+
+    def _add(self, ticket):
+        row = self._row(ticket)
+        ticket_id = ticket['ticket_id']
+        if self._tickets.get(ticket_id) == row:
+            return
+        if ticket_id in self._tickets:
+            self._remove(ticket_id)
+        signature, merchant_id, failures, customers = row
+        entry = self._entries.setdefault(signature, {
+            'ticket_ids': set(),
+            'merchants': Counter(),
+            'checkout_failures': 0,
+            'affected_customers': 0
+        })
+        entry['ticket_ids'].add(ticket_id)
+        if merchant_id is not None:
+            entry['merchants'][merchant_id] += 1
+        entry['checkout_failures'] += failures
+        entry['affected_customers'] += customers
+        self._tickets[ticket_id] = row
+
+    def add(self, ticket):
+        with self._lock:
+            self._add(ticket)
+
+    def update(self, tickets):
+        with self._lock:
+            for ticket in tickets:
+                self._add(ticket)
+
+    def sync(self, tickets):
+        """Make the index match a full ticket set: add new or changed tickets, drop missing ones"""
+        with self._lock:
+            current = {t['ticket_id'] for t in tickets}
+            for ticket_id in [k for k in self._tickets if k not in current]:
+                self._remove(ticket_id)
+            for ticket in tickets:
+                self._add(ticket)
+
+    def counts(self, signature):
+        """Exact counts for a signature: O(1), no per-ticket work"""
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None:
+                return {'signature': signature, 'specific': is_specific_signature(signature), 'ticket_count': 0,
+                        'merchant_count': 0, 'checkout_failures': 0, 'affected_customers': 0}
+            return {
+                'signature': signature,
+                'specific': is_specific_signature(signature),
+                'ticket_count': len(entry['ticket_ids']),
+                'merchant_count': len(entry['merchants']),
+                'checkout_failures': entry['checkout_failures'],
+                'affected_customers': entry['affected_customers']
+            }
+
+    def for_ticket(self, ticket):
+        """Counts for a ticket's signature, with the ticket counted as it is now.
+
+        Read-only: a ticket that is not indexed (e.g. one posted for an ad-hoc
+        analysis) is counted in the result but not stored, so only the ticket
+        store (through add/update/sync) changes the counts other tickets see.
+        """
+        signature, merchant_id, failures, customers = self._row(ticket)
+        with self._lock:
+            entry = self._entries.get(signature)
+            ticket_ids = entry['ticket_ids'] if entry else set()
+            merchants = entry['merchants'] if entry else Counter()
+            stored = self._tickets.get(ticket['ticket_id'])
+            # Take out the ticket's indexed contribution to this signature, then add its current one
+            old = stored if stored is not None and stored[0] == signature else None
+            ticket_count = len(ticket_ids) + (0 if old else 1)
+            merchant_count = len(merchants)
+            if old and old[1] is not None and merchants[old[1]] == 1:
+                merchant_count -= 1
+            if merchant_id is not None and merchants.get(merchant_id, 0) - (1 if old and old[1] == merchant_id else 0) <= 0:
+                merchant_count += 1
+            return {
+                'signature': signature,
+                'specific': is_specific_signature(signature),
+                'ticket_count': ticket_count,
+                'merchant_count': merchant_count,
+                'checkout_failures': (entry['checkout_failures'] if entry else 0) - (old[2] if old else 0) + failures,
+                'affected_customers': (entry['affected_customers'] if entry else 0) - (old[3] if old else 0) + customers
+            }
+
+    def members(self, signature):
+        """Ticket ids and merchant ids for a signature, sorted"""
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None:
+                return {'ticket_ids': [], 'merchants': []}
+            return {
+                'ticket_ids': sorted(entry['ticket_ids']),
+                'merchants': sorted(entry['merchants'])
+            }
+
+    def summary(self):
+        """Counts for every signature, most merchants first"""
+        with self._lock:
+            signatures = list(self._entries)
+        rows = [self.counts(signature) for signature in signatures]
+        rows.sort(key=lambda r: (r['merchant_count'], r['ticket_count']), reverse=True)
+        return rows
@@ -0,0 +1,157 @@
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from decision_archive import write_json_atomic
+
+# Escalations in these states still accept new tickets for their pattern
+OPEN_STATES = ('pending_approval', 'escalated')
+
+
+def pattern_id_for(signature):
+    """Stable pattern id for an error signature, e.g. 'WebhookTimeout' -> 'webhooktimeout'"""
+    return re.sub(r'[^a-z0-9]+', '-', signature.lower()).strip('-') or 'unknown'
+
+
+class EscalationStore:
+    """Open engineering escalations, one per detected pattern.
+
+    Tickets sharing a pattern attach to the pattern's open escalation
+    instead of each producing their own engineering ticket and approval.
+    Persisted to a JSON file keyed by escalation id.
+
+    Lifecycle: pending_approval -> escalated (owner approved) -> resolved
+    (engineering closed it), or pending_approval -> rejected. Only open
+    escalations collect tickets; after it is resolved or rejected, the
+    pattern's next ticket opens a new one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._escalations = self._load()
+        self._batch_depth = 0
+        self._dirty = False
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def _save(self):
+        if self._batch_depth:
+            self._dirty = True
+            return
+        write_json_atomic(self.path, self._escalations)
+
+    @contextmanager
+    def batch(self):
+        """Hold the store and write the file once for all changes made inside"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty:
+                    self._dirty = False
+                    self._save()
+
+    def get(self, escalation_id):
+        with self._lock:
+            escalation = self._escalations.get(escalation_id)
+            return dict(escalation) if escalation else None
+
+    def open_for(self, pattern_id):
+        """The open escalation for a pattern, if any"""
+        with self._lock:
+            for escalation in self._escalations.values():
+                if escalation['pattern_id'] == pattern_id and escalation['status'] in OPEN_STATES:
+                    return dict(escalation)
+            return None
+
+    def find(self, status=None):
+        with self._lock:
+            return [dict(e) for e in self._escalations.values() if status is None or e['status'] == status]
+
+    def open(self, pattern_id, owner_ticket_id, impact):
+        """Create the escalation for a pattern, owned by the ticket awaiting approval"""
+        with self._lock:
+            existing = self.open_for(pattern_id)
+            if existing:
+                return existing, False
+
+            now = datetime.now().isoformat()
+            escalation_id = f"ESC-{pattern_id}-{len(self._escalations) + 1:04d}"
+            self._escalations[escalation_id] = {
+                'escalation_id': escalation_id,
+                'pattern_id': pattern_id,
+                'status': 'pending_approval',
+                'owner_ticket_id': owner_ticket_id,
+                'ticket_ids': [],
+                'merchants': [],
+                'total_checkout_failures': 0,
+                'total_affected_customers': 0,
+                'created_at': now,
+                'updated_at': now
+            }
+            self._add_ticket(escalation_id, owner_ticket_id, impact)
+            self._save()
+            return dict(self._escalations[escalation_id]), True
+
+    def attach(self, escalation_id, ticket_id, impact):
+        """Append a ticket and its impact to an escalation"""
+        with self._lock:
+            self._add_ticket(escalation_id, ticket_id, impact)
+            self._save()
+            return dict(self._escalations[escalation_id])
+
+    def _add_ticket(self, escalation_id, ticket_id, impact):
+        escalation = self._escalations[escalation_id]
+        if ticket_id in escalation['ticket_ids']:
+            return
+        escalation['ticket_ids'].append(ticket_id)
+        merchant_id = impact.get('merchant_id')
+        if merchant_id and merchant_id not in escalation['merchants']:
+            escalation['merchants'].append(merchant_id)
+        escalation['total_checkout_failures'] += impact.get('checkout_failures', 0)
+        escalation['total_affected_customers'] += impact.get('affected_customers', 0)
+        escalation['updated_at'] = datetime.now().isoformat()
+
+    def update(self, escalation_id, **fields):
+        with self._lock:
+            escalation = self._escalations[escalation_id]
+            escalation.update(fields)
+            escalation['updated_at'] = datetime.now().isoformat()
+            self._save()
+            return dict(escalation)
+
+    def resolve(self, escalation_id, resolution=None):
+        """Close an escalated pattern once engineering has fixed it"""
+        with self._lock:
+            escalation = self._escalations.get(escalation_id)
+            if escalation is None:
+                raise KeyError(f"Escalation {escalation_id} not found")
+            if escalation['status'] != 'escalated':
+                raise ValueError(f"Escalation {escalation_id} is {escalation['status']}; only escalated ones can be resolved")
+            return self.update(
+                escalation_id,
+                status='resolved',
+                resolution=resolution,
+                resolved_at=datetime.now().isoformat()
+            )
+
+    def summary(self, escalation):
+        """Aggregated impact line for an escalation"""
+        return (
+            f"{len(escalation['merchants'])} merchants, {len(escalation['ticket_ids'])} tickets, "
+            f"~{escalation['total_checkout_failures']} failed checkouts, "
+            f"{escalation['total_affected_customers']} customers affected"
+        )
@@ -1,7 +1,8 @@
 import React, { useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { ShieldAlert, Activity, CheckCircle, Clock, Zap } from 'lucide-react';
-import { fetchTickets, runAnalysis, fetchAuditLog } from './services/api';
+import { fetchTickets, runAnalysis, fetchStats } from './services/api';
+import { useChangeFeed } from './services/changeFeed';
 import { useToast } from './components/Toast';
 import Layout from './components/Layout';
 import StatsCard from './components/StatsCard';
@@ -19,18 +20,16 @@ function App() {
   const queryClient = useQueryClient();
   const toast = useToast();
 
-  // Fetch tickets for stats computation
+  // Fetch tickets for stats computation (kept current by the change feed)
   const { data: tickets, isLoading: ticketsLoading } = useQuery({ 
     queryKey: ['tickets'], 
-    queryFn: fetchTickets,
-    refetchInterval: 5000 
+    queryFn: fetchTickets
   });
 
-  // Fetch audit log for stats
-  const { data: auditLog } = useQuery({
-    queryKey: ['audit-log'],
-    queryFn: fetchAuditLog,
-    refetchInterval: 5000
+  // Action counts from the backend's audit rollups (refreshed by the change feed)
+  const { data: stats } = useQuery({
+    queryKey: ['stats'],
+    queryFn: () => fetchStats({ granularity: 'day', limit: 2 })
   });
 
   // Mutation to run agent analysis
@@ -39,6 +38,7 @@ function App() {
     onSuccess: (data) => {
       queryClient.invalidateQueries({ queryKey: ['tickets'] });
       queryClient.invalidateQueries({ queryKey: ['audit-log'] });
+      queryClient.invalidateQueries({ queryKey: ['stats'] });
       
       const resultsList = Array.isArray(data) ? data : (data.data || []);
       const newResults = {};
@@ -76,16 +76,56 @@ function App() {
     }
   };
 
+  // Reflect approvals/rejections (from this or another client) in the local results
+  const applyReview = (outcome, ticketIds) => {
+    if (outcome === 'rejected') {
+      setRejectedTickets(prev => new Set([...prev, ...ticketIds]));
+    }
+    setAgentResults(prev => {
+      const updated = { ...prev };
+      ticketIds.forEach(id => {
+        if (!updated[id]) return;
+        if (outcome === 'rejected') {
+          delete updated[id];
+        } else {
+          updated[id] = {
+            ...updated[id],
+            action_result: { ...updated[id].action_result, status: 'executed' }
+          };
+        }
+      });
+      return updated;
+    });
+    if (outcome === 'rejected' && selectedTicket && ticketIds.includes(selectedTicket.ticket_id)) {
+      setSelectedTicket(null);
+    }
+  };
+
+  // Server-pushed changes replace polling
+  useChangeFeed({ onReview: applyReview });
+
+  const handleBulkComplete = (mode, result) => {
+    const ticketIds = result.ticket_ids || [];
+    applyReview(mode === 'approve' ? 'approved' : 'rejected', ticketIds);
+    toast.info(`${mode === 'approve' ? 'Approved' : 'Rejected'} ${ticketIds.length} pending actions`);
+  };
+
   // Calculate real stats from data
   const totalTickets = tickets?.length || 0;
   const criticalCount = tickets?.filter(t => t.severity === 'critical').length || 0;
   const highCount = tickets?.filter(t => t.severity === 'high').length || 0;
   
-  // Calculate stats
-  const pendingApproval = Object.values(agentResults).filter(
-    r => r.decision?.requires_approval && r.action_result?.status === 'pending_approval'
-  ).length;
-  const executedActions = auditLog?.filter(a => a.status === 'executed').length || 0;
+  // Action stats come precomputed from /api/stats
+  const pendingApproval = stats?.pending_approval ?? 0;
+  const executedActions = stats?.totals.by_status.executed || 0;
+  // Executed today vs the previous day's bucket (no trend until there are two days,
+  // or when nothing was audited today yet and the last bucket is an older day)
+  const now = new Date();
+  const todayKey = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}-${String(now.getDate()).padStart(2, '0')}`;
+  const [previousDay, today] = stats?.series.length === 2 ? stats.series : [];
+  const executedTrend = previousDay?.by_status.executed && today.bucket === todayKey
+    ? Math.round(((today.by_status.executed || 0) / previousDay.by_status.executed - 1) * 100)
+    : undefined;
   
   // Get active analysis for the selected ticket
   const activeResult = selectedTicket ? agentResults[selectedTicket.ticket_id] : null;
@@ -128,7 +168,8 @@ function App() {
             title="Actions Executed" 
             value={executedActions} 
             icon={CheckCircle} 
-            trend={executedActions > 0 ? 10 : 0} 
+            trend={executedTrend} 
+            trendLabel="vs previous active day"
             color="emerald" 
           />
           <StatsCard 
@@ -175,11 +216,13 @@ function App() {
                 ticket={selectedTicket} 
                 analysis={activeResult?.analysis} 
                 decision={activeResult?.decision}
+                actionStatus={activeResult?.action_result?.status}
                 onActionComplete={() => {
                   queryClient.invalidateQueries({ queryKey: ['tickets'] });
                   queryClient.invalidateQueries({ queryKey: ['audit-log'] });
                 }}
                 onReject={handleReject}
+                onBulkComplete={handleBulkComplete}
               />
             ) : (
                <div className="h-full bg-slate-900/50 border border-slate-800 rounded-xl flex flex-col items-center justify-center text-slate-500">
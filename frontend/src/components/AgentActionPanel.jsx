@@ -1,12 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
-import { approveAction } from '../services/api';
-import { Check, X, AlertTriangle, Brain, GitPullRequest, Play, CheckCircle } from 'lucide-react';
+import { approveAction, bulkApproveActions, bulkRejectActions } from '../services/api';
+import { Check, X, AlertTriangle, Brain, GitPullRequest, Play, CheckCircle, Layers } from 'lucide-react';
 
-const AgentActionPanel = ({ ticket, analysis, decision, onActionComplete, onReject }) => {
+const AgentActionPanel = ({ ticket, analysis, decision, actionStatus, onActionComplete, onReject, onBulkComplete }) => {
   const queryClient = useQueryClient();
   const [feedback, setFeedback] = useState(null);
   const [isExecuted, setIsExecuted] = useState(false);
+  const [bulkScope, setBulkScope] = useState('action');
 
   // Reset executed state when ticket changes
   useEffect(() => {
@@ -30,6 +31,36 @@ const AgentActionPanel = ({ ticket, analysis, decision, onActionComplete, onReje
     }
   });
 
+  // Bulk review of every pending action like this one (same action or same root cause)
+  const bulkSelection = () => (
+    bulkScope === 'root_cause'
+      ? { filter: { root_cause: analysis?.root_cause } }
+      : { filter: { action: decision?.action } }
+  );
+
+  const bulkMutation = useMutation({
+    mutationFn: ({ mode }) => (
+      mode === 'approve' ? bulkApproveActions(bulkSelection()) : bulkRejectActions(bulkSelection())
+    ),
+    onSuccess: (data, { mode }) => {
+      const result = data.data || {};
+      if (mode === 'approve' && result.ticket_ids?.includes(ticket.ticket_id)) {
+        setIsExecuted(true);
+        const own = result.results?.find(r => r.decision?.ticket_id === ticket.ticket_id);
+        setExecutionData(own?.action_details || null);
+      }
+      setFeedback({
+        type: 'success',
+        message: `${mode === 'approve' ? 'Approved' : 'Rejected'} ${result.count || 0} pending actions`
+      });
+      queryClient.invalidateQueries({ queryKey: ['audit-log'] });
+      onBulkComplete && onBulkComplete(mode, result);
+    },
+    onError: (err) => {
+      setFeedback({ type: 'error', message: `Bulk review failed: ${err.message}` });
+    }
+  });
+
   // No ticket selected at all
   if (!ticket) {
     return (
@@ -185,7 +216,7 @@ const AgentActionPanel = ({ ticket, analysis, decision, onActionComplete, onReje
               </span>
             </div>
 
-            {isExecuted || feedback?.type === 'success' ? (
+            {isExecuted || actionStatus === 'executed' ? (
               <div className="mt-4 space-y-4">
                 <div className="bg-emerald-500/10 border border-emerald-500/20 text-emerald-400 p-3 rounded-lg flex items-center text-sm">
                   <CheckCircle size={16} className="mr-2" />
@@ -281,6 +312,7 @@ const AgentActionPanel = ({ ticket, analysis, decision, onActionComplete, onReje
                 )}
               </div>
             ) : decision.requires_approval ? (
+              <>
               <div className="flex space-x-3 mt-4">
                 <button 
                   onClick={() => mutation.mutate(ticket.ticket_id)}
@@ -300,6 +332,32 @@ const AgentActionPanel = ({ ticket, analysis, decision, onActionComplete, onReje
                   <X size={18} className="mr-2" /> Reject
                 </button>
               </div>
+              <div className="mt-3 pt-3 border-t border-slate-700 flex items-center space-x-3 text-xs">
+                <Layers size={14} className="text-slate-500" />
+                <select
+                  value={bulkScope}
+                  onChange={(e) => setBulkScope(e.target.value)}
+                  className="bg-slate-900 border border-slate-700 text-slate-300 rounded px-2 py-1"
+                >
+                  <option value="action">All pending: {decision.action}</option>
+                  <option value="root_cause">All pending: {analysis.root_cause}</option>
+                </select>
+                <button
+                  onClick={() => bulkMutation.mutate({ mode: 'approve' })}
+                  disabled={bulkMutation.isPending}
+                  className="bg-emerald-600/20 hover:bg-emerald-600/40 text-emerald-400 border border-emerald-600/30 px-3 py-1 rounded transition-colors disabled:opacity-50"
+                >
+                  Approve all
+                </button>
+                <button
+                  onClick={() => bulkMutation.mutate({ mode: 'reject' })}
+                  disabled={bulkMutation.isPending}
+                  className="bg-rose-600/20 hover:bg-rose-600/40 text-rose-400 border border-rose-600/30 px-3 py-1 rounded transition-colors disabled:opacity-50"
+                >
+                  Reject all
+                </button>
+              </div>
+              </>
             ) : (
               <div className="bg-emerald-500/10 border border-emerald-500/20 text-emerald-400 p-3 rounded-lg flex items-center text-sm">
                 <CheckCircle size={16} className="mr-2" />
@@ -8,8 +8,7 @@ const AuditLogTable = () => {
   
   const { data: auditLog, isLoading } = useQuery({
     queryKey: ['audit-log'],
-    queryFn: fetchAuditLog,
-    refetchInterval: 5000
+    queryFn: fetchAuditLog
   });
 
   const clearMutation = useMutation({
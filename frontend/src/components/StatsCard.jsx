@@ -1,6 +1,6 @@
 import React from 'react';
 
-const StatsCard = ({ title, value, icon: Icon, trend, color = "purple" }) => {
+const StatsCard = ({ title, value, icon: Icon, trend, trendLabel = "from last batch", color = "purple" }) => {
   const borderColors = {
     purple: "border-l-violet-500",
     indigo: "border-l-indigo-500",
@@ -56,7 +56,7 @@ const StatsCard = ({ title, value, icon: Icon, trend, color = "purple" }) => {
           <span className={trend > 0 ? "text-emerald-400" : "text-rose-400"}>
             {trend > 0 ? "+" : ""}{trend}%
           </span>
-          <span className="text-slate-500 ml-2">from last batch</span>
+          <span className="text-slate-500 ml-2">{trendLabel}</span>
         </div>
       )}
     </div>
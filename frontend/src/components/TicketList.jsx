@@ -22,7 +22,6 @@ const TicketList = ({ onSelectTicket }) => {
   const { data: tickets, isLoading, error } = useQuery({
     queryKey: ['tickets'],
     queryFn: fetchTickets,
-    refetchInterval: 5000,
   });
 
   if (isLoading) return <div className="text-slate-500 animate-pulse">Loading tickets...</div>;
@@ -1,6 +1,6 @@
 import axios from 'axios';
 
-const API_BASE_URL = 'http://localhost:5000/api';
+export const API_BASE_URL = 'http://localhost:5000/api';
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -19,6 +19,12 @@ export const fetchAuditLog = async () => {
   return response.data.data;
 };
 
+// Counts from the backend's audit rollups: totals plus the last `limit` buckets
+export const fetchStats = async ({ granularity = 'hour', limit = 24 } = {}) => {
+  const response = await api.get('/stats', { params: { granularity, limit } });
+  return response.data.data;
+};
+
 export const runAnalysis = async () => {
   const response = await api.post('/process-all');
   return response.data;
@@ -39,6 +45,17 @@ export const rejectAction = async (ticketId, reason = 'Rejected by operator') =>
   return response.data;
 };
 
+// selection: { ticket_ids: [...] } and/or { filter: { action, root_cause, pattern_id } }
+export const bulkApproveActions = async (selection) => {
+  const response = await api.post('/approve/bulk', selection);
+  return response.data;
+};
+
+export const bulkRejectActions = async (selection, reason = 'Rejected by operator') => {
+  const response = await api.post('/reject/bulk', { ...selection, reason });
+  return response.data;
+};
+
 export const generateTickets = async (count = 5) => {
   const response = await api.post('/generate-tickets', { count });
   return response.data;
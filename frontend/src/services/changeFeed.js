@@ -0,0 +1,76 @@
+import { useEffect, useRef } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { API_BASE_URL } from './api';
+
+const auditKey = (entry) => `${entry.timestamp}|${entry.ticket_id}|${entry.action}|${entry.status}`;
+
+// Subscribe to the backend change feed (Server-Sent Events) and apply its
+// deltas to the query cache. EventSource reconnects on its own (also when
+// the server closes an idle stream) and resumes from the last event id, so
+// only missed changes are replayed.
+export const useChangeFeed = ({ onDecision, onReview } = {}) => {
+  const queryClient = useQueryClient();
+  const handlers = useRef({ onDecision, onReview });
+  handlers.current = { onDecision, onReview };
+
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE_URL}/changes`);
+    const parse = (message) => JSON.parse(message.data).data;
+
+    const resync = () => {
+      queryClient.invalidateQueries({ queryKey: ['tickets'] });
+      queryClient.invalidateQueries({ queryKey: ['audit-log'] });
+      queryClient.invalidateQueries({ queryKey: ['stats'] });
+    };
+
+    source.addEventListener('tickets', (message) => {
+      const { tickets, replaced } = parse(message);
+      if (replaced) {
+        queryClient.setQueryData(['tickets'], tickets);
+        return;
+      }
+      // Added tickets: a known ticket_id replaces the cached ticket, new ones are appended
+      queryClient.setQueryData(['tickets'], (current = []) => {
+        const incoming = new Map(tickets.map(ticket => [ticket.ticket_id, ticket]));
+        const merged = current.map(ticket => {
+          const update = incoming.get(ticket.ticket_id);
+          incoming.delete(ticket.ticket_id);
+          return update ?? ticket;
+        });
+        return [...merged, ...incoming.values()];
+      });
+    });
+
+    source.addEventListener('audit', (message) => {
+      const { entries } = parse(message);
+      queryClient.setQueryData(['audit-log'], (current = []) => {
+        const seen = new Set(current.map(auditKey));
+        return [...current, ...entries.filter(entry => !seen.has(auditKey(entry)))];
+      });
+      // Rollups are maintained server-side; refetching them is O(buckets)
+      queryClient.invalidateQueries({ queryKey: ['stats'] });
+    });
+
+    source.addEventListener('audit_cleared', () => {
+      queryClient.setQueryData(['audit-log'], []);
+      queryClient.invalidateQueries({ queryKey: ['stats'] });
+    });
+
+    source.addEventListener('decision', (message) => {
+      handlers.current.onDecision?.(parse(message));
+    });
+
+    source.addEventListener('review', (message) => {
+      const { outcome, ticket_ids } = parse(message);
+      handlers.current.onReview?.(outcome, ticket_ids);
+    });
+
+    // The server could not resume from our cursor (restart or too far behind)
+    source.addEventListener('reset', resync);
+
+    // Catch up on anything missed while the connection was down
+    source.addEventListener('ready', resync);
+
+    return () => source.close();
+  }, [queryClient]);
+};
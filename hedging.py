@@ -0,0 +1,254 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from circuit_breaker import DeadlineExceeded
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class HedgedCaller:
+    """Hedged requests: if a call is slower than usual, race a duplicate against it.
+
+    The hedge delay adapts to the observed latency of the same model (its
+    `percentile`, p95 by default). Before `min_samples` calls have completed,
+    `initial_delay` is used. `budget` caps the extra requests as a fraction of
+    primary calls: each call earns `budget` credits (saved up to `burst`), a
+    hedge spends one. The
+    first successful answer wins. An async loser is cancelled. A sync loser
+    cannot be interrupted mid-request, so its answer is discarded; it keeps
+    its pool worker until the request ends, so no hedge is started while
+    every worker is busy (it would only queue behind the slow requests).
+    """
+
+    def __init__(self, budget=0.1, percentile=95, initial_delay=2.0, min_delay=0.05,
+                 min_samples=20, window=500, max_workers=16, burst=5):
+        self.budget = budget
+        self.burst = burst
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples = {}             # model -> recent single-request latencies (s)
+        self._call_latency = deque(maxlen=window)  # latency of calls from request start, hedges included (s)
+        self._credits = 1.0            # allows one hedge before any budget has accrued
+        self._counts = Counter()
+        self._executor = None
+        self._in_flight = 0            # submitted sync requests that have not finished, losers included
+
+    @classmethod
+    def from_env(cls, max_workers=16):
+        return cls(
+            budget=float(os.getenv('LLM_HEDGE_BUDGET', '0.1')),
+            percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', '95')),
+            initial_delay=float(os.getenv('LLM_HEDGE_INITIAL_DELAY', '2.0')),
+            min_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.05')),
+            burst=float(os.getenv('LLM_HEDGE_BURST', '5')),
+            max_workers=max_workers
+        )
+
+    def delay_for(self, key):
+        """Seconds to wait for the primary request before hedging it"""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return self.initial_delay
+            return max(self.min_delay, _percentile(samples, self.percentile))
+
+    def _start_call(self):
+        with self._lock:
+            self._counts['calls'] += 1
+            self._credits = min(self._credits + self.budget, self.burst)
+
+    def _take_credit(self):
+        with self._lock:
+            if self._credits < 1:
+                self._counts['hedges_denied'] += 1
+                return False
+            self._credits -= 1
+            self._counts['hedges'] += 1
+            return True
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self._window)).append(seconds)
+
+    def _finish_call(self, seconds, winner):
+        with self._lock:
+            self._call_latency.append(seconds)
+            if winner == 'hedge':
+                self._counts['hedge_wins'] += 1
+
+    def _timed(self, key, fn, started=None):
+        if started is not None:
+            started.set()
+        start = time.perf_counter()
+        result = fn()
+        self._observe(key, time.perf_counter() - start)
+        return result
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm-hedge')
+        return self._executor
+
+    def _submit(self, key, fn, started=None):
+        with self._lock:
+            self._in_flight += 1
+        future = self._pool().submit(self._timed, key, fn, started)
+        future.add_done_callback(self._release_worker)
+        return future
+
+    def _release_worker(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _worker_free(self):
+        with self._lock:
+            if self._in_flight < self.max_workers:
+                return True
+            self._counts['hedges_skipped_busy'] += 1
+            return False
+
+    @staticmethod
+    def _remaining(deadline):
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def call(self, key, fn, deadline=None):
+        """Run fn() (a blocking request for model `key`), hedging it if it runs long.
+
+        `deadline` (time.monotonic) bounds every wait: DeadlineExceeded is
+        raised if the request has not started (all workers busy) or answered
+        by then. A request already running is left to its own timeout.
+        """
+        started = threading.Event()
+        primary = self._submit(key, fn, started)
+        # The hedge delay and budget count from when the request starts, not from queueing
+        if not started.wait(self._remaining(deadline)) and primary.cancel():
+            raise DeadlineExceeded("deadline reached while waiting for a free LLM worker")
+        self._start_call()
+        start = time.perf_counter()
+        delay = self.delay_for(key)
+        remaining = self._remaining(deadline)
+        done, _ = wait([primary], timeout=delay if remaining is None else min(delay, remaining))
+        if done or (remaining is not None and remaining <= delay) or not self._worker_free() or not self._take_credit():
+            done, _ = wait([primary], timeout=self._remaining(deadline))
+            if not done:
+                raise DeadlineExceeded("deadline reached before the LLM answered")
+            result = primary.result()
+            self._finish_call(time.perf_counter() - start, 'primary')
+            return result
+
+        hedge = self._submit(key, fn)
+        pending = {primary: 'primary', hedge: 'hedge'}
+        error = None
+        while pending:
+            done, _ = wait(list(pending), timeout=self._remaining(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                hedge.cancel()
+                raise DeadlineExceeded("deadline reached before the LLM answered")
+            for future in done:
+                name = pending.pop(future)
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()  # only stops a hedge that has not started yet
+                    self._finish_call(time.perf_counter() - start, name)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def call_async(self, key, coro_factory, slots=None):
+        """call() for coroutines: coro_factory() starts a fresh request each time.
+
+        With `slots` (an asyncio.Semaphore) the primary request holds a slot
+        while it runs, and the hedge delay starts once it has one. The hedge
+        itself does not wait for a slot: queued behind a saturated limit it
+        could not help, and the budget already bounds the extra load.
+        """
+        started = asyncio.Event()
+
+        async def _timed(use_slot):
+            if slots is None or not use_slot:
+                return await self._observed(key, coro_factory, started)
+            async with slots:
+                return await self._observed(key, coro_factory, started)
+
+        primary = asyncio.ensure_future(_timed(True))
+        waiting = asyncio.ensure_future(started.wait())
+        await asyncio.wait([primary, waiting], return_when=asyncio.FIRST_COMPLETED)
+        waiting.cancel()
+        self._start_call()
+        start = time.perf_counter()
+        done, _ = await asyncio.wait([primary], timeout=self.delay_for(key))
+        if done or not self._take_credit():
+            result = await primary
+            self._finish_call(time.perf_counter() - start, 'primary')
+            return result
+
+        hedge = asyncio.ensure_future(_timed(False))
+        pending = {primary: 'primary', hedge: 'hedge'}
+        error = None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        self._finish_call(time.perf_counter() - start, name)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _observed(self, key, coro_factory, started):
+        started.set()
+        began = time.perf_counter()
+        result = await coro_factory()
+        self._observe(key, time.perf_counter() - began)
+        return result
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            latency = list(self._call_latency)
+            delays = {
+                key: (max(self.min_delay, _percentile(samples, self.percentile))
+                      if len(samples) >= self.min_samples else self.initial_delay)
+                for key, samples in self._samples.items()
+            }
+
+        def _ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        calls = counts.get('calls', 0)
+        return {
+            'budget': self.budget,
+            'percentile': self.percentile,
+            'calls': calls,
+            'hedges': counts.get('hedges', 0),
+            'hedge_rate': round(counts.get('hedges', 0) / calls, 3) if calls else None,
+            'hedge_wins': counts.get('hedge_wins', 0),
+            'hedges_denied': counts.get('hedges_denied', 0),
+            'hedges_skipped_busy': counts.get('hedges_skipped_busy', 0),
+            'hedge_delay_ms': {key: _ms(delay) for key, delay in delays.items()},
+            'latency_ms': {
+                'p50': _ms(_percentile(latency, 50)),
+                'p95': _ms(_percentile(latency, 95)),
+                'p99': _ms(_percentile(latency, 99))
+            }
+        }
@@ -0,0 +1,250 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+REQUIRED_FIELDS = ('ticket_id', 'merchant_id', 'issue')
+# Fields the REASON prompt reads directly, with the value used when a ticket omits them.
+# An empty error_log has the generic signature 'Unknown', which decide() never
+# counts as a pattern by itself (only near-duplicate evidence can)
+DEFAULT_FIELDS = {
+    'merchant_message': '',
+    'error_log': '',
+    'migration_stage': 'unknown',
+    'severity': 'medium',
+    'checkout_failures': 0,
+    'affected_customers': 0
+}
+
+
+class IngestQueueFull(Exception):
+    """The ingest queue cannot take the batch now; retry after `retry_after` seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_ndjson(body):
+    """Tickets from an NDJSON body (one JSON object per line; blank lines ignored).
+
+    Raises ValueError naming every bad line, so a batch is accepted or
+    rejected as a whole.
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    tickets, errors = [], []
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            ticket = json.loads(line)
+        except json.JSONDecodeError as e:
+            errors.append(f"line {number}: invalid JSON ({e.msg})")
+            continue
+        if not isinstance(ticket, dict):
+            errors.append(f"line {number}: expected an object")
+            continue
+        missing = [field for field in REQUIRED_FIELDS if not ticket.get(field)]
+        if missing:
+            errors.append(f"line {number}: missing {', '.join(missing)}")
+            continue
+        for field, default in DEFAULT_FIELDS.items():
+            ticket.setdefault(field, default)
+        ticket.setdefault('timestamp', datetime.now().isoformat())
+        tickets.append(ticket)
+    if errors:
+        raise ValueError('; '.join(errors[:10]) + (f" (+{len(errors) - 10} more)" if len(errors) > 10 else ''))
+    return tickets
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class IngestionDaemon:
+    """Bounded ticket queue drained continuously by the agent loop.
+
+    offer() accepts a whole batch or raises IngestQueueFull (the HTTP
+    endpoint's 429); put() blocks until there is room instead (stdin daemon
+    mode). A worker thread takes up to `batch_size` tickets, waiting at most
+    `max_wait` seconds for a batch to fill. It adds them to the ticket store
+    and runs OBSERVE → REASON → DECIDE → ACT for them. Lag is measured from
+    when a ticket is queued to when its decision is recorded.
+    """
+
+    def __init__(self, agent, capacity=1000, batch_size=25, max_wait=1.0, window=500):
+        self.agent = agent
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = deque()        # (ticket, queued_at monotonic)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._busy = False
+        self._lag = deque(maxlen=window)            # seconds from queued to decided
+        self._batches = deque(maxlen=20)            # (tickets, seconds) of recent batches
+        self._counts = {'accepted': 0, 'rejected': 0, 'processed': 0, 'failed': 0, 'batches': 0}
+        self._last_error = None
+        self.started_at = None
+
+    @classmethod
+    def from_env(cls, agent):
+        return cls(
+            agent,
+            capacity=int(os.getenv('INGEST_QUEUE_SIZE', '1000')),
+            batch_size=int(os.getenv('INGEST_BATCH_SIZE', '25')),
+            max_wait=float(os.getenv('INGEST_MAX_WAIT', '1.0'))
+        )
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return self
+            self._stopping = False
+            self.started_at = datetime.now().isoformat()
+            self._thread = threading.Thread(target=self._run, name='ticket-ingestion', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, drain=True, timeout=None):
+        """Stop the worker, after the queued tickets are processed if `drain`"""
+        with self._cond:
+            if not drain:
+                self._queue.clear()
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _throughput(self):
+        # Tickets per second over recent batches (None before the first one)
+        tickets = sum(n for n, _ in self._batches)
+        seconds = sum(s for _, s in self._batches)
+        return tickets / seconds if tickets and seconds else None
+
+    def _retry_after(self, needed):
+        # Time for the worker to free `needed` slots at its recent throughput
+        throughput = self._throughput()
+        if throughput is None:
+            return 5
+        return max(1, min(60, math.ceil(needed / throughput)))
+
+    def offer(self, tickets):
+        """Queue a batch of tickets, all or none"""
+        if len(tickets) > self.capacity:
+            raise ValueError(f"Batch of {len(tickets)} tickets exceeds the ingest queue capacity ({self.capacity})")
+        with self._cond:
+            free = self.capacity - len(self._queue)
+            if len(tickets) > free:
+                self._counts['rejected'] += len(tickets)
+                raise IngestQueueFull(
+                    f"Ingest queue full ({len(self._queue)}/{self.capacity} queued)",
+                    self._retry_after(len(tickets) - free)
+                )
+            now = time.monotonic()
+            self._queue.extend((ticket, now) for ticket in tickets)
+            self._counts['accepted'] += len(tickets)
+            self._cond.notify_all()
+        return len(tickets)
+
+    def put(self, ticket, timeout=None):
+        """Queue one ticket, blocking while the queue is full"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._queue) < self.capacity, timeout):
+                raise IngestQueueFull("Ingest queue full", self._retry_after(1))
+            self._queue.append((ticket, time.monotonic()))
+            self._counts['accepted'] += 1
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        """Wait until every queued ticket has been processed"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stopping)
+            if not self._queue:
+                return None
+            # Give a small batch up to max_wait to fill, so each run covers more tickets
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._busy = True
+            self._cond.notify_all()  # room for blocked put() callers
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            start = time.monotonic()
+            try:
+                self.agent.add_tickets([ticket for ticket, _ in batch])
+                results = self.agent.process_all_tickets(ticket_ids=[ticket['ticket_id'] for ticket, _ in batch])
+                failed = len({ticket['ticket_id'] for ticket, _ in batch}) - len(results)
+                error = None
+            except Exception as e:
+                failed, error = len(batch), e
+                print(f"Warning: Ingestion batch of {len(batch)} tickets failed: {e}")
+            finished = time.monotonic()
+            with self._cond:
+                self._busy = False
+                self._counts['batches'] += 1
+                self._counts['processed'] += len(batch) - failed
+                self._counts['failed'] += failed
+                if error is not None:
+                    self._last_error = str(error)
+                self._batches.append((len(batch), finished - start))
+                self._lag.extend(finished - queued_at for _, queued_at in batch)
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._queue)
+            oldest = self._queue[0][1] if self._queue else None
+            lag = list(self._lag)
+            throughput = self._throughput()
+            counts = dict(self._counts)
+            busy = self._busy
+
+        def _seconds(value):
+            return None if value is None else round(value, 3)
+
+        return {
+            'running': self.running,
+            'started_at': self.started_at,
+            'busy': busy,
+            'depth': depth,
+            'capacity': self.capacity,
+            'utilization': round(depth / self.capacity, 3) if self.capacity else None,
+            'batch_size': self.batch_size,
+            # Age of the oldest ticket still waiting: how far behind the daemon is right now
+            'lag_seconds': _seconds(time.monotonic() - oldest) if oldest is not None else 0.0,
+            'processed_lag_seconds': {
+                'p50': _seconds(_percentile(lag, 50)),
+                'p95': _seconds(_percentile(lag, 95)),
+                'max': _seconds(max(lag, default=None))
+            },
+            'throughput_per_second': _seconds(throughput),
+            **counts,
+            'last_error': self._last_error,
+            'as_of': datetime.now().isoformat()
+        }
@@ -0,0 +1,97 @@
+import json
+
+
+class IncrementalJSONParser:
+    """Parse the top-level fields of a streamed JSON object as soon as each one completes.
+
+    Feed it raw completion chunks; anything before the first '{' (e.g. a
+    ```json fence) is ignored. Nested values are returned once fully closed.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = 'key'  # key -> colon -> value
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    def feed(self, chunk):
+        """Consume a chunk and return the fields completed by it"""
+        self.buffer += chunk or ''
+        buf = self.buffer
+        completed = {}
+
+        while self._pos < len(buf) and not self.done:
+            ch = buf[self._pos]
+
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._depth = 1
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == 'key':
+                        self._key = json.loads(buf[self._key_start - 1:self._pos + 1])
+                        self._state = 'colon'
+                self._pos += 1
+                continue
+
+            if self._depth == 1 and self._state == 'key':
+                if ch == '"':
+                    self._in_string = True
+                    self._key_start = self._pos + 1
+                elif ch == '}':
+                    self.done = True
+            elif self._depth == 1 and self._state == 'colon':
+                if ch == ':':
+                    self._state = 'value'
+                    self._value_start = None
+            else:
+                if self._value_start is None and not ch.isspace():
+                    self._value_start = self._pos
+                if ch == '"':
+                    self._in_string = True
+                elif ch in '{[':
+                    self._depth += 1
+                elif ch in '}]' and self._depth > 1:
+                    self._depth -= 1
+                elif self._depth == 1 and ch in ',}':
+                    self._complete_value(buf[self._value_start:self._pos], completed)
+                    if ch == '}':
+                        self.done = True
+
+            self._pos += 1
+
+        return completed
+
+    def _complete_value(self, text, completed):
+        try:
+            value = json.loads(text.strip())
+        except (ValueError, TypeError):
+            # Malformed value (e.g. `true or false`) - leave it to the full parse
+            pass
+        else:
+            self.fields[self._key] = value
+            completed[self._key] = value
+        self._state = 'key'
+        self._key = None
+        self._value_start = None
+
+    def has(self, keys):
+        """True once every key in `keys` has been parsed"""
+        return all(k in self.fields for k in keys)
@@ -0,0 +1,238 @@
+"""Record/replay cassettes for LLM calls.
+
+A cassette is a JSONL file with one entry per chat completion: the request
+key, the parameters, the raw response text, latency and token usage. The
+agent passes a `cassette_key` naming the stable inputs of a request (the
+prompt version and the ticket's content), and the key hashes that with the
+model and sampling parameters. Run-dependent prompt context such as pattern
+counts or few-shot examples then does not cause misses. Requests without one
+are keyed on the full messages. RecordingClient wraps a real
+Groq client and appends every call; ReplayClient serves the recorded
+responses without network access, so a batch can be re-run with identical
+LLM behaviour.
+
+    LLM_CASSETTE=data/cassettes/incident.jsonl LLM_CASSETTE_MODE=record python agent.py
+    LLM_CASSETTE=data/cassettes/incident.jsonl LLM_CASSETTE_MODE=replay python agent.py
+
+    python llm_cassette.py check data/cassettes/incident.jsonl   # parse every recorded response
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+MODES = ('record', 'replay')
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request that was never recorded"""
+
+
+def request_key(model, messages, temperature=None, max_tokens=None, cassette_key=None, **_):
+    """Stable key for a chat completion request (streaming does not change the key)"""
+    canonical = json.dumps({
+        'model': model,
+        **({'cassette_key': cassette_key} if cassette_key is not None else {'messages': messages}),
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _without_cassette_key(params):
+    return {k: v for k, v in params.items() if k != 'cassette_key'}
+
+
+def _usage(response):
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return None
+    return {
+        field: getattr(usage, field, None)
+        for field in ('prompt_tokens', 'completion_tokens', 'total_tokens')
+    }
+
+
+class Cassette:
+    """A JSONL cassette file; entries for the same request replay in recorded order"""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}   # key -> [entry, ...]
+        self._cursor = {}    # key -> next index to replay
+        self._lock = threading.Lock()
+        self.stats = {'recorded': 0, 'replayed': 0, 'misses': 0}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry['key'], []).append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def entries(self):
+        return [entry for entries in self._entries.values() for entry in entries]
+
+    def record(self, params, response_text, latency_ms, usage=None):
+        entry = {
+            'key': request_key(**params),
+            'cassette_key': params.get('cassette_key'),
+            'model': params.get('model'),
+            'params': {k: params.get(k) for k in ('temperature', 'max_tokens', 'stream')},
+            'prompt_sha256': hashlib.sha256(params['messages'][-1]['content'].encode('utf-8')).hexdigest(),
+            'response_text': response_text,
+            'latency_ms': round(latency_ms, 1),
+            'usage': usage,
+            'recorded_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._entries.setdefault(entry['key'], []).append(entry)
+            self.stats['recorded'] += 1
+        return entry
+
+    def lookup(self, params):
+        """Next recorded entry for a request; the last one repeats once all were served"""
+        key = request_key(**params)
+        with self._lock:
+            if key not in self._entries and params.get('cassette_key') is not None:
+                # Cassettes recorded before cassette keys were keyed on the full messages
+                key = request_key(**_without_cassette_key(params))
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats['misses'] += 1
+                raise CassetteMiss(f"No recorded response for request {key[:12]}")
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            self.stats['replayed'] += 1
+            return entries[min(index, len(entries) - 1)]
+
+
+def _message_response(text, usage=None):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+
+def _stream_chunks(text, size=16):
+    for i in range(0, len(text), size):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + size]))])
+
+
+class _RecordingCompletions:
+    def __init__(self, inner, cassette):
+        self._inner = inner
+        self._cassette = cassette
+
+    def create(self, **params):
+        start = time.perf_counter()
+        response = self._inner.chat.completions.create(**_without_cassette_key(params))
+        if not params.get('stream'):
+            self._cassette.record(params, response.choices[0].message.content,
+                                  (time.perf_counter() - start) * 1000, _usage(response))
+            return response
+        return self._record_stream(params, response, start)
+
+    def _record_stream(self, params, stream, start):
+        parts = []
+        usage = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            # Groq reports usage on the final chunk
+            x_groq = getattr(chunk, 'x_groq', None)
+            if x_groq is not None and getattr(x_groq, 'usage', None) is not None:
+                usage = _usage(x_groq)
+            yield chunk
+        self._cassette.record(params, ''.join(parts), (time.perf_counter() - start) * 1000, usage)
+
+
+class _AsyncRecordingCompletions(_RecordingCompletions):
+    async def create(self, **params):
+        start = time.perf_counter()
+        response = await self._inner.chat.completions.create(**_without_cassette_key(params))
+        self._cassette.record(params, response.choices[0].message.content,
+                              (time.perf_counter() - start) * 1000, _usage(response))
+        return response
+
+
+class RecordingClient:
+    """Groq-compatible client that records every completion of `inner` to a cassette"""
+
+    def __init__(self, inner, cassette, asynchronous=False):
+        self.cassette = cassette
+        completions = _AsyncRecordingCompletions if asynchronous else _RecordingCompletions
+        self.chat = SimpleNamespace(completions=completions(inner, cassette))
+
+
+class _ReplayCompletions:
+    def __init__(self, cassette, latency_scale):
+        self._cassette = cassette
+        self._latency_scale = latency_scale
+
+    def _entry(self, params):
+        entry = self._cassette.lookup(params)
+        return entry, entry['latency_ms'] / 1000 * self._latency_scale
+
+    def create(self, **params):
+        entry, delay = self._entry(params)
+        time.sleep(delay)
+        if params.get('stream'):
+            return _stream_chunks(entry['response_text'])
+        return _message_response(entry['response_text'], entry.get('usage'))
+
+
+class _AsyncReplayCompletions(_ReplayCompletions):
+    async def create(self, **params):
+        import asyncio  # Imported here: the agent imports this module for CassetteMiss, and asyncio costs ~50ms at startup
+        entry, delay = self._entry(params)
+        await asyncio.sleep(delay)
+        return _message_response(entry['response_text'], entry.get('usage'))
+
+
+class ReplayClient:
+    """Groq-compatible client serving recorded responses (latency scaled by `latency_scale`)"""
+
+    def __init__(self, cassette, latency_scale=1.0, asynchronous=False):
+        self.cassette = cassette
+        completions = _AsyncReplayCompletions if asynchronous else _ReplayCompletions
+        self.chat = SimpleNamespace(completions=completions(cassette, latency_scale))
+
+
+def check(path):
+    """Run the agent's response parser over every recorded response"""
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    cassette = Cassette(path)
+    failures = 0
+    for entry in cassette.entries():
+        try:
+            agent._parse_analysis(entry['response_text'])
+        except Exception as e:
+            failures += 1
+            print(f"{entry['key'][:12]} ({entry['recorded_at']}): {e}")
+            print(f"    {entry['response_text'][:200]!r}")
+    latencies = sorted(e['latency_ms'] for e in cassette.entries())
+    print(f"{len(cassette)} recorded responses, {failures} failed to parse")
+    if latencies:
+        print(f"latency p50 {latencies[len(latencies) // 2]} ms, max {latencies[-1]} ms")
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect LLM cassettes')
+    parser.add_argument('command', choices=['check'])
+    parser.add_argument('path')
+    args = parser.parse_args()
+    raise SystemExit(1 if check(args.path) else 0)
@@ -0,0 +1,331 @@
+"""Load test for the healing-agent HTTP API.
+
+By default the API is started in-process with the offline LLM stand-in
+(offline_llm.py), so runs need no network or API key and are repeatable.
+The test seeds tickets through /api/generate-tickets, then for --duration
+seconds runs:
+
+  - --clients dashboard clients polling /api/tickets and /api/audit-log
+  - --analyzers workers posting /api/analyze
+  - one worker posting /api/process-all, feeding pending approvals to
+  - --approvers workers posting /api/approve
+
+Latency percentiles, throughput and error rates per endpoint are printed
+and written to a JSON results file (data/loadtest/ by default).
+
+    python loadtest.py --clients 20 --duration 30 --llm-latency 0.5
+    python loadtest.py --url http://localhost:5000   # an already running server
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv('HEALING_AGENT_DATA_DIR') or os.path.join(BASE_DIR, "data")
+# Files the API writes to; restored after an in-process run
+DATA_FILES = ('tickets.json', 'decisions.json', 'audit_log.json', 'audit_rollups.json', 'fingerprints.json',
+              'escalations.json', 'run_checkpoint.json', 'reanalysis_queue.json', 'outbox.jsonl')
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency and status collection"""
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status, error=None):
+        with self._lock:
+            stats = self._samples.setdefault(endpoint, {'latencies': [], 'statuses': {}, 'errors': 0, 'messages': {}})
+            stats['latencies'].append(seconds)
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+            if error:
+                stats['errors'] += 1
+                stats['messages'][error] = stats['messages'].get(error, 0) + 1
+
+    def report(self, elapsed):
+        with self._lock:
+            report = {}
+            for endpoint, stats in sorted(self._samples.items()):
+                latencies = sorted(stats['latencies'])
+                count = len(latencies)
+                report[endpoint] = {
+                    'requests': count,
+                    'throughput_rps': round(count / elapsed, 2) if elapsed else 0,
+                    'error_rate': round(stats['errors'] / count, 4) if count else 0,
+                    'statuses': stats['statuses'],
+                    'latency_ms': {
+                        'mean': round(sum(latencies) / count * 1000, 1) if count else None,
+                        **{f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 90, 95, 99)},
+                        'max': round(latencies[-1] * 1000, 1) if count else None
+                    },
+                    'top_errors': dict(sorted(stats['messages'].items(), key=lambda kv: -kv[1])[:5])
+                }
+            return report
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p * len(sorted_values) / 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class ApiClient:
+    def __init__(self, base_url, recorder, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+
+    def call(self, method, path, body=None, endpoint=None):
+        """Send a request and record it under `endpoint`; returns (status, parsed body or None)"""
+        endpoint = endpoint or f"{method} /api{path.split('?')[0]}"
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path, data=data, method=method,
+            headers={'Content-Type': 'application/json', 'Accept-Encoding': 'identity'}
+        )
+        start = time.perf_counter()
+        status, payload, error = None, None, None
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                status = response.status
+                payload = json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            status = e.code
+            try:
+                payload = json.loads(e.read() or b'null')
+            except ValueError:
+                payload = None
+            error = f"HTTP {e.code}: {(payload or {}).get('error', e.reason)}"
+        except Exception as e:
+            status = 'exception'
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.record(endpoint, time.perf_counter() - start, status, error)
+        return status, payload
+
+
+def start_in_process_server(args):
+    """Run the Flask app on a free local port with the offline LLM; returns (base_url, server)"""
+    os.environ['LLM_BACKEND'] = 'offline'
+    os.environ['OFFLINE_LLM_LATENCY'] = str(args.llm_latency)
+    os.environ['OFFLINE_LLM_JITTER'] = str(args.llm_jitter)
+    os.environ['OFFLINE_LLM_ERROR_RATE'] = str(args.llm_error_rate)
+    os.environ['OFFLINE_LLM_TAIL_RATE'] = str(args.llm_tail_rate)
+    os.environ['OFFLINE_LLM_SEED'] = str(args.seed)
+    random.seed(args.seed)  # ticket generation
+
+    sys.path.insert(0, os.path.join(BASE_DIR, 'backend'))
+    import logging
+    from werkzeug.serving import make_server
+    import app as backend_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, backend_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/api", server
+
+
+def snapshot_data():
+    backup_dir = tempfile.mkdtemp(prefix='loadtest-data-')
+    for name in DATA_FILES:
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            shutil.copy2(path, os.path.join(backup_dir, name))
+    return backup_dir
+
+
+def restore_data(backup_dir):
+    for name in DATA_FILES:
+        saved = os.path.join(backup_dir, name)
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(saved):
+            shutil.copy2(saved, path)
+        elif os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+def run_load(args, base_url):
+    recorder = LatencyRecorder()
+    client = ApiClient(base_url, recorder)
+    rng = random.Random(args.seed)
+
+    # Seed tickets and the pattern summary the analyze calls need
+    status, body = client.call('POST', '/generate-tickets', {'count': args.tickets}, endpoint='seed /api/generate-tickets')
+    if status != 200:
+        raise SystemExit(f"Seeding tickets failed: {status} {body}")
+    tickets = body['data']
+    _, body = client.call('POST', '/observe', endpoint='seed /api/observe')
+    patterns = body['data']
+
+    stop = threading.Event()
+    pending = queue.Queue()
+    analyze_path = '/analyze?async=1' if args.async_analyze else '/analyze'
+
+    def dashboard_client():
+        while not stop.is_set():
+            client.call('GET', '/tickets')
+            client.call('GET', '/audit-log')
+            stop.wait(args.poll_interval)
+
+    def analyzer(worker_rng):
+        while not stop.is_set():
+            ticket = worker_rng.choice(tickets)
+            submitted = time.perf_counter()
+            status, body = client.call('POST', analyze_path, {'ticket': ticket, 'patterns': patterns},
+                                       endpoint='POST /api/analyze')
+            if status == 202:
+                # Like a client would: poll the job, and record submit-to-result latency
+                job = {'status': 'queued'}
+                while job['status'] in ('queued', 'running'):
+                    time.sleep(args.job_poll_interval)
+                    job_status, job_body = client.call('GET', body['status_url'][len('/api'):],
+                                                       endpoint='GET /api/jobs/<id>')
+                    if job_status != 200:
+                        break
+                    job = job_body['data']
+                recorder.record('job analyze (submit to result)', time.perf_counter() - submitted,
+                                job['status'], None if job['status'] == 'succeeded' else job.get('error') or job['status'])
+            stop.wait(args.analyze_interval)
+
+    def process_all():
+        queued = set()
+        while not stop.is_set():
+            status, body = client.call('POST', '/process-all', {'force': args.force})
+            if status == 200:
+                for result in body['data']:
+                    ticket_id = result['ticket']['ticket_id']
+                    # Unchanged tickets come back with their earlier (maybe already approved) status
+                    if result['action_result'].get('status') == 'pending_approval' and ticket_id not in queued:
+                        queued.add(ticket_id)
+                        pending.put(ticket_id)
+            stop.wait(args.process_all_interval)
+
+    def approver():
+        while not stop.is_set():
+            try:
+                ticket_id = pending.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            client.call('POST', '/approve', {'ticket_id': ticket_id})
+
+    threads = [threading.Thread(target=dashboard_client, daemon=True) for _ in range(args.clients)]
+    threads += [
+        threading.Thread(target=analyzer, args=(random.Random(rng.random()),), daemon=True)
+        for _ in range(args.analyzers)
+    ]
+    if args.process_all:
+        threads.append(threading.Thread(target=process_all, daemon=True))
+        threads += [threading.Thread(target=approver, daemon=True) for _ in range(args.approvers)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=args.drain_timeout)
+    elapsed = time.perf_counter() - started
+
+    return recorder.report(elapsed), elapsed
+
+
+def print_report(report):
+    header = f"{'endpoint':<34}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print("\n" + header)
+    print('-' * len(header))
+    for endpoint, stats in report.items():
+        ms = stats['latency_ms']
+        print(f"{endpoint:<34}{stats['requests']:>7}{stats['throughput_rps']:>8}"
+              f"{stats['error_rate'] * 100:>6.1f}%{ms['p50']:>9}{ms['p95']:>9}{ms['p99']:>9}{ms['max']:>9}")
+    print("(latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the healing-agent API")
+    parser.add_argument('--url', help="Base API URL of a running server (default: start one in-process)")
+    parser.add_argument('--clients', type=int, default=10, help="Dashboard clients polling tickets and audit log")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between a client's polls")
+    parser.add_argument('--analyzers', type=int, default=3, help="Workers posting /api/analyze")
+    parser.add_argument('--analyze-interval', type=float, default=0.0, help="Pause between an analyzer's requests")
+    parser.add_argument('--async-analyze', action='store_true', help="Use the 202 async mode for /api/analyze")
+    parser.add_argument('--job-poll-interval', type=float, default=0.05, help="Seconds between async job polls")
+    parser.add_argument('--no-process-all', dest='process_all', action='store_false',
+                        help="Skip the /api/process-all and /api/approve traffic")
+    parser.add_argument('--process-all-interval', type=float, default=2.0, help="Pause between process-all runs")
+    parser.add_argument('--force', action='store_true', help="Re-analyze unchanged tickets on every process-all")
+    parser.add_argument('--approvers', type=int, default=2, help="Workers approving pending actions")
+    parser.add_argument('--tickets', type=int, default=20, help="Tickets to seed")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds of load")
+    parser.add_argument('--drain-timeout', type=float, default=60, help="Seconds to wait for in-flight requests")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="Offline LLM mean latency (in-process only)")
+    parser.add_argument('--llm-jitter', type=float, default=0.2, help="Offline LLM latency jitter (in-process only)")
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help="Offline LLM failure rate (in-process only)")
+    parser.add_argument('--llm-tail-rate', type=float, default=0.0, help="Fraction of offline LLM calls 10x slower (in-process only)")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for ticket choice and the offline LLM")
+    parser.add_argument('--verbose', action='store_true', help="Show the in-process server's logging")
+    parser.add_argument('--keep-data', action='store_true', help="Keep the data files written during an in-process run")
+    parser.add_argument('--output', help="Results file (default: data/loadtest/loadtest-<timestamp>.json)")
+    args = parser.parse_args()
+
+    server = backup_dir = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        if not base_url.endswith('/api'):
+            base_url += '/api'
+        print("Note: the target server's tickets, decisions and audit log will be modified")
+    else:
+        if not args.keep_data:
+            backup_dir = snapshot_data()
+        base_url, server = start_in_process_server(args)
+
+    print(f"Load test: {args.clients} dashboard clients, {args.analyzers} analyzers, "
+          f"{args.approvers if args.process_all else 0} approvers for {args.duration}s against {base_url}")
+    started_at = datetime.now()
+    try:
+        if server is not None and not args.verbose:
+            # Keep the in-process server's per-ticket logging out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                report, elapsed = run_load(args, base_url)
+        else:
+            report, elapsed = run_load(args, base_url)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if backup_dir is not None:
+            restore_data(backup_dir)
+
+    print_report(report)
+
+    output = args.output or os.path.join(
+        DATA_DIR, "loadtest", f"loadtest-{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'started_at': started_at.isoformat(),
+            'target': args.url or 'in-process (offline LLM)',
+            'config': vars(args),
+            'elapsed_s': round(elapsed, 2),
+            'endpoints': report
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import threading
+from collections import Counter, deque
+
+ROOT_CAUSES = ('webhook_configuration', 'platform_bug', 'migration_issue', 'documentation_gap')
+PRIORITIES = ('low', 'medium', 'high', 'critical')
+
+
+def schema_errors(analysis):
+    """Problems that make an analysis unusable without a second opinion (empty list if valid)"""
+    errors = []
+    if not isinstance(analysis, dict):
+        return ['analysis is not an object']
+    if analysis.get('root_cause') not in ROOT_CAUSES:
+        errors.append(f"root_cause {analysis.get('root_cause')!r} is not one of the four options")
+    confidence = analysis.get('confidence')
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 100:
+        errors.append(f"confidence {confidence!r} is not a number from 0 to 100")
+    if not isinstance(analysis.get('is_pattern'), bool):
+        errors.append("is_pattern is not a boolean")
+    if str(analysis.get('recommended_priority', '')).lower() not in PRIORITIES:
+        errors.append(f"recommended_priority {analysis.get('recommended_priority')!r} is not low/medium/high/critical")
+    return errors
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 1)
+
+
+class ModelCascade:
+    """Routing policy and stats for a two-tier (fast model, then large model) REASON call.
+
+    The fast model answers first. Its analysis is accepted when it passes the
+    schema check, reaches `min_confidence`, is not a critical call and the
+    ticket is not part of a measured pattern (the caller passes that in from
+    its own merchant counts; the fast model's is_pattern is not trusted);
+    otherwise the large model is asked and its answer is used.
+    Critical-severity tickets skip the fast tier. A fraction (`audit_rate`)
+    of accepted fast answers is also sent to the large model so disagreement
+    can be measured on the answers the cascade keeps, not just the ones it
+    escalates.
+    """
+
+    def __init__(self, fast_model, large_model, min_confidence=80, escalate_patterns=True,
+                 escalate_critical=True, audit_rate=0.0, window=500):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.min_confidence = min_confidence
+        self.escalate_patterns = escalate_patterns
+        self.escalate_critical = escalate_critical
+        self.audit_rate = audit_rate
+        self._lock = threading.Lock()
+        self._latency = {'fast': deque(maxlen=window), 'large': deque(maxlen=window)}
+        self._counts = Counter()
+        self._escalation_reasons = Counter()
+        self._audit_debt = 0.0
+
+    @classmethod
+    def from_env(cls, large_model):
+        return cls(
+            fast_model=os.getenv('LLM_FAST_MODEL', 'llama-3.1-8b-instant'),
+            large_model=large_model,
+            min_confidence=float(os.getenv('CASCADE_MIN_CONFIDENCE', '80')),
+            escalate_patterns=os.getenv('CASCADE_ESCALATE_PATTERNS', '1').lower() in ('1', 'true', 'yes'),
+            escalate_critical=os.getenv('CASCADE_ESCALATE_CRITICAL', '1').lower() in ('1', 'true', 'yes'),
+            audit_rate=float(os.getenv('CASCADE_AUDIT_RATE', '0'))
+        )
+
+    def skip_fast_tier(self, ticket):
+        """Critical tickets go straight to the large model"""
+        if self.escalate_critical and ticket.get('severity') == 'critical':
+            with self._lock:
+                self._counts['direct'] += 1
+                self._escalation_reasons['critical_ticket'] += 1
+            return True
+        return False
+
+    def escalation_reasons(self, analysis, parse_error=None, is_pattern=False):
+        """Why a fast-tier answer cannot be accepted (empty list to accept it).
+
+        `is_pattern` is the measured verdict for the ticket, not the answer's.
+        """
+        if parse_error is not None:
+            return ['unparseable']
+        if schema_errors(analysis):
+            return ['invalid_schema']
+        reasons = []
+        if analysis['confidence'] < self.min_confidence:
+            reasons.append('low_confidence')
+        if self.escalate_patterns and is_pattern:
+            reasons.append('pattern')
+        if self.escalate_critical and str(analysis['recommended_priority']).lower() == 'critical':
+            reasons.append('critical_priority')
+        return reasons
+
+    def should_audit(self):
+        """Whether this accepted fast answer should also be checked by the large model"""
+        with self._lock:
+            self._audit_debt += self.audit_rate
+            if self._audit_debt >= 1:
+                self._audit_debt -= 1
+                return True
+            return False
+
+    def record_call(self, tier, latency_ms, ok=True):
+        with self._lock:
+            self._latency[tier].append(latency_ms)
+            self._counts[f'{tier}_calls'] += 1
+            if not ok:
+                self._counts[f'{tier}_errors'] += 1
+
+    def record_outcome(self, reasons):
+        with self._lock:
+            if reasons:
+                self._counts['escalated'] += 1
+                self._escalation_reasons.update(reasons)
+            else:
+                self._counts['accepted'] += 1
+
+    def record_comparison(self, fast, large, accepted):
+        """Compare a fast-tier answer with the large model's answer for the same prompt"""
+        if schema_errors(fast) or schema_errors(large):
+            return
+        prefix = 'audited' if accepted else 'escalated'
+        with self._lock:
+            self._counts[f'{prefix}_compared'] += 1
+            if fast['root_cause'] != large['root_cause']:
+                self._counts[f'{prefix}_root_cause_disagreements'] += 1
+            if fast['is_pattern'] != large['is_pattern']:
+                self._counts[f'{prefix}_pattern_disagreements'] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            reasons = dict(self._escalation_reasons)
+            latency = {tier: list(values) for tier, values in self._latency.items()}
+
+        decided = counts.get('accepted', 0) + counts.get('escalated', 0)
+
+        def _rate(numerator, denominator):
+            return round(numerator / denominator, 3) if denominator else None
+
+        def _disagreement(prefix):
+            compared = counts.get(f'{prefix}_compared', 0)
+            return {
+                'compared': compared,
+                'root_cause_rate': _rate(counts.get(f'{prefix}_root_cause_disagreements', 0), compared),
+                'is_pattern_rate': _rate(counts.get(f'{prefix}_pattern_disagreements', 0), compared)
+            }
+
+        return {
+            'fast_model': self.fast_model,
+            'large_model': self.large_model,
+            'thresholds': {
+                'min_confidence': self.min_confidence,
+                'escalate_patterns': self.escalate_patterns,
+                'escalate_critical': self.escalate_critical,
+                'audit_rate': self.audit_rate
+            },
+            'tiers': {
+                tier: {
+                    'calls': counts.get(f'{tier}_calls', 0),
+                    'errors': counts.get(f'{tier}_errors', 0),
+                    'p50_ms': _percentile(values, 50),
+                    'p95_ms': _percentile(values, 95)
+                }
+                for tier, values in latency.items()
+            },
+            'fast_answers': decided,
+            'accepted': counts.get('accepted', 0),
+            'escalated': counts.get('escalated', 0),
+            'direct_to_large': counts.get('direct', 0),
+            'acceptance_rate': _rate(counts.get('accepted', 0), decided),
+            'escalation_reasons': reasons,
+            # Escalated: fast vs large answers that were escalated anyway.
+            # Audited: a sample of accepted fast answers re-checked by the large model.
+            'disagreement': {
+                'escalated': _disagreement('escalated'),
+                'audited': _disagreement('audited')
+            }
+        }
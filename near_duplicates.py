@@ -0,0 +1,210 @@
+import hashlib
+import re
+import threading
+
+# Words that carry no signal about the underlying issue
+_STOPWORDS = frozenset(
+    'a an the is are was to of and or on in for my our i we it this that with '
+    'after not be has have can t s as at by from'.split()
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _hash64(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def shingles(text):
+    """Set of normalized word tokens for a ticket's text"""
+    words = re.findall(r'[a-z0-9_.]+', text.lower())
+    return frozenset(w for w in words if w not in _STOPWORDS)
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index that groups near-duplicate tickets into clusters.
+
+    Each inserted ticket is MinHashed and bucketed per LSH band, so finding
+    candidates costs a few bucket lookups instead of a scan over every
+    ticket. Candidates are confirmed with the exact Jaccard similarity of
+    their token sets, and confirmed pairs are merged into clusters
+    (union-find) that track their tickets and merchants incrementally.
+    Union-find cannot split a cluster, so sync() rebuilds the index when a
+    ticket was removed or changed, and otherwise only inserts new ones.
+    """
+
+    def __init__(self, num_perm=64, bands=32, threshold=0.18):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        # Deterministic permutations so signatures are stable across processes
+        self._perms = [
+            (_hash64(f"a{i}") % (_MERSENNE_PRIME - 1) + 1, _hash64(f"b{i}") % _MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+        self._buckets = [{} for _ in range(bands)]
+        self._shingles = {}   # key -> token set
+        self._parent = {}     # union-find parent
+        self._members = {}    # root -> set of keys
+        self._merchants = {}  # root -> set of merchant ids
+        self._merchant_of = {}  # key -> merchant id
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def __contains__(self, key):
+        return key in self._shingles
+
+    @staticmethod
+    def ticket_text(ticket):
+        return ' '.join(str(ticket.get(field, '')) for field in ('issue', 'merchant_message', 'error_log'))
+
+    def _signature(self, tokens):
+        hashes = [_hash64(t) for t in tokens] or [0]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[i * rows:(i + 1) * rows]) for i in range(self.bands)]
+
+    def _find(self, key):
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[key] != root:  # path compression
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return
+        if len(self._members[ra]) < len(self._members[rb]):
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        self._members[ra] |= self._members.pop(rb)
+        self._merchants[ra] |= self._merchants.pop(rb)
+
+    def _insert(self, key, tokens, merchant_id):
+        band_keys = self._band_keys(self._signature(tokens))
+
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        self._shingles[key] = tokens
+        self._merchant_of[key] = merchant_id
+        self._parent[key] = key
+        self._members[key] = {key}
+        self._merchants[key] = {merchant_id} if merchant_id else set()
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+        for other in candidates:
+            if jaccard(tokens, self._shingles[other]) >= self.threshold:
+                self._union(key, other)
+
+    def insert(self, key, text, merchant_id=None):
+        """Add an item; re-inserting a known key is a no-op"""
+        with self._lock:
+            if key in self._shingles:
+                return
+            self._insert(key, shingles(text), merchant_id)
+
+    def insert_ticket(self, ticket):
+        self.insert(ticket['ticket_id'], self.ticket_text(ticket), ticket.get('merchant_id'))
+
+    def sync(self, items):
+        """Make the index hold exactly `items`, given as (key, text, merchant_id)"""
+        wanted = {key: (shingles(text), merchant_id) for key, text, merchant_id in items}
+        with self._lock:
+            stale = any(
+                key not in wanted or wanted[key] != (tokens, self._merchant_of[key])
+                for key, tokens in self._shingles.items()
+            )
+            if stale:
+                self._buckets = [{} for _ in range(self.bands)]
+                self._shingles, self._merchant_of = {}, {}
+                self._parent, self._members, self._merchants = {}, {}, {}
+            for key, (tokens, merchant_id) in wanted.items():
+                if key not in self._shingles:
+                    self._insert(key, tokens, merchant_id)
+
+    def sync_tickets(self, tickets):
+        self.sync((t['ticket_id'], self.ticket_text(t), t.get('merchant_id')) for t in tickets)
+
+    def query(self, text, limit=5):
+        """Most similar indexed keys for a text, as [(key, similarity)]"""
+        tokens = shingles(text)
+        band_keys = self._band_keys(self._signature(tokens))
+        with self._lock:
+            candidates = set()
+            for band, band_key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            scored = [(key, jaccard(tokens, self._shingles[key])) for key in candidates]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def cluster(self, key):
+        """Cluster evidence for an indexed key"""
+        with self._lock:
+            root = self._find(key)
+            members = self._members[root]
+            merchants = self._merchants[root]
+            return {
+                'cluster_id': root,
+                'size': len(members),
+                'ticket_ids': sorted(members),
+                'merchants': sorted(merchants),
+                'merchant_count': len(merchants)
+            }
+
+    def probe_ticket(self, ticket):
+        """Cluster evidence for a ticket as if it were inserted, without inserting it.
+
+        An indexed ticket gets its cluster. Otherwise the clusters of its
+        near-duplicates (same LSH candidates and Jaccard threshold as an
+        insert) are combined with the ticket itself.
+        """
+        key = ticket['ticket_id']
+        if key in self._shingles:
+            return self.cluster(key)
+        tokens = shingles(self.ticket_text(ticket))
+        band_keys = self._band_keys(self._signature(tokens))
+        members, merchants = {key}, set()
+        if ticket.get('merchant_id'):
+            merchants.add(ticket['merchant_id'])
+        with self._lock:
+            candidates = set()
+            for band, band_key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            roots = {self._find(other) for other in candidates if jaccard(tokens, self._shingles[other]) >= self.threshold}
+            for root in roots:
+                members |= self._members[root]
+                merchants |= self._merchants[root]
+        return {
+            'cluster_id': None,
+            'size': len(members),
+            'ticket_ids': sorted(members),
+            'merchants': sorted(merchants),
+            'merchant_count': len(merchants)
+        }
+
+    def clusters(self, min_size=2):
+        """All clusters with at least `min_size` members, largest first"""
+        with self._lock:
+            roots = [r for r, m in self._members.items() if len(m) >= min_size]
+        result = [self.cluster(root) for root in roots]
+        result.sort(key=lambda c: c['size'], reverse=True)
+        return result
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# Canned analyses per error signature, roughly what the real model answers
+_CANNED = {
+    'WebhookTimeout': ('webhook_configuration', 88, 'high'),
+    '404 Not Found': ('documentation_gap', 76, 'medium'),
+    '401 Unauthorized': ('migration_issue', 71, 'high'),
+    'ShippingError': ('migration_issue', 73, 'medium'),
+    'SessionError': ('platform_bug', 68, 'critical'),
+    'InventorySyncError': ('webhook_configuration', 81, 'high'),
+    'PaymentGatewayError': ('platform_bug', 79, 'critical')
+}
+_DEFAULT = ('migration_issue', 50, 'medium')
+
+# Small models (cascade fast tier) answer faster and less confidently
+_SMALL_MODEL_MARKERS = ('8b', 'instant', 'mini')
+_SMALL_MODEL_LATENCY = 0.25
+
+
+def _is_small(model):
+    return any(marker in (model or '').lower() for marker in _SMALL_MODEL_MARKERS)
+
+
+class OfflineLLMError(Exception):
+    """Injected failure, standing in for a provider error"""
+
+
+def _message(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class _OfflineCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, messages, model=None, stream=False, timeout=None, **kwargs):
+        owner = self._owner
+        content = owner.respond(messages, model)
+        delay = owner.next_delay(model)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Offline LLM request timed out after {timeout:.1f}s")
+        time.sleep(delay)
+        owner.maybe_fail()
+        if stream:
+            return (_chunk(content[i:i + 16]) for i in range(0, len(content), 16))
+        return _message(content)
+
+
+class _AsyncOfflineCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, messages, model=None, **kwargs):
+        owner = self._owner
+        content = owner.respond(messages, model)
+        await asyncio.sleep(owner.next_delay(model))
+        owner.maybe_fail()
+        return _message(content)
+
+
+class OfflineLLMClient:
+    """Groq-compatible stand-in that answers without network access.
+
+    Responses are deterministic per prompt (and model): the analysis is chosen
+    from the ticket's error signature, small models answer faster with lower
+    confidence. Latency (`latency` +/- `jitter` seconds) and an
+    `error_rate` of injected failures are drawn from a seeded RNG, so load
+    tests are repeatable. A `tail_rate` fraction of calls is `tail_factor`
+    times slower. Enabled in the agent with LLM_BACKEND=offline.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, error_rate=0.0, seed=0, tail_rate=0.0, tail_factor=10.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_OfflineCompletions(self))
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=float(os.getenv('OFFLINE_LLM_LATENCY', '0.5')),
+            jitter=float(os.getenv('OFFLINE_LLM_JITTER', '0.2')),
+            error_rate=float(os.getenv('OFFLINE_LLM_ERROR_RATE', '0')),
+            seed=int(os.getenv('OFFLINE_LLM_SEED', '0')),
+            tail_rate=float(os.getenv('OFFLINE_LLM_TAIL_RATE', '0')),
+            tail_factor=float(os.getenv('OFFLINE_LLM_TAIL_FACTOR', '10'))
+        )
+
+    def next_delay(self, model=None):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            if self.tail_rate and self._rng.random() < self.tail_rate:
+                delay *= self.tail_factor  # a straggler, like the provider's slow tail
+        return delay * _SMALL_MODEL_LATENCY if _is_small(model) else delay
+
+    def maybe_fail(self):
+        with self._lock:
+            failed = self.error_rate and self._rng.random() < self.error_rate
+        if failed:
+            raise OfflineLLMError("Offline LLM injected failure")
+
+    def respond(self, messages, model=None):
+        prompt = messages[-1]['content']
+        match = re.search(r'Error Log: ([^:\n]+)', prompt)
+        signature = match.group(1).strip() if match else ''
+        root_cause, confidence, priority = _CANNED.get(signature, _DEFAULT)
+        merchants = re.search(r'Distinct merchants affected: (\d+)', prompt)
+        affected = int(merchants.group(1)) if merchants else 1
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        if _is_small(model):
+            confidence -= int(digest, 16) % 25
+        return json.dumps({
+            'root_cause': root_cause,
+            'confidence': confidence,
+            'is_pattern': affected >= 3,
+            'recommended_priority': priority,
+            'root_cause_explanation': f"Offline analysis for {signature or 'unknown error'} ({digest}).",
+            'pattern_details': f"{affected} merchants share this error" if affected >= 3 else "",
+            'assumptions': ["offline stand-in response"]
+        })
+
+
+class AsyncOfflineLLMClient(OfflineLLMClient):
+    """AsyncGroq-compatible variant of OfflineLLMClient"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chat = SimpleNamespace(completions=_AsyncOfflineCompletions(self))
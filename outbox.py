@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+# Where each ACT action is delivered
+ACTION_DESTINATIONS = {
+    'send_webhook_configuration_guide': 'email',
+    'update_migration_documentation': 'docs',
+    'immediate_support_escalation': 'pager',
+    'escalate_to_engineering': 'jira',
+    'assign_to_support_team': 'support_queue'
+}
+
+
+class LocalSink:
+    """Stand-in for a real destination: appends delivered items to a JSONL file.
+
+    Deliveries are idempotent per key, like the real APIs are expected to be,
+    so a batch retried after a partial failure is not written twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._seen.add(json.loads(line)['idempotency_key'])
+
+    def deliver(self, entries):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for entry in entries:
+                    if entry['idempotency_key'] in self._seen:
+                        continue
+                    f.write(json.dumps({
+                        'idempotency_key': entry['idempotency_key'],
+                        'delivered_at': datetime.now().isoformat(),
+                        'payload': entry['payload']
+                    }, default=str) + '\n')
+                    self._seen.add(entry['idempotency_key'])
+
+
+def local_sinks(sink_dir):
+    """One LocalSink per destination, writing to <sink_dir>/<destination>.jsonl"""
+    return {
+        destination: LocalSink(os.path.join(sink_dir, f"{destination}.jsonl"))
+        for destination in set(ACTION_DESTINATIONS.values())
+    }
+
+
+class Outbox:
+    """Durable outbox for ACT side effects.
+
+    enqueue() journals the intended action and returns immediately. A
+    dispatcher thread hands due entries to a worker pool in per-destination
+    batches (one batch in flight per destination) and retries failures with
+    exponential backoff. Entries are keyed by an idempotency key, so
+    re-enqueuing the same action is a no-op. The journal is an append-only
+    JSONL file replayed on start, so undelivered entries survive restarts.
+    `on_settled(entries)` is called with entries that were just delivered or
+    marked dead.
+
+    Delivered entries leave the live map once settled: only the last
+    `keep_delivered` stay readable (get/entries, and as duplicates of their
+    key), and the journal drops them when it is compacted, on start or once
+    it holds `compact_after` lines beyond twice the live entries. A key
+    re-enqueued after that is delivered again; the sinks are idempotent
+    per key, so it is not written twice.
+    """
+
+    def __init__(self, journal_path, sinks, workers=4, batch_size=20, max_attempts=5, base_delay=0.5,
+                 on_settled=None, keep_delivered=1000, compact_after=1000):
+        self.journal_path = journal_path
+        self.sinks = sinks
+        self.on_settled = on_settled
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.keep_delivered = keep_delivered
+        self.compact_after = compact_after
+
+        self._entries = {}        # id -> entry (pending or dead)
+        self._by_key = {}         # idempotency key -> id
+        self._delivered = OrderedDict()  # id -> entry, the most recently delivered
+        self._delivered_counts = Counter()  # destination -> deliveries since start
+        self._journal_lines = 0
+        self._in_flight = set()   # destinations with a batch being delivered
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._dispatcher = None
+        self._pool = None
+        self._replay()
+
+    # -- journal ----------------------------------------------------------
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        lines = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                lines += 1
+                record = json.loads(line)
+                if record['op'] == 'enqueue':
+                    entry = record['entry']
+                    self._entries[entry['id']] = entry
+                    self._by_key[entry['idempotency_key']] = entry['id']
+                elif record['id'] in self._entries:
+                    self._entries[record['id']].update(record['changes'])
+        for entry in [e for e in self._entries.values() if e['state'] == 'delivered']:
+            del self._entries[entry['id']]
+            del self._by_key[entry['idempotency_key']]
+        self._journal_lines = lines
+        if lines > 2 * len(self._entries):
+            self._rewrite_journal()
+
+    def _rewrite_journal(self):
+        """Collapse the journal to one line per entry"""
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps({'op': 'enqueue', 'entry': entry}, default=str) + '\n')
+        os.replace(tmp_path, self.journal_path)
+        self._journal_lines = len(self._entries)
+
+    def _append(self, records):
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += len(records)
+
+    def _retire_delivered(self, entries):
+        """Move delivered entries out of the live map, compacting the journal when it has grown"""
+        for entry in entries:
+            self._entries.pop(entry['id'], None)
+            self._delivered[entry['id']] = entry
+            self._delivered_counts[entry['destination']] += 1
+        while len(self._delivered) > self.keep_delivered:
+            _, old = self._delivered.popitem(last=False)
+            if self._by_key.get(old['idempotency_key']) == old['id']:
+                del self._by_key[old['idempotency_key']]
+        if self._journal_lines > 2 * len(self._entries) + self.compact_after:
+            self._rewrite_journal()
+
+    def _update(self, entries, **changes):
+        for entry in entries:
+            entry.update(changes)
+        self._append([{'op': 'update', 'id': e['id'], 'changes': changes} for e in entries])
+
+    # -- producer side ----------------------------------------------------
+
+    def enqueue(self, destination, payload, idempotency_key):
+        """Record an intended action; returns its outbox entry (existing one for a known key)"""
+        if destination not in self.sinks:
+            raise ValueError(f"Unknown outbox destination '{destination}'")
+        with self._cond:
+            existing = self._by_key.get(idempotency_key)
+            if existing is not None:
+                return dict(self._entries.get(existing) or self._delivered[existing], duplicate=True)
+
+            entry = {
+                'id': uuid.uuid4().hex,
+                'destination': destination,
+                'idempotency_key': idempotency_key,
+                'payload': payload,
+                'state': 'pending',
+                'attempts': 0,
+                'next_attempt_at': 0,
+                'created_at': datetime.now().isoformat(),
+                'last_error': None
+            }
+            self._append([{'op': 'enqueue', 'entry': entry}])
+            self._entries[entry['id']] = entry
+            self._by_key[idempotency_key] = entry['id']
+            self._cond.notify()
+            return dict(entry)
+
+    # -- dispatcher -------------------------------------------------------
+
+    def start(self):
+        if self._dispatcher is not None:
+            return self
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._stopping = False
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='outbox')
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='outbox-dispatcher', daemon=True)
+        self._dispatcher.start()
+        return self
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+            self._pool.shutdown(wait=True)
+        self._dispatcher = None
+        self._pool = None
+
+    def _due_batches(self, now):
+        batches = {}
+        for entry in self._entries.values():
+            destination = entry['destination']
+            if entry['state'] != 'pending' or destination in self._in_flight:
+                continue
+            if entry['next_attempt_at'] > now:
+                continue
+            batch = batches.setdefault(destination, [])
+            if len(batch) < self.batch_size:
+                batch.append(entry)
+        return batches
+
+    def _next_wakeup(self, now):
+        retry_times = [
+            e['next_attempt_at'] for e in self._entries.values()
+            if e['state'] == 'pending' and e['destination'] not in self._in_flight
+        ]
+        return max(0.05, min(retry_times) - now) if retry_times else None
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                batches = self._due_batches(now)
+                for destination, batch in batches.items():
+                    self._in_flight.add(destination)
+                    self._pool.submit(self._deliver, destination, batch)
+                if not batches:
+                    self._cond.wait(self._next_wakeup(now))
+
+    def _deliver(self, destination, batch):
+        error = None
+        try:
+            self.sinks[destination].deliver(batch)
+        except Exception as e:
+            error = e
+
+        settled = []
+        with self._cond:
+            if error is None:
+                self._update(batch, state='delivered', delivered_at=datetime.now().isoformat())
+                settled = batch
+                self._retire_delivered(batch)
+            else:
+                for entry in batch:
+                    attempts = entry['attempts'] + 1
+                    if attempts >= self.max_attempts:
+                        self._update([entry], state='dead', attempts=attempts, last_error=str(error))
+                        settled.append(entry)
+                    else:
+                        delay = self.base_delay * (2 ** (attempts - 1))
+                        self._update([entry], attempts=attempts, last_error=str(error),
+                                     next_attempt_at=time.time() + delay)
+            settled = [dict(entry) for entry in settled]
+            self._in_flight.discard(destination)
+            self._cond.notify_all()
+
+        if settled and self.on_settled is not None:
+            try:
+                self.on_settled(settled)
+            except Exception as e:
+                print(f"Warning: Outbox settle callback failed: {e}")
+
+    # -- inspection -------------------------------------------------------
+
+    def flush(self, timeout=10):
+        """Block until no entries are pending (or timeout); returns True if drained"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while any(e['state'] == 'pending' for e in self._entries.values()):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.1))
+        return True
+
+    def stats(self):
+        """Live entries by state and destination; 'delivered' counts deliveries since start"""
+        with self._cond:
+            by_state = {}
+            by_destination = {}
+            for entry in self._entries.values():
+                by_state[entry['state']] = by_state.get(entry['state'], 0) + 1
+                counts = by_destination.setdefault(entry['destination'], {})
+                counts[entry['state']] = counts.get(entry['state'], 0) + 1
+            for destination, delivered in self._delivered_counts.items():
+                by_state['delivered'] = by_state.get('delivered', 0) + delivered
+                by_destination.setdefault(destination, {})['delivered'] = delivered
+            return {
+                'total': len(self._entries) + sum(self._delivered_counts.values()),
+                'by_state': by_state,
+                'by_destination': by_destination,
+                'running': self._dispatcher is not None
+            }
+
+    def get(self, entry_id):
+        """A copy of one entry, or None"""
+        with self._cond:
+            entry = self._entries.get(entry_id) or self._delivered.get(entry_id)
+            return dict(entry) if entry is not None else None
+
+    def entries(self, state=None, limit=100):
+        """Live entries, then the most recently delivered ones"""
+        with self._cond:
+            selected = [
+                dict(e) for e in list(self._entries.values()) + list(self._delivered.values())
+                if state is None or e['state'] == state
+            ]
+        return selected[-limit:]
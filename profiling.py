@@ -0,0 +1,174 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Profiles kept on disk; older ones are deleted as new ones are written
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+
+# cProfile supports one active profiler per process (3.12+), so profiles don't overlap
+_active = threading.Lock()
+
+
+def default_profile_dir():
+    """<data dir>/profiles, honouring HEALING_AGENT_DATA_DIR like the agent does"""
+    return os.path.join(os.getenv('HEALING_AGENT_DATA_DIR') or os.path.join(BASE_DIR, "data"), "profiles")
+
+
+class ProfilerBusy(Exception):
+    """Raised when another profile is already being captured"""
+
+
+def _function_name(key):
+    filename, line, func = key
+    if filename == '~':  # built-in
+        return func
+    return f"{os.path.basename(filename)}:{line}({func})"
+
+
+class Profiler:
+    """Capture cProfile and tracemalloc data for a block of code.
+
+        with Profiler('process_all') as profiler:
+            ...
+        profiler.summary  # top cumulative functions, time per module, memory
+
+    Writes `<id>.prof` (pstats dump, e.g. for snakeviz) and `<id>.txt` (a
+    readable report) under data/profiles/, keeping the newest `keep` profiles.
+    cProfile only sees the thread that entered the block; work handed to
+    other threads shows up as waiting.
+    """
+
+    def __init__(self, label, profile_dir=None, top=20, memory=True, keep=None):
+        self.label = re.sub(r'[^A-Za-z0-9_.-]+', '-', label).strip('-') or 'profile'
+        self.profile_dir = profile_dir or default_profile_dir()
+        self.keep = PROFILE_KEEP if keep is None else keep
+        self.top = top
+        self.memory = memory
+        self.summary = None
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if not _active.acquire(blocking=False):
+            raise ProfilerBusy("Another profile is already being captured")
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        if self.memory:
+            tracemalloc.reset_peak()
+        self._t0 = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._profile.disable()
+        wall_ms = (time.perf_counter() - self._t0) * 1000
+        try:
+            snapshot = tracemalloc.take_snapshot() if self.memory else None
+            peak = tracemalloc.get_traced_memory()[1] if self.memory else None
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self.summary = self._write(wall_ms, snapshot, peak)
+        finally:
+            _active.release()
+        return False
+
+    def _write(self, wall_ms, snapshot, peak):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{self.label}"
+        prof_path = os.path.join(self.profile_dir, f"{profile_id}.prof")
+        report_path = os.path.join(self.profile_dir, f"{profile_id}.txt")
+
+        self._profile.dump_stats(prof_path)
+        stats = pstats.Stats(self._profile)
+
+        top_cumulative = [
+            {
+                'function': _function_name(key),
+                'calls': nc,
+                'cumulative_ms': round(ct * 1000, 2),
+                'own_ms': round(tt * 1000, 2)
+            }
+            for key, (cc, nc, tt, ct, callers) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True
+            )[:self.top]
+        ]
+
+        # Own time grouped by source file: where the time is actually spent
+        by_module = {}
+        for (filename, _, _), (cc, nc, tt, ct, callers) in stats.stats.items():
+            module = 'built-in' if filename == '~' else os.path.basename(filename)
+            by_module[module] = by_module.get(module, 0) + tt
+        own_time_by_module = [
+            {'module': module, 'own_ms': round(seconds * 1000, 2)}
+            for module, seconds in sorted(by_module.items(), key=lambda kv: kv[1], reverse=True)[:10]
+        ]
+
+        memory = None
+        top_allocations = []
+        if snapshot is not None:
+            for stat in snapshot.statistics('lineno')[:10]:
+                frame = stat.traceback[0]
+                top_allocations.append({
+                    'location': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                    'size_kb': round(stat.size / 1024, 1),
+                    'count': stat.count
+                })
+            memory = {'peak_kb': round(peak / 1024, 1), 'top_allocations': top_allocations}
+
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(f"Profile {profile_id}: {wall_ms:.1f} ms wall time\n\n")
+            buffer = io.StringIO()
+            pstats.Stats(self._profile, stream=buffer).sort_stats('cumulative').print_stats(50)
+            f.write(buffer.getvalue())
+            if snapshot is not None:
+                f.write(f"\nPeak traced memory: {peak / 1024:.1f} KiB\nTop allocations:\n")
+                for stat in snapshot.statistics('lineno')[:25]:
+                    f.write(f"  {stat}\n")
+
+        self._prune()
+        return {
+            'profile_id': profile_id,
+            'wall_ms': round(wall_ms, 1),
+            'files': {'pstats': _display_path(prof_path), 'report': _display_path(report_path)},
+            'top_cumulative': top_cumulative,
+            'own_time_by_module': own_time_by_module,
+            'memory': memory
+        }
+
+
+    def _prune(self):
+        # Profile ids start with their timestamp, so names sort oldest first
+        ids = sorted({
+            os.path.splitext(name)[0] for name in os.listdir(self.profile_dir)
+            if name.endswith(('.prof', '.txt'))
+        })
+        for profile_id in ids[:max(0, len(ids) - self.keep)]:
+            for ext in ('.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.profile_dir, profile_id + ext))
+                except FileNotFoundError:
+                    pass
+
+
+def _display_path(path):
+    """Path relative to the project directory (never an absolute server path)"""
+    relative = os.path.relpath(path, BASE_DIR)
+    return os.path.basename(path) if relative.startswith('..') else relative.replace(os.sep, '/')
+
+
+def format_summary(summary, limit=10):
+    """Short text version of a profile summary, for logs and the CLI"""
+    lines = [f"Profile {summary['profile_id']} ({summary['wall_ms']} ms) -> {summary['files']['report']}"]
+    for entry in summary['top_cumulative'][:limit]:
+        lines.append(f"  {entry['cumulative_ms']:>10.1f} ms  {entry['calls']:>7}x  {entry['function']}")
+    if summary['memory']:
+        lines.append(f"  peak memory: {summary['memory']['peak_kb']} KiB")
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\w\s]|_")
+
+
+def estimate_tokens(text):
+    """Local estimate of the prompt tokens in `text` (no tokenizer download or API call).
+
+    Approximates a BPE tokenizer such as Llama 3's: words split into ~4-character
+    pieces, numbers into groups of 3 digits, and each punctuation mark is a token.
+    Whitespace is folded into the following piece.
+    """
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif piece[0].isalpha():
+            tokens += (len(piece) + 3) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def top_counts(counts, k, keep=()):
+    """The k largest entries of a count dict, plus the `keep` keys, in their original order.
+
+    Returns (kept, other) where other is {'types': n, 'count': total} for the
+    entries left out, or None when nothing was dropped.
+    """
+    if len(counts) <= k:
+        return dict(counts), None
+    keep = {key for key in keep if key in counts}
+    ranked = sorted((key for key in counts if key not in keep), key=lambda key: counts[key], reverse=True)
+    chosen = keep | set(ranked[:max(0, k - len(keep))])
+    kept = {key: value for key, value in counts.items() if key in chosen}
+    dropped = [value for key, value in counts.items() if key not in chosen]
+    return kept, ({'types': len(dropped), 'count': sum(dropped)} if dropped else None)
+
+
+def _render(kept, other):
+    if other is None:
+        return str(kept)
+    return str({**kept, f"other ({other['types']} types)": other['count']})
+
+
+class PromptContextBuilder:
+    """Bounded SYSTEM-WIDE PATTERNS section for the REASON prompt.
+
+    `error_patterns` and `migration_stages` grow with every distinct error
+    prefix in the backlog. Each is cut to its `top_k` most frequent entries
+    (the ticket's own error type and stage are always kept) and the rest are
+    summed into an "other (N types)" bucket. If the section is still over
+    `token_budget` estimated tokens, k is lowered until it fits. Small
+    backlogs are shown unchanged. Estimated prompt tokens are recorded per
+    ticket.
+    """
+
+    def __init__(self, token_budget=250, top_k=8, window=500, recent=200):
+        self.token_budget = token_budget
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._prompt_tokens = deque(maxlen=window)
+        self._context_tokens = deque(maxlen=window)
+        self._recent = OrderedDict()   # ticket_id -> last prompt's token counts
+        self._recent_limit = recent
+        self._counts = {'prompts': 0, 'truncated': 0, 'over_budget': 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            token_budget=int(os.getenv('PROMPT_CONTEXT_TOKENS', '250')),
+            top_k=int(os.getenv('PROMPT_CONTEXT_TOP_K', '8'))
+        )
+
+    def build(self, patterns, error_type=None, migration_stage=None):
+        """(section text, info) for the pattern summary of one ticket's prompt"""
+        error_patterns = patterns['error_patterns']
+        stages = patterns['migration_stages']
+        k = self.top_k
+        while True:
+            errors, errors_other = top_counts(error_patterns, k, keep=(error_type,))
+            stage_counts, stages_other = top_counts(stages, k, keep=(migration_stage,))
+            section = f"""- Total tickets in system: {patterns['total_tickets']}
+- Error type frequency: {_render(errors, errors_other)}
+- Critical severity tickets: {patterns['critical_count']}
+- Migration stage distribution: {_render(stage_counts, stages_other)}
+- Total checkout failures across all tickets: {patterns['total_checkout_failures']}"""
+            tokens = estimate_tokens(section)
+            if tokens <= self.token_budget or k <= 0:
+                break
+            k -= 1
+        return section, {
+            'context_tokens': tokens,
+            'truncated': errors_other is not None or stages_other is not None,
+            'over_budget': tokens > self.token_budget,
+            'error_types_shown': len(errors),
+            'error_types_total': len(error_patterns)
+        }
+
+    def record(self, ticket_id, prompt_tokens, info):
+        with self._lock:
+            self._counts['prompts'] += 1
+            self._counts['truncated'] += info['truncated']
+            self._counts['over_budget'] += info['over_budget']
+            self._prompt_tokens.append(prompt_tokens)
+            self._context_tokens.append(info['context_tokens'])
+            self._recent.pop(ticket_id, None)
+            self._recent[ticket_id] = {'prompt_tokens': prompt_tokens, **info}
+            while len(self._recent) > self._recent_limit:
+                self._recent.popitem(last=False)
+
+    def tokens_for(self, ticket_id):
+        """Estimated tokens of the last prompt built for a ticket (None if none was)"""
+        with self._lock:
+            entry = self._recent.get(ticket_id)
+            return entry['prompt_tokens'] if entry else None
+
+    def stats(self):
+        with self._lock:
+            prompt_tokens = list(self._prompt_tokens)
+            context_tokens = list(self._context_tokens)
+            recent = [{'ticket_id': ticket_id, **entry} for ticket_id, entry in self._recent.items()]
+            counts = dict(self._counts)
+        return {
+            'token_budget': self.token_budget,
+            'top_k': self.top_k,
+            **counts,
+            'prompt_tokens': {
+                'p50': _percentile(prompt_tokens, 50),
+                'p95': _percentile(prompt_tokens, 95),
+                'max': max(prompt_tokens, default=None)
+            },
+            'context_tokens': {
+                'p50': _percentile(context_tokens, 50),
+                'max': max(context_tokens, default=None)
+            },
+            'recent': recent[-50:]
+        }
@@ -0,0 +1,24 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+# Never reach the Groq API from the test suite
+os.environ['LLM_BACKEND'] = 'offline'
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """A scratch data directory seeded with the sample tickets; the repo's data/ is never touched"""
+    path = tmp_path / 'data'
+    path.mkdir()
+    shutil.copy(os.path.join(ROOT, 'data', 'tickets.json'), path / 'tickets.json')
+    monkeypatch.setenv('HEALING_AGENT_DATA_DIR', str(path))
+    monkeypatch.setenv('OFFLINE_LLM_LATENCY', '0')
+    monkeypatch.setenv('OFFLINE_LLM_JITTER', '0')
+    return str(path)
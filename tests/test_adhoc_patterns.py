@@ -0,0 +1,42 @@
+from agent import HealingAgent, error_signature
+from error_index import ErrorSignatureIndex
+
+
+def adhoc_ticket(ticket, n):
+    return dict(ticket, ticket_id=f'ADHOC-{n}', merchant_id=f'M-ADHOC-{n}')
+
+
+def test_adhoc_batch_leaves_shared_indexes_alone(data_dir):
+    agent = HealingAgent()
+    tickets = agent.load_tickets()
+    signature = error_signature(tickets[0])
+    counts = agent.error_index.counts(signature)
+    clusters = agent.duplicate_index.clusters(min_size=1)
+    indexed = len(agent.duplicate_index)
+
+    batch = [adhoc_ticket(tickets[0], n) for n in range(3)]
+    patterns = agent.observe(batch)
+    assert patterns['near_duplicate_clusters'] == 1 and patterns['largest_cluster_size'] == 3
+
+    # The ad-hoc ticket is counted with its store duplicates, but never stored
+    same_error = agent.error_index.for_ticket(batch[0])
+    assert same_error['ticket_count'] == counts['ticket_count'] + 1
+    assert same_error['merchant_count'] == counts['merchant_count'] + 1
+    evidence = agent.pattern_evidence(batch[0])
+    assert 'ADHOC-0' in evidence['ticket_ids'] and tickets[0]['ticket_id'] in evidence['ticket_ids']
+    agent.decide(batch[0], {'confidence': 90, 'root_cause': 'webhook timeout'})
+
+    assert agent.error_index.counts(signature) == counts
+    assert agent.duplicate_index.clusters(min_size=1) == clusters
+    assert len(agent.duplicate_index) == indexed
+
+
+def test_for_ticket_counts_an_indexed_ticket_once():
+    index = ErrorSignatureIndex(error_signature)
+    first = {'ticket_id': 'T-1', 'merchant_id': 'M-1', 'error_log': 'WebhookTimeout: failed', 'checkout_failures': 2}
+    index.update([first, dict(first, ticket_id='T-2')])
+    assert index.for_ticket(first)['ticket_count'] == 2
+    # An edited store ticket is counted as it is now, without touching the index
+    moved = index.for_ticket(dict(first, merchant_id='M-2', checkout_failures=5))
+    assert (moved['merchant_count'], moved['checkout_failures']) == (2, 7)
+    assert index.counts(moved['signature'])['checkout_failures'] == 4
@@ -0,0 +1,44 @@
+from agent import HealingAgent
+from near_duplicates import NearDuplicateIndex
+
+TICKET = {
+    'ticket_id': 'T-NEW', 'merchant_id': 'M-1', 'issue': 'Payment processing stuck - webhook error',
+    'merchant_message': 'Webhook not responding, all transactions failing since migration.',
+    'error_log': 'WebhookTimeout: order.created webhook failed after 30s - endpoint unreachable'
+}
+ANALYSIS = {'root_cause': 'webhook_configuration', 'confidence': 92, 'is_pattern': False, 'recommended_priority': 'high'}
+
+
+def past_record(ticket_id, approved):
+    return {
+        'status': 'executed' if approved else 'pending_approval',
+        'approved_by': 'human' if approved else None,
+        'recorded_at': '2026-03-01T10:00:00',
+        'ticket_text': NearDuplicateIndex.ticket_text(TICKET),
+        'decision': {'ticket_id': ticket_id, 'requires_approval': True, 'analysis': dict(ANALYSIS)}
+    }
+
+
+def test_human_approved_neighbour_replaces_the_llm_call(data_dir):
+    agent = HealingAgent()
+    agent.decisions.append(past_record('T-OLD', approved=True))
+
+    reused, examples = agent.recall_similar(TICKET)
+    assert reused['root_cause'] == 'webhook_configuration'
+    assert reused['reused_from'] == {'ticket_id': 'T-OLD', 'similarity': 1.0}
+    assert examples == [] and agent.reuse_stats['reused'] == 1
+
+
+def test_unapproved_neighbour_is_only_a_few_shot_example(data_dir):
+    agent = HealingAgent()
+    agent.decisions.append(past_record('T-OLD', approved=False))
+
+    reused, examples = agent.recall_similar(TICKET)
+    assert reused is None
+    assert [(e['root_cause'], e['approved']) for e in examples] == [('webhook_configuration', False)]
+
+
+def test_a_tickets_own_earlier_analysis_is_never_reused(data_dir):
+    agent = HealingAgent()
+    agent.decisions.append(past_record('T-NEW', approved=True))
+    assert agent.recall_similar(TICKET) == (None, [])
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from async_jobs import AsyncRuntime, JobQueueFull, JobStore
+
+
+def wait_for(store, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_run_on_the_loop_and_report_their_outcome():
+    finished = []
+    store = JobStore(AsyncRuntime(), on_finish=finished.append)
+
+    async def answer():
+        await asyncio.sleep(0.01)
+        return {'ok': True}
+
+    async def fail():
+        raise ValueError('bad ticket')
+
+    ok = wait_for(store, store.submit('analyze', answer)['job_id'])
+    failed = wait_for(store, store.submit('analyze', fail)['job_id'])
+    assert (ok['status'], ok['result']) == ('succeeded', {'ok': True})
+    assert (failed['status'], failed['error']) == ('failed', 'bad ticket')
+    assert [job['job_id'] for job in finished] == [ok['job_id'], failed['job_id']]
+
+
+def test_job_limit_and_blocking_executor():
+    runtime = AsyncRuntime()
+    store = JobStore(runtime, max_active=1)
+    release = threading.Event()
+
+    async def blocking_run():
+        # Full runs go to the runtime's own executor, never the loop thread
+        return await runtime.run_blocking(lambda: release.wait(5) and threading.current_thread().name)
+
+    job = store.submit('process-all', blocking_run)
+    with pytest.raises(JobQueueFull):
+        store.submit('process-all', blocking_run)
+    release.set()
+    assert wait_for(store, job['job_id'])['result'].startswith('blocking-job')
+    assert store.stats()['active'] == 0
+
+
+def test_async_batch_keeps_input_order(data_dir):
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    tickets = agent.load_tickets()
+    results = asyncio.run(agent.reason_batch_async(tickets, agent.observe(tickets)))
+    assert [r['success'] for r in results] == [True] * len(tickets)
+    assert all('root_cause' in r['data'] for r in results)
+    assert agent.last_batch['tickets'] == len(tickets)
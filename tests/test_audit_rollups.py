@@ -0,0 +1,44 @@
+from audit_rollups import AuditRollups
+
+
+def entry(status, day, triggered_by='auto'):
+    return {
+        'timestamp': f'2026-03-{day:02d}T10:00:00', 'action': 'send_webhook_configuration_guide',
+        'status': status, 'triggered_by': triggered_by, 'risk_level': 'low'
+    }
+
+
+def test_apply_counts_new_entries(tmp_path):
+    rollups = AuditRollups(str(tmp_path / 'rollups.json'))
+    log = [entry('executed', 1)]
+    rollups.apply(log, log)
+    log.append(entry('pending_approval', 2, 'system'))
+    rollups.apply(log[-1:], log)
+
+    stats = rollups.stats(granularity='day')
+    assert stats['entries'] == 2
+    assert stats['totals']['by_status'] == {'executed': 1, 'pending_approval': 1}
+    assert [bucket['bucket'] for bucket in stats['series']] == ['2026-03-01', '2026-03-02']
+
+
+def test_apply_rebuilds_when_the_log_was_changed_elsewhere(tmp_path):
+    path = str(tmp_path / 'rollups.json')
+    log = [entry('executed', 1)]
+    AuditRollups(path).apply(log, log)
+    # Two entries appended by another process that never updated the rollups
+    log += [entry('executed', 1), entry('rejected', 1, 'human')]
+    log.append(entry('executed', 3))
+
+    rollups = AuditRollups(path)
+    rollups.apply(log[-1:], log)
+    assert rollups.stats()['entries'] == 4
+    assert rollups.stats()['totals']['by_status'] == {'executed': 3, 'rejected': 1}
+
+
+def test_rebuild_replaces_the_counts(tmp_path):
+    rollups = AuditRollups(str(tmp_path / 'rollups.json'))
+    log = [entry('executed', 1), entry('executed', 2)]
+    rollups.apply(log, log)
+    rollups.rebuild([])
+    assert rollups.stats()['totals']['total'] == 0
+    assert rollups.stats(granularity='day')['series'] == []
@@ -0,0 +1,32 @@
+import threading
+
+from change_feed import ChangeFeed
+
+
+def test_resume_from_a_cursor_returns_only_missed_events():
+    feed = ChangeFeed()
+    start = feed.cursor
+    feed.publish('audit', {'entries': []})
+    second = feed.publish('decision', {'ticket_id': 'T-1'})
+
+    assert [e['type'] for e in feed.since(start)] == ['audit', 'decision']
+    assert feed.since(second['id']) == []
+    assert feed.since(None) == []  # a new client starts at the head
+
+
+def test_unresumable_cursors_get_a_reset():
+    feed = ChangeFeed(max_events=2)
+    old = feed.cursor
+    for n in range(3):
+        feed.publish('audit', {'n': n})
+    assert [e['type'] for e in feed.since(old)] == ['reset']
+    assert [e['type'] for e in feed.since('otherepoch:1')] == ['reset']
+
+
+def test_waiting_client_wakes_on_publish():
+    feed = ChangeFeed()
+    cursor = feed.cursor
+    threading.Timer(0.05, feed.publish, args=('review', {'outcome': 'approved'})).start()
+    events = feed.since(cursor, timeout=5)
+    assert [e['data'] for e in events] == [{'outcome': 'approved'}]
+    assert feed.since(events[-1]['id'], timeout=0.01) == []
@@ -0,0 +1,31 @@
+from agent import HealingAgent
+
+
+def test_interrupted_run_resumes_after_the_last_committed_ticket(data_dir):
+    agent = HealingAgent()
+    run = agent.iter_process_tickets(force=True, resume=False)
+    first = [next(run)['ticket']['ticket_id'] for _ in range(2)]
+    run.close()
+
+    checkpoint = agent.run_checkpoint()
+    assert checkpoint['status'] == 'running'
+    assert checkpoint['completed'] == 2
+
+    resumed = HealingAgent().process_all_tickets(force=True)
+    resumed_ids = [r['ticket']['ticket_id'] for r in resumed]
+    assert not set(first) & set(resumed_ids)
+    assert first + resumed_ids == checkpoint['ticket_ids']
+    assert HealingAgent().run_checkpoint()['status'] == 'complete'
+
+
+def test_resume_picks_up_tickets_added_since_the_interruption(data_dir):
+    agent = HealingAgent()
+    run = agent.iter_process_tickets(force=True, resume=False)
+    next(run)
+    run.close()
+
+    new_ticket = dict(agent.tickets[0], ticket_id='T-NEW', merchant_id='M-NEW')
+    agent.add_tickets([new_ticket])
+    resumed = agent.process_all_tickets(force=True)
+    assert resumed[-1]['ticket']['ticket_id'] == 'T-NEW'
+    assert agent.run_checkpoint()['ticket_ids'][-1] == 'T-NEW'
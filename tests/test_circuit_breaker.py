@@ -0,0 +1,37 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, on_state_change=lambda *c: changes.append(c))
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure(RuntimeError('boom'))
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert changes == [(CLOSED, OPEN)]
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.allow()
+    breaker.record_failure(RuntimeError('boom'))
+    assert breaker.state == HALF_OPEN
+
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure(RuntimeError('still down'))
+    assert breaker._state == OPEN
+
+    assert breaker.allow()
+    breaker.record_success(10)
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.allow()
+    breaker.record_failure(RuntimeError('boom'))
+    assert breaker.allow()
+    breaker.record_cancelled()
+    assert breaker.allow()
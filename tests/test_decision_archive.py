@@ -0,0 +1,46 @@
+from decision_archive import append_to_archive, query_archive
+
+
+def record(ticket_id, recorded_at=None):
+    record = {'status': 'executed', 'decision': {'ticket_id': ticket_id}}
+    if recorded_at:
+        record['recorded_at'] = recorded_at
+    return record
+
+
+def test_query_returns_newest_segment_first_and_undated_last(tmp_path):
+    archive_dir = str(tmp_path)
+    append_to_archive(archive_dir, [
+        record('T-old', '2026-01-05T10:00:00'),
+        record('T-undated'),
+        record('T-new', '2026-03-02T09:00:00')
+    ], 'month')
+    assert [r['decision']['ticket_id'] for r in query_archive(archive_dir)] == ['T-new', 'T-old', 'T-undated']
+    assert query_archive(archive_dir, limit=1)[0]['decision']['ticket_id'] == 'T-new'
+
+
+
+def test_compaction_keeps_decisions_appended_while_it_runs(data_dir, monkeypatch):
+    import threading
+
+    import agent as agent_module
+    from agent import HealingAgent
+
+    agent = HealingAgent(retention={'archive_executed': True})
+    agent.decisions.extend(record(f'T-{n}', '2026-03-01T10:00:00') for n in range(3))
+
+    def append_decision():
+        with agent._init_lock:  # as the run loop records a decision
+            agent.decisions.append(record('T-new'))
+
+    writer = threading.Thread(target=append_decision)
+
+    def archive_slowly(*args, **kwargs):
+        writer.start()
+        writer.join(0.2)  # blocked until compaction has replaced the list
+        return append_to_archive(*args, **kwargs)
+
+    monkeypatch.setattr(agent_module, 'append_to_archive', archive_slowly)
+    assert agent.compact_decisions()['archived'] == 3
+    writer.join()
+    assert [r['decision']['ticket_id'] for r in agent.decisions] == ['T-new']
@@ -0,0 +1,17 @@
+from agent import HealingAgent
+
+
+def test_refresh_reloads_only_after_another_writer(data_dir):
+    viewer, writer = HealingAgent(), HealingAgent()
+    assert viewer.decisions == []
+    breaker = viewer.breaker
+
+    viewer.decisions.append({'status': 'executed', 'decision': {'ticket_id': 'T-1'}})
+    viewer._save_decisions()
+    assert not viewer.refresh_decisions()  # its own write
+
+    writer.decisions.append({'status': 'pending_approval', 'decision': {'ticket_id': 'T-2'}})
+    writer._save_decisions()
+    assert viewer.refresh_decisions()
+    assert [r['decision']['ticket_id'] for r in viewer.decisions] == ['T-1', 'T-2']
+    assert viewer.breaker is breaker
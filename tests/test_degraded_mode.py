@@ -0,0 +1,27 @@
+import time
+
+from agent import HealingAgent
+
+
+def test_expired_deadline_gives_a_degraded_analysis_queued_for_reanalysis(data_dir):
+    agent = HealingAgent()
+    tickets = agent.load_tickets()
+    patterns = agent.observe(tickets)
+
+    analysis = agent.reason(tickets[0], patterns, deadline=time.monotonic() - 1)
+    assert analysis['degraded']
+    assert tickets[0]['ticket_id'] in agent.reanalysis_queue
+    assert agent.breaker.state == 'closed'  # running out of time is not a provider failure
+
+
+def test_open_breaker_run_keeps_no_fingerprints(data_dir):
+    agent = HealingAgent()
+    agent.breaker.failure_threshold = 1
+    agent.breaker.reset_timeout = 60
+    agent.breaker.allow()
+    agent.breaker.record_failure(RuntimeError('provider down'))
+
+    results = agent.process_all_tickets(resume=False)
+    assert results and all(r['analysis'].get('degraded') for r in results)
+    assert agent._begin_fingerprints() == {}
+    assert set(agent.reanalysis_queue) == {r['ticket']['ticket_id'] for r in results}
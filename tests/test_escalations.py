@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from escalations import EscalationStore
+
+IMPACT = {'merchant_id': 'M-1', 'checkout_failures': 3, 'affected_customers': 10}
+
+
+def test_lifecycle_from_approval_to_resolution(tmp_path):
+    store = EscalationStore(str(tmp_path / 'escalations.json'))
+    escalation, created = store.open('webhooktimeout', 'T-1', IMPACT)
+    assert created and escalation['status'] == 'pending_approval'
+
+    again, created = store.open('webhooktimeout', 'T-2', IMPACT)
+    assert not created and again['escalation_id'] == escalation['escalation_id']
+    store.attach(escalation['escalation_id'], 'T-2', dict(IMPACT, merchant_id='M-2'))
+
+    with pytest.raises(ValueError):
+        store.resolve(escalation['escalation_id'])  # not approved yet
+    store.update(escalation['escalation_id'], status='escalated')
+    resolved = store.resolve(escalation['escalation_id'], resolution='Fixed in 2.3.1')
+    assert resolved['status'] == 'resolved'
+    assert resolved['ticket_ids'] == ['T-1', 'T-2']
+    assert resolved['total_checkout_failures'] == 6
+
+    # Persisted, and the pattern's next ticket opens a new escalation
+    reloaded = EscalationStore(str(tmp_path / 'escalations.json'))
+    assert reloaded.get(escalation['escalation_id'])['resolution'] == 'Fixed in 2.3.1'
+    assert reloaded.open_for('webhooktimeout') is None
+    assert reloaded.open('webhooktimeout', 'T-3', IMPACT)[1]
+
+
+def test_resolve_unknown_escalation(tmp_path):
+    with pytest.raises(KeyError):
+        EscalationStore(str(tmp_path / 'escalations.json')).resolve('ESC-missing-0001')
+
+
+def pattern_decision(ticket_id, merchant_id):
+    return {
+        'ticket_id': ticket_id, 'action': 'escalate_to_engineering', 'risk_level': 'high',
+        'requires_approval': True, 'reasoning': '', 'confidence': 90,
+        'escalation': {'pattern_id': 'sessionerror', 'merchant_id': merchant_id,
+                       'checkout_failures': 2, 'affected_customers': 5}
+    }
+
+
+def test_pattern_tickets_share_one_escalation_released_on_approval(data_dir):
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    for n in range(3):
+        result = agent.act(pattern_decision(f'T-{n}', f'M-{n}'))
+        result['recorded_at'] = f'2026-03-01T10:00:0{n}'
+        agent.decisions.append(result)
+    assert [r['status'] for r in agent.decisions] == ['pending_approval', 'attached', 'attached']
+    assert len(agent.escalations.find()) == 1
+
+    approved = agent.execute_approved_action('T-0')
+    assert approved['released'] == ['T-1', 'T-2']
+    assert [r['status'] for r in agent.decisions] == ['executed'] * 3
+    assert agent.escalations.find()[0]['status'] == 'escalated'
+
+
+def test_bulk_review_writes_each_store_once(data_dir, monkeypatch):
+    import agent as agent_module
+    import escalations as escalations_module
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    for n, pattern in enumerate(['sessionerror', 'sessionerror', 'webhooktimeout', 'webhooktimeout']):
+        decision = pattern_decision(f'T-{n}', f'M-{n}')
+        decision['escalation']['pattern_id'] = pattern
+        result = agent.act(decision)
+        result['recorded_at'] = f'2026-03-01T10:00:0{n}'
+        agent.decisions.append(result)
+
+    writes = []
+    for module in (agent_module, escalations_module):
+        real = module.write_json_atomic
+        monkeypatch.setattr(module, 'write_json_atomic',
+                            lambda path, data, real=real: writes.append(os.path.basename(path)) or real(path, data))
+
+    outcome = agent.approve_actions(filters={'action': 'escalate_to_engineering'})
+    assert outcome['ticket_ids'] == ['T-0', 'T-2'] and outcome['released'] == ['T-1', 'T-3']
+    assert sorted(writes) == ['audit_log.json', 'decisions.json', 'escalations.json']
+    assert {e['status'] for e in agent.escalations.find()} == {'escalated'}
+    audit = agent.get_audit_log()
+    assert [(e['ticket_id'], e['triggered_by']) for e in audit[-4:]] == [
+        ('T-0', 'human'), ('T-2', 'human'), ('T-1', 'human'), ('T-3', 'human')
+    ]
+
+
+def test_rejection_requeues_attachments_in_one_write(data_dir, monkeypatch):
+    import escalations as escalations_module
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    for n in range(3):
+        result = agent.act(pattern_decision(f'T-{n}', f'M-{n}'))
+        result['recorded_at'] = f'2026-03-01T10:00:0{n}'
+        agent.decisions.append(result)
+
+    writes = []
+    real = escalations_module.write_json_atomic
+    monkeypatch.setattr(escalations_module, 'write_json_atomic',
+                        lambda path, data: writes.append(path) or real(path, data))
+    rejected = agent.reject_action('T-0', reason='Not a platform bug')
+    assert rejected['requeued'] == ['T-1', 'T-2']
+    assert len(writes) == 1
+    assert [r['status'] for r in agent.decisions] == ['rejected', 'pending_approval', 'attached']
+    assert agent.get_audit_log()[-1]['triggered_by'] == 'system'
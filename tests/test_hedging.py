@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import DeadlineExceeded
+from hedging import HedgedCaller
+
+
+def test_slow_primary_is_hedged():
+    hedger = HedgedCaller(initial_delay=0.02, max_workers=4)
+    answers = iter(['slow', 'fast'])
+
+    def request():
+        answer = next(answers)
+        if answer == 'slow':
+            time.sleep(0.3)
+        return answer
+
+    assert hedger.call('model', request) == 'fast'
+    assert hedger.stats()['hedge_wins'] == 1
+
+
+def test_no_hedge_while_every_worker_is_busy():
+    hedger = HedgedCaller(initial_delay=0.02, max_workers=1)
+    assert hedger.call('model', lambda: time.sleep(0.1) or 'primary') == 'primary'
+    stats = hedger.stats()
+    assert (stats['hedges'], stats['hedges_skipped_busy']) == (0, 1)
+
+
+def test_waiting_for_a_worker_is_bounded_by_the_deadline():
+    hedger = HedgedCaller(initial_delay=10, max_workers=1)
+    release = threading.Event()
+    blocker = threading.Thread(target=hedger.call, args=('model', release.wait))
+    blocker.start()
+    try:
+        time.sleep(0.05)  # the only worker is now busy
+        began = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            hedger.call('model', lambda: 'never', deadline=began + 0.1)
+        assert time.monotonic() - began < 1
+    finally:
+        release.set()
+        blocker.join()
+
+
+def test_slow_answer_is_bounded_by_the_deadline():
+    hedger = HedgedCaller(initial_delay=10, max_workers=2)
+    release = threading.Event()
+    with pytest.raises(DeadlineExceeded):
+        hedger.call('model', release.wait, deadline=time.monotonic() + 0.1)
+    release.set()
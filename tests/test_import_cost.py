@@ -0,0 +1,11 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_agent_defers_heavy_dependencies():
+    probe = "import sys, agent; print(sorted(m for m in ('asyncio', 'groq', 'dotenv') if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
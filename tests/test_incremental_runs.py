@@ -0,0 +1,29 @@
+from agent import HealingAgent
+
+
+def analyzed(results):
+    return sorted(r['ticket']['ticket_id'] for r in results if not r.get('skipped'))
+
+
+def test_unchanged_tickets_are_not_reanalyzed(data_dir):
+    first = HealingAgent().process_all_tickets(resume=False)
+    assert len(analyzed(first)) == 5
+
+    agent = HealingAgent()
+    again = agent.process_all_tickets()
+    assert analyzed(again) == [] and len(again) == 5
+    assert agent.reuse_stats['llm_calls'] == 0
+    assert len(analyzed(agent.process_all_tickets(force=True))) == 5
+
+
+def test_changed_content_or_pattern_context_is_reanalyzed(data_dir):
+    agent = HealingAgent()
+    agent.process_all_tickets(resume=False)
+    tickets = {t['ticket_id']: t for t in agent.tickets}
+
+    # Edited text: only that ticket. A new merchant with the same error: the new
+    # ticket and the one whose pattern counts changed
+    edited = dict(tickets['TKT-18146'], merchant_message='Shipping rates still missing at checkout.')
+    twin = dict(tickets['TKT-18145'], ticket_id='TKT-20000', merchant_id='M-NEW')
+    agent.add_tickets([edited, twin])
+    assert analyzed(agent.process_all_tickets()) == ['TKT-18145', 'TKT-18146', 'TKT-20000']
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from ingestion import IngestionDaemon, IngestQueueFull, parse_ndjson
+
+
+def test_parse_ndjson_fills_defaults_and_rejects_bad_batches():
+    body = '{"ticket_id": "T-1", "merchant_id": "M-1", "issue": "Checkout down"}\n\n'
+    [ticket] = parse_ndjson(body.encode('utf-8'))
+    assert (ticket['error_log'], ticket['severity'], ticket['checkout_failures']) == ('', 'medium', 0)
+
+    with pytest.raises(ValueError) as error:
+        parse_ndjson(body + 'not json\n{"ticket_id": "T-2"}\n')
+    assert 'line 3: invalid JSON' in str(error.value)
+    assert 'line 4: missing merchant_id, issue' in str(error.value)
+
+
+def test_full_queue_rejects_the_whole_batch():
+    daemon = IngestionDaemon(agent=None, capacity=3)  # not started: nothing drains the queue
+    assert daemon.offer([{'ticket_id': 'T-1'}, {'ticket_id': 'T-2'}]) == 2
+    with pytest.raises(IngestQueueFull) as full:
+        daemon.offer([{'ticket_id': 'T-3'}, {'ticket_id': 'T-4'}])
+    assert full.value.retry_after == 5
+    stats = daemon.stats()
+    assert (stats['depth'], stats['accepted'], stats['rejected']) == (2, 2, 2)
+    with pytest.raises(ValueError):
+        daemon.offer([{}] * 4)
+
+
+def test_daemon_adds_and_processes_queued_tickets(data_dir):
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    agent.load_tickets()
+    daemon = agent.use_ingestion(batch_size=2, max_wait=0.01)
+    daemon.offer(parse_ndjson('\n'.join(json.dumps({
+        'ticket_id': f'T-IN-{n}', 'merchant_id': f'M-IN-{n}', 'issue': 'Order webhook failing',
+        'error_log': 'WebhookTimeout: order.created failed after 30s'
+    }) for n in range(3))))
+    assert daemon.join(timeout=10)
+    agent.use_ingestion(False)
+
+    stats = daemon.stats()
+    assert (stats['processed'], stats['failed'], stats['batches']) == (3, 0, 2)
+    assert {f'T-IN-{n}' for n in range(3)} <= {t['ticket_id'] for t in agent.load_tickets()}
+    decided = {r['decision']['ticket_id'] for r in agent.decisions}
+    assert {f'T-IN-{n}' for n in range(3)} <= decided
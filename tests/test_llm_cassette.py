@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from llm_cassette import Cassette, CassetteMiss, ReplayClient
+
+MESSAGES = [{'role': 'user', 'content': 'Analyze ticket T-1'}]
+
+
+def test_replay_serves_recorded_responses_in_order(tmp_path):
+    cassette = Cassette(str(tmp_path / 'run.jsonl'))
+    for text in ('first', 'second'):
+        cassette.record({'model': 'm', 'messages': MESSAGES, 'temperature': 0.3, 'max_tokens': 1024}, text, 12.0)
+
+    client = ReplayClient(Cassette(str(tmp_path / 'run.jsonl')), latency_scale=0)
+    create = client.chat.completions.create
+    answers = [create(model='m', messages=MESSAGES, temperature=0.3, max_tokens=1024).choices[0].message.content
+               for _ in range(3)]
+    assert answers == ['first', 'second', 'second']  # the last one repeats
+    streamed = create(model='m', messages=MESSAGES, temperature=0.3, max_tokens=1024, stream=True)
+    assert ''.join(chunk.choices[0].delta.content for chunk in streamed) == 'second'
+    with pytest.raises(CassetteMiss):
+        create(model='other', messages=MESSAGES, temperature=0.3, max_tokens=1024)
+
+
+def test_async_replay(tmp_path):
+    cassette = Cassette(str(tmp_path / 'run.jsonl'))
+    cassette.record({'model': 'm', 'messages': MESSAGES, 'cassette_key': 'v1:abc'}, 'answer', 5.0)
+    client = ReplayClient(cassette, latency_scale=0, asynchronous=True)
+    # The cassette key, not the messages, identifies the request
+    response = asyncio.run(client.chat.completions.create(model='m', messages=[], cassette_key='v1:abc'))
+    assert response.choices[0].message.content == 'answer'
+
+
+def test_recorded_run_replays_identically(data_dir, tmp_path):
+    from agent import HealingAgent
+
+    path = str(tmp_path / 'incident.jsonl')
+    recorder = HealingAgent()
+    recorder.use_cassette(path, mode='record')
+    recorded = recorder.process_all_tickets(resume=False, stream=False)
+    assert len(recorder.cassette) == 5
+
+    replayer = HealingAgent()
+    replayer.use_cassette(path, mode='replay', latency_scale=0)
+    replayed = replayer.process_all_tickets(force=True, resume=False, stream=False)
+    assert [r['analysis'] for r in replayed] == [r['analysis'] for r in recorded]
+    assert replayer.cassette.stats == {'recorded': 0, 'replayed': 5, 'misses': 0}
@@ -0,0 +1,36 @@
+import os
+
+import loadtest
+
+
+def test_percentile_is_nearest_rank():
+    values = sorted(float(n) for n in range(1, 101))
+    assert [loadtest.percentile(values, p) for p in (50, 95, 99)] == [50.0, 95.0, 99.0]
+    assert loadtest.percentile([1.0, 2.0, 3.0], 50) == 2.0
+    assert loadtest.percentile([], 95) == 0.0
+
+
+def test_recorder_reports_per_endpoint():
+    recorder = loadtest.LatencyRecorder()
+    for seconds in (0.01, 0.02, 0.03):
+        recorder.record('GET /api/tickets', seconds, 200)
+    recorder.record('GET /api/tickets', 0.5, 429, error='HTTP 429: busy')
+
+    report = recorder.report(elapsed=2.0)['GET /api/tickets']
+    assert (report['requests'], report['throughput_rps'], report['error_rate']) == (4, 2.0, 0.25)
+    assert report['statuses'] == {'200': 3, '429': 1}
+    assert report['latency_ms']['max'] == 500.0
+    assert report['top_errors'] == {'HTTP 429: busy': 1}
+
+
+def test_snapshot_restores_the_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(loadtest, 'DATA_DIR', str(tmp_path))
+    (tmp_path / 'tickets.json').write_text('[]')
+    backup = loadtest.snapshot_data()
+
+    (tmp_path / 'tickets.json').write_text('[{"ticket_id": "T-1"}]')
+    (tmp_path / 'audit_rollups.json').write_text('{}')
+    loadtest.restore_data(backup)
+    assert (tmp_path / 'tickets.json').read_text() == '[]'
+    assert not (tmp_path / 'audit_rollups.json').exists()
+    assert not os.path.exists(backup)
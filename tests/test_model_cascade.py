@@ -0,0 +1,89 @@
+import json
+
+from agent import HealingAgent
+from model_cascade import ModelCascade
+
+FAST_ANSWER = {
+    'root_cause': 'webhook_configuration', 'confidence': 95, 'is_pattern': False,
+    'recommended_priority': 'medium', 'explanation': 'Endpoint misconfigured'
+}
+
+
+def test_pattern_reason_comes_from_the_caller_not_the_answer():
+    cascade = ModelCascade('fast', 'large')
+    assert cascade.escalation_reasons(dict(FAST_ANSWER, is_pattern=True)) == []
+    assert cascade.escalation_reasons(FAST_ANSWER, is_pattern=True) == ['pattern']
+
+
+def cascading_agent(monkeypatch, fast_answer):
+    agent = HealingAgent()
+    agent.use_cascade()
+    calls = []
+
+    def completion(messages, model, deadline=None, cassette_key=None):
+        calls.append(model)
+        return json.dumps(fast_answer), None, 1.0
+
+    monkeypatch.setattr(agent, '_timed_completion', completion)
+    return agent, calls
+
+
+def test_measured_pattern_escalates_a_fast_answer_that_denies_it(data_dir, monkeypatch):
+    agent, calls = cascading_agent(monkeypatch, FAST_ANSWER)
+    tickets = agent.load_tickets()
+    session = next(t for t in tickets if t['ticket_id'] == 'TKT-18145')
+    agent.add_tickets([dict(session, ticket_id=f'TKT-9{n}', merchant_id=f'M-9{n}') for n in range(2)])
+
+    analysis = agent.reason(session, agent.observe(agent.tickets))
+    assert calls == [agent.cascade.fast_model, agent.model_name]
+    assert analysis['cascade'] == {'tier': 'large', 'escalated_for': ['pattern']}
+
+
+def test_fast_answer_claiming_a_pattern_is_kept_without_evidence(data_dir, monkeypatch):
+    agent, calls = cascading_agent(monkeypatch, dict(FAST_ANSWER, is_pattern=True))
+    tickets = agent.load_tickets()
+    shipping = next(t for t in tickets if t['ticket_id'] == 'TKT-18146')
+
+    analysis = agent.reason(shipping, agent.observe(tickets))
+    assert calls == [agent.cascade.fast_model]
+    assert analysis['cascade'] == {'tier': 'fast', 'escalated_for': []}
+
+
+def test_schema_and_confidence_gates():
+    cascade = ModelCascade('fast', 'large', min_confidence=80)
+    assert cascade.escalation_reasons(None, parse_error=ValueError('no JSON')) == ['unparseable']
+    assert cascade.escalation_reasons(dict(FAST_ANSWER, root_cause='gremlins')) == ['invalid_schema']
+    assert cascade.escalation_reasons(dict(FAST_ANSWER, confidence=60, recommended_priority='critical')) == [
+        'low_confidence', 'critical_priority'
+    ]
+
+
+def test_critical_tickets_skip_the_fast_tier(data_dir, monkeypatch):
+    agent, calls = cascading_agent(monkeypatch, FAST_ANSWER)
+    tickets = agent.load_tickets()
+    critical = next(t for t in tickets if t['severity'] == 'critical')
+
+    analysis = agent.reason(critical, agent.observe(tickets))
+    assert calls == [agent.model_name]
+    assert analysis['cascade'] == {'tier': 'large', 'escalated_for': ['critical_ticket']}
+    assert agent.cascade.stats()['direct_to_large'] == 1
+
+
+def test_escalated_fast_answer_is_used_when_the_large_model_fails(data_dir, monkeypatch):
+    agent = HealingAgent()
+    agent.use_cascade()
+
+    def completion(messages, model, deadline=None, cassette_key=None):
+        if model == agent.cascade.fast_model:
+            return json.dumps(dict(FAST_ANSWER, root_cause='documentation_gap', confidence=50)), None, 1.0
+        return None, TimeoutError('large model timed out'), 1.0
+
+    monkeypatch.setattr(agent, '_timed_completion', completion)
+    tickets = agent.load_tickets()
+    shipping = next(t for t in tickets if t['ticket_id'] == 'TKT-18146')
+
+    analysis = agent.reason(shipping, agent.observe(tickets))
+    assert analysis['root_cause'] == 'documentation_gap' and not analysis.get('degraded')
+    assert analysis['cascade']['unaudited'] and 'timed out' in analysis['cascade']['large_error']
+    decision = agent.decide(shipping, analysis)
+    assert decision['action'] == 'update_migration_documentation' and decision['requires_approval']
@@ -0,0 +1,37 @@
+from near_duplicates import NearDuplicateIndex
+
+TEXT = 'Checkout fails with SessionError: session token expired during payment step'
+
+
+def ticket(n, text=TEXT):
+    return {'ticket_id': f'T-{n}', 'merchant_id': f'M-{n}', 'issue': text, 'merchant_message': '', 'error_log': ''}
+
+
+def test_sync_drops_removed_tickets_from_clusters():
+    index = NearDuplicateIndex()
+    tickets = [ticket(n) for n in range(4)]
+    index.sync_tickets(tickets)
+    assert index.cluster('T-0')['merchant_count'] == 4
+
+    index.sync_tickets(tickets[:2])
+    assert len(index) == 2
+    assert index.cluster('T-0')['merchant_count'] == 2
+
+
+def test_sync_reindexes_edited_tickets():
+    index = NearDuplicateIndex()
+    tickets = [ticket(n) for n in range(3)]
+    index.sync_tickets(tickets)
+    tickets[2] = ticket(2, 'Theme fonts reverted to defaults on the storefront')
+    index.sync_tickets(tickets)
+    assert index.cluster('T-0')['ticket_ids'] == ['T-0', 'T-1']
+    assert index.cluster('T-2')['size'] == 1
+
+
+def test_sync_only_inserts_new_tickets():
+    index = NearDuplicateIndex()
+    index.sync_tickets([ticket(0)])
+    parent = index._parent
+    index.sync_tickets([ticket(0), ticket(1)])
+    assert index._parent is parent
+    assert index.cluster('T-1')['size'] == 2
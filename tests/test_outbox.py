@@ -0,0 +1,46 @@
+import os
+
+from outbox import Outbox, local_sinks
+
+
+def make_outbox(tmp_path, **options):
+    return Outbox(str(tmp_path / 'outbox.jsonl'), local_sinks(str(tmp_path / 'sinks')), **options)
+
+
+def test_delivered_entries_leave_memory_and_the_journal(tmp_path):
+    outbox = make_outbox(tmp_path, keep_delivered=2, compact_after=0).start()
+    ids = [outbox.enqueue('email', {'n': n}, idempotency_key=f'key-{n}')['id'] for n in range(5)]
+    assert outbox.flush()
+    outbox.stop()
+
+    stats = outbox.stats()
+    assert (stats['total'], stats['by_state']) == (5, {'delivered': 5})
+    assert [e['id'] for e in outbox.entries()] == ids[-2:]
+    assert outbox.get(ids[0]) is None and outbox.get(ids[-1])['state'] == 'delivered'
+    assert outbox.enqueue('email', {'n': 4}, idempotency_key='key-4')['duplicate']
+
+    with open(tmp_path / 'outbox.jsonl', encoding='utf-8') as f:
+        assert sum(1 for line in f if line.strip()) <= 2
+    assert make_outbox(tmp_path).entries() == []
+    with open(tmp_path / 'sinks' / 'email.jsonl', encoding='utf-8') as f:
+        assert len(f.readlines()) == 5
+
+
+def test_queued_decision_message_follows_delivery(data_dir):
+    from agent import HealingAgent
+
+    agent = HealingAgent(outbox=True)
+    decision = {
+        'ticket_id': 'T-1', 'action': 'send_webhook_configuration_guide', 'risk_level': 'low',
+        'requires_approval': False, 'reasoning': '', 'confidence': 90, 'analysis': {}
+    }
+    result = agent.act(decision)
+    assert result['status'] == 'queued'
+    assert result['message'] == '📤 Queued for delivery (email): send_webhook_configuration_guide'
+
+    agent.decisions.append(result)
+    assert agent.outbox.flush()
+    agent._settle_if_delivered(result)
+    assert (result['status'], result['message']) == ('executed', '📬 Delivered: send_webhook_configuration_guide')
+    agent.outbox.stop()
+    assert os.path.exists(os.path.join(data_dir, 'sinks', 'email.jsonl'))
@@ -0,0 +1,61 @@
+from agent import HealingAgent
+from error_index import is_specific_signature
+
+ISSUES = [
+    ('Orders page shows blank totals', 'Totals column is empty on the orders page since yesterday.'),
+    ('Theme fonts reverted', 'Our storefront fonts switched back to the defaults after the migration.'),
+    ('Cannot export customer CSV', 'The customer export button spins forever and never downloads.'),
+]
+
+
+def make_ticket(n, error_log, issue=None, message=None):
+    issue, message = (issue, message) if issue else ISSUES[n % len(ISSUES)]
+    return {
+        'ticket_id': f'T-{n}',
+        'merchant_id': f'M-{n}',
+        'issue': issue,
+        'merchant_message': message,
+        'error_log': error_log,
+        'migration_stage': 'post_migration',
+        'severity': 'medium',
+        'checkout_failures': 2,
+        'affected_customers': 1
+    }
+
+
+def analysis():
+    return {'root_cause': 'migration_issue', 'confidence': 65, 'is_pattern': False}
+
+
+def test_generic_signatures():
+    assert not is_specific_signature('Unknown')
+    assert not is_specific_signature('500')
+    assert not is_specific_signature('HTTP 502')
+    assert not is_specific_signature('404 Not Found')
+    assert is_specific_signature('WebhookTimeout')
+    assert is_specific_signature('PaymentGatewayError')
+
+
+def test_unrelated_tickets_without_error_type_are_not_a_pattern():
+    for error_log in ('', 'HTTP 500: request failed'):
+        agent = HealingAgent()
+        tickets = [make_ticket(n, error_log) for n in range(3)]
+        agent.error_index.update(tickets)
+        result = analysis()
+        decision = agent.decide(tickets[0], result)
+        assert decision['action'] not in ('escalate_to_engineering', 'attach_to_escalation')
+        assert result['is_pattern'] is False
+        assert result['affected_merchants'] == 1
+        assert decision['pattern_evidence']['error_signature']['specific'] is False
+
+
+def test_specific_signature_across_merchants_is_a_pattern():
+    agent = HealingAgent()
+    tickets = [make_ticket(n, 'LedgerSyncError: journal write rejected') for n in range(3)]
+    agent.error_index.update(tickets)
+    result = analysis()
+    decision = agent.decide(tickets[0], result)
+    assert result['is_pattern'] is True
+    assert result['affected_merchants'] == 3
+    assert decision['action'] in ('escalate_to_engineering', 'attach_to_escalation')
+    assert decision['escalation']['pattern_id'] == 'ledgersyncerror'
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from profiling import Profiler, ProfilerBusy, format_summary
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+def test_profile_is_written_and_pruned(tmp_path):
+    for _ in range(3):
+        with Profiler('unit test', profile_dir=str(tmp_path), keep=2) as profiler:
+            busy_work()
+    summary = profiler.summary
+    assert summary['profile_id'].endswith('-unit-test')
+    assert any('busy_work' in entry['function'] for entry in summary['top_cumulative'])
+    assert summary['memory']['peak_kb'] >= 0
+    assert len(os.listdir(tmp_path)) == 4  # newest two .prof/.txt pairs
+    assert summary['profile_id'] in format_summary(summary)
+
+
+def test_only_one_profile_at_a_time(tmp_path):
+    with Profiler('outer', profile_dir=str(tmp_path), memory=False):
+        with pytest.raises(ProfilerBusy):
+            with Profiler('inner', profile_dir=str(tmp_path), memory=False):
+                pass
+
+
+def test_profiled_run_writes_to_the_data_dir(data_dir):
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    agent.process_all_tickets(profile=True, resume=False)
+    assert agent.last_profile['wall_ms'] > 0
+    assert len(os.listdir(os.path.join(data_dir, 'profiles'))) == 2
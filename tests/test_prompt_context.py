@@ -0,0 +1,39 @@
+from prompt_context import PromptContextBuilder, estimate_tokens, top_counts
+
+
+def backlog(error_types):
+    return {
+        'total_tickets': sum(error_types.values()),
+        'error_patterns': error_types,
+        'critical_count': 3,
+        'migration_stages': {'pre-migration': 5, 'post-migration-day-1': 7},
+        'total_checkout_failures': 120
+    }
+
+
+def test_top_counts_keeps_the_tickets_own_type():
+    kept, other = top_counts({'A': 9, 'B': 5, 'C': 1, 'D': 2}, 2, keep=('C',))
+    assert kept == {'A': 9, 'C': 1}
+    assert other == {'types': 2, 'count': 7}
+    assert top_counts({'A': 1}, 2) == ({'A': 1}, None)
+
+
+def test_small_backlog_is_shown_unchanged():
+    section, info = PromptContextBuilder().build(backlog({'WebhookTimeout': 3, 'SessionError': 2}), 'SessionError')
+    assert "{'WebhookTimeout': 3, 'SessionError': 2}" in section
+    assert not info['truncated'] and not info['over_budget']
+
+
+def test_large_backlog_fits_the_token_budget():
+    error_types = {f'GeneratedError{n:04d}': n + 1 for n in range(500)}
+    builder = PromptContextBuilder(token_budget=120, top_k=8)
+    section, info = builder.build(backlog(error_types), 'GeneratedError0000', 'pre-migration')
+
+    assert info['truncated'] and not info['over_budget']
+    assert info['context_tokens'] == estimate_tokens(section) <= 120
+    assert 'GeneratedError0000' in section and 'other (' in section
+    assert info['error_types_shown'] <= 8 and info['error_types_total'] == 500
+
+    builder.record('T-1', 400, info)
+    assert builder.tokens_for('T-1') == 400
+    assert builder.stats()['truncated'] == 1
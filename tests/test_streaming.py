@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser
+
+ANSWER = {
+    'root_cause': 'webhook_configuration', 'confidence': 88, 'is_pattern': False,
+    'recommended_priority': 'high', 'root_cause_explanation': 'The endpoint returns "502" since the migration.',
+    'pattern_details': {'merchants': ['M1', 'M2']}, 'assumptions': []
+}
+
+
+def test_parser_completes_fields_as_chunks_arrive():
+    text = '```json\n' + json.dumps(ANSWER) + '\n```'
+    parser = IncrementalJSONParser()
+    seen, ready_at = [], None
+    for i in range(0, len(text), 7):
+        seen.extend(parser.feed(text[i:i + 7]))
+        if ready_at is None and parser.has(('root_cause', 'confidence', 'is_pattern')):
+            ready_at = set(parser.fields)
+    assert 'root_cause_explanation' not in ready_at
+    assert seen == list(ANSWER)
+    assert parser.fields == ANSWER and parser.done
+
+
+def test_stream_decides_before_the_explanation_arrives(data_dir):
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    tickets = agent.load_tickets()
+    partial = {}
+
+    def on_decision_fields(analysis):
+        partial.update(analysis)
+
+    analysis, early = agent.reason_streaming(tickets[0], agent.observe(tickets), on_decision_fields)
+    assert early
+    assert {'root_cause', 'confidence', 'is_pattern'} <= set(partial)
+    assert 'root_cause_explanation' not in partial
+    assert 'root_cause_explanation' in analysis  # completed in place when the stream ended
+
+
+def test_act_failure_is_not_mistaken_for_a_bad_llm_response(data_dir, monkeypatch):
+    from agent import HealingAgent
+
+    agent = HealingAgent()
+    tickets = agent.load_tickets()
+
+    def failing_act(decision, triggered_by='auto'):
+        raise RuntimeError('sink unavailable')
+
+    monkeypatch.setattr(agent, 'act', failing_act)
+    with pytest.raises(RuntimeError, match='sink unavailable'):
+        agent._process_ticket(tickets[0], agent.observe(tickets), stream=True)